@@ -1,10 +1,13 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 from modeltranslation.admin import TranslationAdmin
+from ckeditor_uploader.utils import storage as ckeditor_storage
+from .direct_uploads import DirectUploadAdminMixin
 from .models import (
     Profile, Service, ServiceImage, ServiceReview, Publication, Project, BlogPost,
-    ServiceOrder, Achievement, Testimonial, ContactMessage,
-    Book, BookOrder
+    Category, Tag, ServiceOrder, Achievement, Testimonial, ContactMessage,
+    Book, BookOrder, Outbox, EditorUpload
 )
 
 
@@ -43,7 +46,8 @@ class ServiceAdmin(TranslationAdmin):
 
 
 @admin.register(Publication)
-class PublicationAdmin(TranslationAdmin):
+class PublicationAdmin(DirectUploadAdminMixin, TranslationAdmin):
+    direct_upload_fields = ('pdf_file',)
     list_display = ['title', 'publication_type', 'year', 'citation_count', 'is_featured', 'created_at']
     list_filter = ['publication_type', 'year', 'is_featured']
     search_fields = ['title', 'authors', 'keywords', 'abstract']
@@ -85,9 +89,10 @@ class ProjectAdmin(TranslationAdmin):
 @admin.register(BlogPost)
 class BlogPostAdmin(TranslationAdmin):
     list_display = ['title', 'category', 'is_published', 'views_count', 'published_at']
-    list_filter = ['is_published', 'category', 'created_at']
-    search_fields = ['title', 'excerpt', 'tags']
+    list_filter = ['is_published', 'category', 'tags', 'created_at']
+    search_fields = ['title', 'excerpt', 'tags__name']
     prepopulated_fields = {'slug': ('title',)}
+    filter_horizontal = ['tags']
     list_editable = ['is_published']
     date_hierarchy = 'published_at'
     ordering = ['-published_at', '-created_at']
@@ -111,6 +116,29 @@ class BlogPostAdmin(TranslationAdmin):
         css = {
             'all': ('https://cdnjs.cloudflare.com/ajax/libs/codemirror/5.65.2/codemirror.min.css',)
         }
+    
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.select_related('category')
+
+
+@admin.register(Category)
+class CategoryAdmin(TranslationAdmin):
+    list_display = ['name', 'slug', 'posts_count', 'order']
+    search_fields = ['name']
+    prepopulated_fields = {'slug': ('name',)}
+    list_editable = ['order']
+    readonly_fields = ['posts_count']
+    ordering = ['order', 'name']
+
+
+@admin.register(Tag)
+class TagAdmin(TranslationAdmin):
+    list_display = ['name', 'slug', 'posts_count']
+    search_fields = ['name']
+    prepopulated_fields = {'slug': ('name',)}
+    readonly_fields = ['posts_count']
+    ordering = ['name']
 
 
 @admin.register(ServiceOrder)
@@ -195,7 +223,8 @@ class ContactMessageAdmin(admin.ModelAdmin):
 
 
 @admin.register(Book)
-class BookAdmin(TranslationAdmin):
+class BookAdmin(DirectUploadAdminMixin, TranslationAdmin):
+    direct_upload_fields = ('cover_image', 'pdf_file')
     list_display = ['title', 'author', 'publication_year', 'price', 'is_available', 'is_featured', 'views_count']
     list_filter = ['is_available', 'is_featured', 'publication_year', 'language']
     search_fields = ['title', 'author', 'description', 'isbn']
@@ -306,3 +335,45 @@ class ServiceReviewAdmin(TranslationAdmin):
         qs = super().get_queryset(request)
         return qs.select_related('service')
 
+
+@admin.register(Outbox)
+class OutboxAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'channel', 'recipients', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['channel', 'status', 'created_at']
+    search_fields = ['subject', 'recipients', 'body']
+    readonly_fields = ['attempts', 'last_error', 'created_at', 'sent_at']
+    ordering = ['-created_at']
+    date_hierarchy = 'created_at'
+    actions = ['retry_now']
+    
+    @admin.action(description='Отправить повторно')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', next_attempt_at=timezone.now())
+        self.message_user(request, f'Поставлено в очередь: {updated}')
+
+
+@admin.register(EditorUpload)
+class EditorUploadAdmin(admin.ModelAdmin):
+    """Файлы из CKEditor; при удалении записи файл удаляется из хранилища"""
+    list_display = ['thumbnail_preview', 'filename', 'path', 'dimensions', 'size', 'uploaded_by', 'created_at']
+    list_display_links = ['filename']
+    list_filter = ['is_image', 'created_at']
+    search_fields = ['filename', 'path']
+    readonly_fields = ['path', 'filename', 'thumbnail', 'size', 'width', 'height', 'is_image', 'uploaded_by', 'created_at']
+    list_select_related = ['uploaded_by']
+    date_hierarchy = 'created_at'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    @admin.display(description='Превью')
+    def thumbnail_preview(self, obj):
+        if obj.thumbnail:
+            return format_html('<img src="{}" style="max-height: 50px;">', ckeditor_storage.url(obj.thumbnail))
+        return ''
+    
+    @admin.display(description='Размеры')
+    def dimensions(self, obj):
+        if obj.width:
+            return f'{obj.width}×{obj.height}'
+        return ''
@@ -7,4 +7,5 @@ class CoreConfig(AppConfig):
     
     def ready(self):
         import core.translation  # noqa
+        import core.signals  # noqa
 
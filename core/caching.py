@@ -0,0 +1,232 @@
+"""
+Кеширование публичных страниц и профиля врача
+
+Страница кешируется по хосту, пути, активному языку и тем параметрам
+строки запроса, которые читает view (query_params декоратора): метки
+utm_*, fbclid и прочий мусор не создают новых записей. Ответ на запрос с
+посторонними параметрами отдаётся из кеша, но не сохраняется в него —
+ссылки пагинации на такой странице сохраняют все параметры запроса.
+Все записи привязаны к «поколению» кеша: при изменении любой контентной
+модели (см. core.signals) поколение меняется, и старые записи больше не
+используются. Работает с locmem и файловым бэкендом Django.
+
+XML-документы для роботов (sitemap, ленты) кешируются отдельно
+(conditional_cache): их записи привязаны к версиям только тех моделей, из
+которых они строятся, а ответ отдаётся с ETag и Last-Modified, чтобы на
+повторный запрос робота хватало ответа 304.
+"""
+import hashlib
+import re
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils import translation
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe, quote_etag, urlencode
+
+from .models import Profile
+
+GENERATION_KEY = 'core:page_cache:generation'
+PROFILE_VERSION_KEY = 'core:profile:version'
+VERSION_KEY = 'core:version:{}'
+CSRF_PLACEHOLDER = '__CORE_CSRF_TOKEN__'
+
+_csrf_input_re = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def get_generation():
+    """Текущее поколение кеша страниц"""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        if not cache.add(GENERATION_KEY, generation, timeout=None):
+            generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def invalidate_public_pages():
+    """Сбрасывает кеш всех публичных страниц"""
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+# Профиль в памяти процесса: {язык: (версия, профиль)}
+_profile_cache = {}
+
+
+def get_profile():
+    """
+    Профиль врача для текущего языка
+
+    Хранится в памяти процесса; актуальность проверяется по версии в общем
+    кеше, которую меняет сохранение профиля в любом из процессов
+    """
+    language = translation.get_language() or settings.LANGUAGE_CODE
+    version = cache.get(PROFILE_VERSION_KEY)
+    cached = _profile_cache.get(language)
+    if cached is not None and version is not None and cached[0] == version:
+        return cached[1]
+
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(PROFILE_VERSION_KEY, version, timeout=None):
+            version = cache.get(PROFILE_VERSION_KEY, version)
+    profile = Profile.objects.first()
+    _profile_cache[language] = (version, profile)
+    return profile
+
+
+def invalidate_profile():
+    """Сбрасывает закешированный профиль во всех процессах"""
+    _profile_cache.clear()
+    cache.set(PROFILE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def get_version(name):
+    """Версия группы закешированных документов (например, 'sitemap:blog')"""
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(*names):
+    """Делает недействительными документы, построенные по указанным версиям"""
+    cache.set_many({VERSION_KEY.format(name): uuid.uuid4().hex for name in names}, timeout=None)
+
+
+def _is_cacheable_request(request):
+    """
+    Кешируем только анонимные GET/HEAD без сессии и flash-сообщений:
+    такие запросы не требуют обращения к базе данных
+    """
+    if not getattr(settings, 'PAGE_CACHE_ENABLED', True):
+        return False
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return False
+    if 'messages' in request.COOKIES:
+        return False
+    return True
+
+
+def _page_cache_key(request, query_params):
+    raw = '|'.join([
+        request.get_host(),
+        request.path,
+        urlencode([(name, value) for name in sorted(query_params) for value in request.GET.getlist(name)]),
+        translation.get_language() or settings.LANGUAGE_CODE,
+    ])
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f'core:page:{get_generation()}:{digest}'
+
+
+def public_page_cache(view=None, *, on_hit=None, query_params=()):
+    """
+    Декоратор полностраничного кеша для публичных view
+
+    query_params — имена параметров строки запроса, от которых зависит
+    страница; on_hit(request, *args, **kwargs) вызывается при отдаче
+    страницы из кеша и не должен обращаться к базе данных (как record_view)
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            key = _page_cache_key(request, query_params)
+            cached = cache.get(key)
+            if cached is not None:
+                if on_hit is not None:
+                    on_hit(request, *args, **kwargs)
+                return _build_response(request, cached)
+
+            response = view_func(request, *args, **kwargs)
+            if (response.status_code == 200
+                    and set(request.GET) <= set(query_params)
+                    and not response.streaming
+                    and not response.cookies):
+                cache.set(key, _serialize_response(response), settings.PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+
+    if view is not None:
+        return decorator(view)
+    return decorator
+
+
+def _serialize_response(response):
+    content = response.content.decode(response.charset)
+    # CSRF-токен у каждого посетителя свой, подставляем его при отдаче
+    content = _csrf_input_re.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', content)
+    return {
+        'content': content,
+        'content_type': response['Content-Type'],
+    }
+
+
+def _build_response(request, cached):
+    content = cached['content']
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    return HttpResponse(content, content_type=cached['content_type'])
+
+
+# Заголовки ответа, которые сохраняются вместе с документом
+DOCUMENT_HEADERS = ('Last-Modified', 'X-Robots-Tag')
+
+
+def conditional_cache(versions):
+    """
+    Декоратор кеша XML-документов с ответом 304 на условные запросы
+
+    versions(request, *args, **kwargs) возвращает имена версий (get_version),
+    от которых зависит документ; запись действительна, пока они не изменятся.
+    ETag — хеш содержимого, Last-Modified берётся из ответа view.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            raw = '|'.join([
+                request.get_host(),
+                request.get_full_path(),
+                translation.get_language() or settings.LANGUAGE_CODE,
+                *(get_version(name) for name in versions(request, *args, **kwargs)),
+            ])
+            key = f'core:document:{hashlib.md5(raw.encode("utf-8")).hexdigest()}'
+            cached = cache.get(key)
+            if cached is None:
+                response = view_func(request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+                if response.status_code != 200 or response.streaming:
+                    return response
+                cached = {
+                    'content': response.content,
+                    'content_type': response['Content-Type'],
+                    'etag': quote_etag(hashlib.md5(response.content).hexdigest()),
+                    'headers': {name: response[name] for name in DOCUMENT_HEADERS if response.has_header(name)},
+                }
+                cache.set(key, cached, settings.PAGE_CACHE_TIMEOUT)
+
+            last_modified = parse_http_date_safe(cached['headers'].get('Last-Modified', ''))
+            response = get_conditional_response(request, etag=cached['etag'], last_modified=last_modified)
+            if response is None:
+                response = HttpResponse(cached['content'], content_type=cached['content_type'])
+            response['ETag'] = cached['etag']
+            for name, value in cached['headers'].items():
+                response[name] = value
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,63 @@
+"""
+Облегчённые выборки для карточек в списках
+
+Списки статей и книг (главная, блог, каталог книг, похожие статьи и
+книги) выводят только заголовок, краткое описание, дату и обложку, а
+полная строка BlogPost или Book содержит HTML из CKEditor и его
+обработанную копию на трёх языках — десятки КБ на запись. cards()
+ограничивает выборку полями карточки (CARD_FIELDS); переводимые поля
+заменяются столбцами активного языка и языков подстановки
+modeltranslation, поля изображений дополняются копиями и размерами
+(см. core/images.py). Поля сортировки модели добавляются всегда: по
+ним строится курсор постраничного вывода (core.pagination).
+
+Если шаблону карточки понадобится поле вне проекции, Django будет
+загружать его отдельным запросом для каждой записи — добавьте поле в
+CARD_FIELDS.
+"""
+from django.conf import settings
+from modeltranslation.translator import NotRegistered, translator
+from modeltranslation.utils import build_localized_fieldname, get_language, resolution_order
+
+from .images import image_fields
+from .models import BlogPost, Book
+
+CARD_FIELDS = {
+    BlogPost: ('slug', 'title', 'summary', 'featured_image', 'category', 'views_count', 'published_at'),
+    Book: (
+        'slug', 'title', 'author', 'publication_year', 'pages', 'summary', 'cover_image',
+        'price', 'is_available',
+    ),
+}
+
+# Поля, которые хранят копии изображения рядом с самим ImageField
+IMAGE_METADATA_SUFFIXES = ('_variants', '_width', '_height', '_lqip')
+
+
+def card_fields(model):
+    """Имена столбцов карточки модели для активного языка"""
+    try:
+        translated = translator.get_options_for_model(model).fields
+    except NotRegistered:
+        translated = {}
+    images = {field.name for field in image_fields(model)}
+    languages = resolution_order(get_language())
+
+    names = list(CARD_FIELDS[model])
+    names += [item.lstrip('-') for item in model._meta.ordering]
+    fields = []
+    for name in names:
+        if name in translated:
+            fields += [build_localized_fieldname(name, language) for language in languages]
+        else:
+            fields.append(name)
+        if name in images:
+            fields += [f'{name}{suffix}' for suffix in IMAGE_METADATA_SUFFIXES]
+    return list(dict.fromkeys(fields))
+
+
+def cards(queryset):
+    """Выборка только полей карточки (CARD_FIELDS) для списков"""
+    if not settings.CARD_PROJECTIONS_ENABLED:
+        return queryset
+    return queryset.only(*card_fields(queryset.model))
@@ -0,0 +1,144 @@
+"""
+Буферизованные счётчики просмотров статей блога и книг
+
+Просмотр увеличивает счётчик в памяти процесса, без обращения к базе
+данных (в том числе при отдаче страницы из кеша). Фоновый поток раз в
+VIEW_COUNTER_FLUSH_INTERVAL секунд переносит накопленное в маленькую
+таблицу PendingView (UPDATE ... SET count = count + N по уникальному
+ключу), а оттуда — в views_count одним
+UPDATE ... SET views_count = views_count + N на группу объектов. То же
+делает команда flush_view_counts для строк PendingView всех процессов.
+
+Компромисс: просмотры, накопленные в памяти процесса, теряются, если
+процесс завершён аварийно (при обычной остановке они переносятся через
+atexit) — не больше чем за VIEW_COUNTER_FLUSH_INTERVAL секунд. Перенесённые
+в PendingView просмотры не теряются при перезапуске и одновременной работе
+нескольких процессов Passenger. При VIEW_COUNTER_FLUSH_INTERVAL = 0 буфер
+в памяти не используется: каждый просмотр сразу записывается в PendingView.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+
+from .models import BlogPost, Book, PendingView
+
+logger = logging.getLogger(__name__)
+
+COUNTER_MODELS = (BlogPost, Book)
+FLUSH_BATCH_SIZE = 500
+
+_flusher_lock = threading.Lock()
+_flusher_started = False
+
+# Просмотры этого процесса, ещё не записанные в PendingView: {(модель, slug): количество}
+_buffer = Counter()
+_buffer_lock = threading.Lock()
+
+
+def record_view(model, slug):
+    """Учитывает просмотр объекта"""
+    if not settings.VIEW_COUNTERS_ENABLED:
+        return
+    key = (model._meta.model_name, slug)
+    if getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 0) <= 0:
+        # Без фонового потока буфер процесса некому переносить
+        _add_pending({key: 1})
+        return
+    with _buffer_lock:
+        _buffer[key] += 1
+    _ensure_flusher()
+
+
+def flush_view_counts():
+    """
+    Переносит накопленные просмотры в базу данных
+
+    Возвращает количество перенесённых просмотров
+    """
+    _flush_buffer()
+    return sum(_flush_model(model) for model in COUNTER_MODELS)
+
+
+def _flush_buffer():
+    """Переносит просмотры из памяти процесса в PendingView"""
+    with _buffer_lock:
+        counts = dict(_buffer)
+        _buffer.clear()
+    try:
+        _add_pending(counts)
+    except Exception:
+        # Вернём в буфер, чтобы перенести при следующей попытке
+        with _buffer_lock:
+            _buffer.update(counts)
+        raise
+
+
+def _add_pending(counts):
+    for (model_name, slug), delta in counts.items():
+        pending = PendingView.objects.filter(model_name=model_name, slug=slug)
+        if pending.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                PendingView.objects.create(model_name=model_name, slug=slug, count=delta)
+        except IntegrityError:
+            # Строку успел создать другой процесс
+            pending.update(count=F('count') + delta)
+
+
+def _flush_model(model):
+    pending = PendingView.objects.filter(model_name=model._meta.model_name)
+    rows = list(pending.filter(count__gt=0).values_list('pk', 'slug', 'count'))
+    flushed = 0
+    for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+        with transaction.atomic():
+            # Просмотры списываются условным UPDATE: если их уже перенёс
+            # другой процесс, строка не изменится и они не будут учтены дважды
+            by_delta = defaultdict(list)
+            for pk, slug, delta in rows[start:start + FLUSH_BATCH_SIZE]:
+                if PendingView.objects.filter(pk=pk, count__gte=delta).update(count=F('count') - delta):
+                    by_delta[delta].append(slug)
+
+            # Группируем объекты с одинаковым приращением в один UPDATE
+            for delta, slugs in by_delta.items():
+                updated = model.objects.filter(slug__in=slugs).update(views_count=F('views_count') + delta)
+                flushed += delta * updated
+    # Пустые строки; строку, в которую успели добавить просмотр, условие не удалит
+    pending.filter(count=0).delete()
+    return flushed
+
+
+def _ensure_flusher():
+    """Запускает фоновый поток переноса счётчиков при первом просмотре"""
+    global _flusher_started
+    interval = getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 0)
+    if _flusher_started or interval <= 0:
+        return
+    with _flusher_lock:
+        if _flusher_started:
+            return
+        thread = threading.Thread(target=_flush_loop, args=(interval,), name='view-counter-flusher', daemon=True)
+        thread.start()
+        atexit.register(_flush_safely)
+        _flusher_started = True
+
+
+def _flush_loop(interval):
+    while True:
+        time.sleep(interval)
+        _flush_safely()
+
+
+def _flush_safely():
+    try:
+        flush_view_counts()
+    except Exception:
+        logger.exception('Не удалось перенести счётчики просмотров')
+    finally:
+        close_old_connections()
@@ -0,0 +1,188 @@
+"""
+Загрузка больших файлов из админки напрямую в R2
+
+Обычная загрузка через форму проходит через процесс Passenger: файл
+целиком принимается во временный каталог, а затем заново отправляется в
+R2, и процесс занят всё это время. Для полей из direct_upload_fields
+(DirectUploadAdminMixin) браузер:
+1. запрашивает у сайта подписанный PUT URL и ключ объекта
+   (<админка модели>/direct-upload/<поле>/);
+2. загружает файл прямо в bucket (static/js/admin_direct_upload.js);
+3. отправляет форму с ключом объекта вместо содержимого файла.
+
+Работает только с S3-совместимым хранилищем (MediaStorage); с локальным
+хранилищем поле загружается как обычно. Для bucket нужно правило CORS,
+разрешающее PUT с домена сайта (заголовки Content-Type, Cache-Control,
+Content-Disposition). Проверять можно на локальном S3-совместимом
+сервере (MinIO), указав его в R2_ENDPOINT_URL.
+"""
+import posixpath
+
+from django import forms
+from django.conf import settings
+from django.contrib.admin.widgets import AdminFileWidget
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import models
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+KEY_SUFFIX = '__direct_key'
+
+# Заголовки из object_parameters хранилища, которые входят в подпись PUT
+SIGNED_HEADERS = {
+    'CacheControl': 'Cache-Control',
+    'ContentDisposition': 'Content-Disposition',
+}
+
+
+def supports_direct_upload(storage):
+    return isinstance(storage, S3Boto3Storage)
+
+
+def upload_directory(model_field):
+    """Каталог, в который поле сохраняет файлы (upload_to на текущую дату)"""
+    return posixpath.dirname(model_field.generate_filename(None, 'file'))
+
+
+def presigned_upload(model_field, filename, content_type):
+    """Свободный ключ для файла и подписанный PUT URL с заголовками, которые должен отправить браузер"""
+    storage = model_field.storage
+    name = storage.get_available_name(
+        model_field.generate_filename(None, filename), max_length=model_field.max_length
+    )
+    parameters = storage.get_object_parameters(name)
+    headers = {'Content-Type': content_type}
+    params = {
+        'Bucket': storage.bucket_name,
+        'Key': storage._normalize_name(clean_name(name)),
+        'ContentType': content_type,
+    }
+    for parameter, header in SIGNED_HEADERS.items():
+        if parameter in parameters:
+            params[parameter] = headers[header] = parameters[parameter]
+    url = storage.connection.meta.client.generate_presigned_url(
+        'put_object', Params=params, ExpiresIn=settings.DIRECT_UPLOAD_EXPIRES, HttpMethod='PUT'
+    )
+    return {'key': name, 'url': url, 'headers': headers}
+
+
+class DirectUploadWidget(AdminFileWidget):
+    """Поле выбора файла админки со скрытым полем для ключа загруженного объекта"""
+
+    def __init__(self, upload_url, attrs=None):
+        super().__init__(attrs)
+        self.upload_url = upload_url
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-direct-upload-url'] = self.upload_url
+        context['widget']['attrs']['data-direct-upload-key'] = name + KEY_SUFFIX
+        return context
+
+    def render(self, name, value, attrs=None, renderer=None):
+        return format_html(
+            '{}<input type="hidden" name="{}" value="">'
+            '<div class="help direct-upload-status" data-for="{}"></div>',
+            super().render(name, value, attrs, renderer), name + KEY_SUFFIX, name + KEY_SUFFIX,
+        )
+
+    def value_from_datadict(self, data, files, name):
+        key = data.get(name + KEY_SUFFIX)
+        if key:
+            return key
+        return super().value_from_datadict(data, files, name)
+
+    def value_omitted_from_data(self, data, files, name):
+        return super().value_omitted_from_data(data, files, name) and not data.get(name + KEY_SUFFIX)
+
+
+class DirectUploadFileField(forms.FileField):
+    """Поле формы, принимающее и обычный файл, и ключ объекта, уже загруженного в хранилище"""
+
+    def __init__(self, *args, model_field, **kwargs):
+        self.model_field = model_field
+        super().__init__(*args, **kwargs)
+
+    def to_python(self, data):
+        if not isinstance(data, str):
+            return super().to_python(data)
+        directory = upload_directory(self.model_field)
+        if (
+            posixpath.normpath(data) != data or '..' in data.split('/')
+            or posixpath.dirname(data) != directory
+        ):
+            raise ValidationError('Недопустимое имя загруженного файла.', code='invalid')
+        if not self.model_field.storage.exists(data):
+            raise ValidationError('Файл не найден в хранилище — загрузите его ещё раз.', code='missing')
+        return data
+
+
+class DirectUploadAdminMixin:
+    """
+    Прямая загрузка в R2 для файловых полей модели
+
+    direct_upload_fields = ('pdf_file', 'cover_image')
+    """
+    direct_upload_fields = ()
+
+    class Media:
+        js = ('js/admin_direct_upload.js',)
+
+    def _direct_upload_url_name(self):
+        opts = self.model._meta
+        return f'{opts.app_label}_{opts.model_name}_direct_upload'
+
+    def get_urls(self):
+        urls = [
+            path(
+                'direct-upload/<str:field_name>/',
+                self.admin_site.admin_view(self.direct_upload_view),
+                name=self._direct_upload_url_name(),
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        if (
+            db_field.name in self.direct_upload_fields
+            and isinstance(db_field, models.FileField)
+            and supports_direct_upload(db_field.storage)
+        ):
+            upload_url = reverse(
+                f'{self.admin_site.name}:{self._direct_upload_url_name()}', args=[db_field.name]
+            )
+            kwargs['form_class'] = DirectUploadFileField
+            kwargs['model_field'] = db_field
+            kwargs['widget'] = DirectUploadWidget(upload_url)
+            return db_field.formfield(**kwargs)
+        return super().formfield_for_dbfield(db_field, request, **kwargs)
+
+    def direct_upload_view(self, request, field_name):
+        """JSON с ключом объекта и подписанным PUT URL для загрузки файла из браузера"""
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        if not (self.has_add_permission(request) or self.has_change_permission(request)):
+            raise PermissionDenied
+        if field_name not in self.direct_upload_fields:
+            return HttpResponseBadRequest('Поле не поддерживает прямую загрузку')
+        model_field = self.model._meta.get_field(field_name)
+        if not supports_direct_upload(model_field.storage):
+            return HttpResponseBadRequest('Хранилище не поддерживает прямую загрузку')
+
+        filename = posixpath.basename(request.POST.get('filename', '').replace('\\', '/'))
+        content_type = request.POST.get('content_type') or 'application/octet-stream'
+        try:
+            size = int(request.POST.get('size', ''))
+        except ValueError:
+            return HttpResponseBadRequest('Не указан размер файла')
+        if not filename:
+            return HttpResponseBadRequest('Не указано имя файла')
+        if size > settings.DIRECT_UPLOAD_MAX_SIZE:
+            return JsonResponse({'error': 'Файл слишком большой'}, status=400)
+        if isinstance(model_field, models.ImageField) and not content_type.startswith('image/'):
+            return JsonResponse({'error': 'Выберите файл изображения'}, status=400)
+
+        return JsonResponse(presigned_upload(model_field, filename, content_type))
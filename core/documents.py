@@ -0,0 +1,175 @@
+"""
+Производные PDF-файлов книг и публикаций
+
+Для загруженного PDF создаются:
+- превью первой страницы (поле pdf_preview — обычное изображение, для
+  него создаются копии и LQIP, см. core/images.py); используется
+  pypdfium2 из requirements.txt или PyMuPDF;
+- линеаризованная копия («быстрый просмотр в вебе», поле pdf_web_file):
+  браузер показывает первую страницу, не дожидаясь загрузки всего файла;
+  используется pikepdf из requirements.txt или утилита qpdf.
+
+PDF бывают размером в сотни мегабайт, поэтому при сохранении записи
+старые производные только удаляются, а запись помечается флагом
+pdf_pending; сами производные создаёт команда generate_pdf_previews
+(по cron). Файл копируется из хранилища во временный файл на диске по
+частям и целиком в память не читается. Если библиотеки не установлены,
+команда сообщает об этом, шаг пропускается, и сайт отдаёт исходный PDF.
+"""
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from PIL import Image
+
+from .images import delete_variants, metadata_fields, save_fields, update_variants
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_FIELD = 'pdf_preview'
+WEB_FIELD = 'pdf_web_file'
+
+# Размер части при копировании PDF из хранилища во временный файл
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def pdf_renderer():
+    """Доступная библиотека для отрисовки страниц PDF: 'pymupdf', 'pypdfium2' или None"""
+    try:
+        import fitz  # noqa: F401
+        return 'pymupdf'
+    except ImportError:
+        pass
+    try:
+        import pypdfium2  # noqa: F401
+        return 'pypdfium2'
+    except ImportError:
+        return None
+
+
+def render_first_page(path, width):
+    """Первая страница PDF-файла path в виде изображения Pillow заданной ширины"""
+    renderer = pdf_renderer()
+    if renderer == 'pymupdf':
+        import fitz
+        with fitz.open(path, filetype='pdf') as document:
+            page = document[0]
+            zoom = width / page.rect.width
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+    if renderer == 'pypdfium2':
+        import pypdfium2
+        document = pypdfium2.PdfDocument(path)
+        try:
+            page = document[0]
+            return page.render(scale=width / page.get_width()).to_pil().convert('RGB')
+        finally:
+            document.close()
+    return None
+
+
+def linearizer():
+    """Доступное средство линеаризации PDF: 'qpdf', 'pikepdf' или None"""
+    if shutil.which(settings.QPDF_BINARY):
+        return 'qpdf'
+    try:
+        import pikepdf  # noqa: F401
+        return 'pikepdf'
+    except ImportError:
+        return None
+
+
+def linearize(source, target):
+    """Записывает линеаризованную копию PDF source в target; False, если qpdf/pikepdf недоступны"""
+    tool = linearizer()
+    if tool == 'qpdf':
+        # Код 3 — файл записан, но с предупреждениями
+        result = subprocess.run(
+            [shutil.which(settings.QPDF_BINARY), '--linearize', source, target], capture_output=True, timeout=600
+        )
+        if result.returncode not in (0, 3):
+            raise RuntimeError(result.stderr.decode('utf-8', 'replace').strip())
+        return True
+    if tool != 'pikepdf':
+        return False
+    import pikepdf
+    with pikepdf.open(source) as document:
+        document.save(target, linearize=True)
+    return True
+
+
+def delete_derivatives(instance):
+    """Удаляет файлы превью и линеаризованной копии PDF (копии превью удаляет update_variants)"""
+    for fieldfile in (getattr(instance, PREVIEW_FIELD), getattr(instance, WEB_FIELD)):
+        if fieldfile:
+            try:
+                fieldfile.storage.delete(fieldfile.name)
+            except Exception as e:
+                logger.warning('Не удалось удалить файл %s: %s', fieldfile.name, e)
+
+
+def mark_pdf_pending(instance):
+    """
+    Удаляет производные прежнего PDF и ставит новый в очередь команды generate_pdf_previews
+
+    Вызывается после сохранения записи и не читает сам PDF
+    """
+    delete_derivatives(instance)
+    preview = getattr(instance, PREVIEW_FIELD)
+    delete_variants(preview.storage, getattr(instance, f'{PREVIEW_FIELD}_variants'))
+    save_fields(instance, {
+        PREVIEW_FIELD: '',
+        WEB_FIELD: '',
+        f'{PREVIEW_FIELD}_variants': {},
+        **metadata_fields(PREVIEW_FIELD, {}),
+        'pdf_pending': bool(instance.pdf_file),
+    })
+
+
+def download(fieldfile, target):
+    """Копирует файл из хранилища в открытый файл target по частям"""
+    with fieldfile.storage.open(fieldfile.name, 'rb') as f:
+        shutil.copyfileobj(f, target, COPY_CHUNK_SIZE)
+    target.flush()
+
+
+def update_pdf_derivatives(instance):
+    """Пересоздаёт превью и линеаризованную копию PDF записи и снимает флаг pdf_pending"""
+    delete_derivatives(instance)
+    values = {PREVIEW_FIELD: '', WEB_FIELD: '', 'pdf_pending': False}
+    pdf = instance.pdf_file
+
+    if pdf:
+        base = os.path.splitext(os.path.basename(pdf.name))[0]
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as source:
+            download(pdf, source)
+
+            try:
+                image = render_first_page(source.name, settings.PDF_PREVIEW_WIDTH)
+                if image is not None:
+                    buffer = io.BytesIO()
+                    image.save(buffer, format='JPEG', quality=85, optimize=True)
+                    getattr(instance, PREVIEW_FIELD).save(f'{base}.jpg', ContentFile(buffer.getvalue()), save=False)
+                    values[PREVIEW_FIELD] = getattr(instance, PREVIEW_FIELD).name
+            except Exception as e:
+                logger.warning('Не удалось создать превью PDF %s: %s', pdf.name, e)
+
+            if settings.PDF_LINEARIZE:
+                try:
+                    with tempfile.TemporaryDirectory() as directory:
+                        target = os.path.join(directory, 'web.pdf')
+                        if linearize(source.name, target):
+                            with open(target, 'rb') as web:
+                                getattr(instance, WEB_FIELD).save(f'{base}.web.pdf', File(web), save=False)
+                            values[WEB_FIELD] = getattr(instance, WEB_FIELD).name
+                except Exception as e:
+                    logger.warning('Не удалось линеаризовать PDF %s: %s', pdf.name, e)
+
+    save_fields(instance, values)
+    # Копии превью, его размеры и LQIP — как у остальных изображений
+    update_variants(instance, PREVIEW_FIELD)
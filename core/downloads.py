@@ -0,0 +1,140 @@
+"""
+Отдача файлов из media с поддержкой Range и условных запросов
+
+Просмотрщик PDF в браузере запрашивает линеаризованный файл частями
+(Range: bytes=...), поэтому первая страница показывается до загрузки
+всего файла. ETag/Last-Modified позволяют повторно не скачивать файл
+(ответ 304).
+
+Файлы в локальном хранилище:
+- MEDIA_SENDFILE = 'x-accel-redirect' или 'x-sendfile' — отдачу (вместе
+  с Range) выполняет веб-сервер (nginx / Apache mod_xsendfile), Django
+  только проверяет запрос;
+- иначе файл читается Django потоком с учётом Range.
+
+Файлы во внешнем хранилище (R2) отдаются перенаправлением на их URL:
+CDN сам поддерживает Range и кеширование.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_MAX_AGE = 60 * 60
+
+_range_re = re.compile(r'^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$', re.IGNORECASE)
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    (начало, конец) для заголовка Range с одним диапазоном
+
+    None — заголовка нет или он не поддерживается (несколько диапазонов):
+    тогда отдаётся весь файл. RangeNotSatisfiable — диапазон за концом файла.
+    """
+    match = _range_re.match(header or '')
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-500 — последние 500 байт
+        length = int(last)
+        if not length:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _local_path(fieldfile):
+    try:
+        return fieldfile.storage.path(fieldfile.name)
+    except NotImplementedError:
+        return None
+
+
+def _range_allowed(request, etag, last_modified):
+    """If-Range: диапазон действителен, только если файл не изменился"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def serve_file(request, fieldfile, filename=None, as_attachment=False):
+    """Ответ с содержимым файла поля модели (FieldFile)"""
+    path = _local_path(fieldfile)
+    if path is None:
+        return HttpResponseRedirect(fieldfile.url)
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        # Запись ссылается на файл, которого нет в media
+        raise Http404
+    size, last_modified = stat.st_size, int(stat.st_mtime)
+    etag = quote_etag(f'{last_modified:x}-{size:x}')
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    filename = filename or os.path.basename(fieldfile.name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    backend = settings.MEDIA_SENDFILE
+
+    if backend == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(fieldfile.name)
+    elif backend == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+    else:
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range is not None and request.method != 'HEAD' and _range_allowed(request, etag, last_modified):
+            start, end = byte_range
+            response = StreamingHttpResponse(_read_range(path, start, end - start + 1), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        response['Accept-Ranges'] = 'bytes'
+
+    disposition = 'attachment' if as_attachment else 'inline'
+    response['Content-Disposition'] = f"{disposition}; filename*=UTF-8''{quote(filename)}"
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=DOWNLOAD_MAX_AGE)
+    return response
@@ -0,0 +1,135 @@
+"""
+Загрузка и выбор файлов CKEditor через индекс в базе данных
+
+Стандартное окно «Обзор сервера» ckeditor_uploader при каждом открытии
+обходит весь каталог uploads/ в хранилище: на R2 это постраничные
+запросы ListObjects и построение URL для каждого файла и миниатюры, и
+после нескольких тысяч изображений окно перестаёт открываться. Здесь
+те же URL (ckeditor_upload, ckeditor_browse) обслуживаются своими
+представлениями:
+- upload сохраняет файл так же, как ckeditor_uploader, и записывает его
+  в таблицу EditorUpload (путь, размер, размеры изображения, автор);
+- browse выводит страницу из этой таблицы с поиском по имени файла.
+
+Файлы, загруженные до появления индекса, добавляет команда
+import_editor_uploads.
+"""
+import os
+
+from ckeditor_uploader import utils
+from ckeditor_uploader.backends import get_backend
+from ckeditor_uploader.utils import storage
+from ckeditor_uploader.views import get_upload_filename
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse
+from django.shortcuts import render
+from django.utils.html import escape
+from django.views.decorators.csrf import csrf_exempt
+from PIL import Image
+
+from .models import EditorUpload
+
+
+def is_thumbnail(path):
+    return os.path.splitext(path)[0].endswith('_thumb')
+
+
+def image_info(file):
+    """(ширина, высота, анимировано) или None, если файл не изображение"""
+    try:
+        with Image.open(file) as image:
+            return image.width, image.height, getattr(image, 'is_animated', False)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    finally:
+        file.seek(0)
+
+
+def upload_record(path, size, info, user=None, created_at=None):
+    """Несохранённая запись индекса для файла path"""
+    width, height, animated = info or (None, None, False)
+    # Миниатюры ckeditor_uploader создаёт для всех изображений, кроме анимированных
+    has_thumbnail = info is not None and not animated and settings.CKEDITOR_IMAGE_BACKEND
+    record = EditorUpload(
+        path=path,
+        filename=os.path.basename(path),
+        thumbnail=utils.get_thumb_filename(path) if has_thumbnail else '',
+        size=size,
+        width=width,
+        height=height,
+        is_image=info is not None,
+        uploaded_by=user,
+    )
+    if created_at is not None:
+        record.created_at = created_at
+    return record
+
+
+@csrf_exempt
+def upload(request):
+    """Загрузка файла из диалога CKEditor (как ckeditor_uploader.views.upload) с записью в индекс"""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    uploaded_file = request.FILES.get('upload')
+    if uploaded_file is None:
+        return HttpResponseBadRequest('Файл не передан')
+
+    ck_func_num = request.GET.get('CKEditorFuncNum')
+    if ck_func_num:
+        ck_func_num = escape(ck_func_num)
+
+    filewrapper = get_backend()(storage, uploaded_file)
+    if not filewrapper.is_image and not getattr(settings, 'CKEDITOR_ALLOW_NONIMAGE_FILES', True):
+        return HttpResponse(
+            "<script type='text/javascript'>"
+            f"window.parent.CKEDITOR.tools.callFunction({ck_func_num}, '', 'Invalid file type.');"
+            "</script>"
+        )
+
+    info = image_info(uploaded_file) if filewrapper.is_image else None
+    size = uploaded_file.size
+    saved_path = filewrapper.save_as(get_upload_filename(uploaded_file.name, request))
+    upload_record(saved_path, size, info, user=request.user).save()
+
+    url = utils.get_media_url(saved_path)
+    if ck_func_num:
+        return HttpResponse(
+            "<script type='text/javascript'>"
+            f"window.parent.CKEDITOR.tools.callFunction({ck_func_num}, '{url}');"
+            "</script>"
+        )
+    return JsonResponse({'url': url, 'uploaded': '1', 'fileName': os.path.basename(saved_path)})
+
+
+def browse(request):
+    """Окно выбора файла CKEditor: страница из индекса EditorUpload с поиском по имени"""
+    uploads = EditorUpload.objects.all()
+    if getattr(settings, 'CKEDITOR_RESTRICT_BY_USER', False) and not request.user.is_superuser:
+        uploads = uploads.filter(uploaded_by=request.user)
+
+    query = request.GET.get('q', '').strip()
+    if query:
+        uploads = uploads.filter(filename__icontains=query)
+
+    page = Paginator(uploads, settings.EDITOR_BROWSE_PAGE_SIZE).get_page(request.GET.get('page'))
+    files = []
+    for item in page:
+        src = storage.url(item.path)
+        if item.thumbnail:
+            thumb = storage.url(item.thumbnail)
+        elif item.is_image:
+            thumb = src
+        else:
+            thumb = utils.get_icon_filename(item.path)
+        files.append({'upload': item, 'src': src, 'thumb': thumb})
+
+    params = request.GET.copy()
+    params.pop('page', None)
+    return render(request, 'ckeditor/editor_browse.html', {
+        'page': page,
+        'files': files,
+        'query': query,
+        'query_string': params.urlencode(),
+        'func_num': request.GET.get('CKEditorFuncNum', ''),
+    })
@@ -0,0 +1,135 @@
+"""
+Ленты RSS и Atom для блога и публикаций
+
+Ленты доступны на каждом языке сайта (/blog/feed/rss/, /uz/blog/feed/atom/
+и т.д.) и строятся из values() с несколькими полями активного языка (без
+текста статей), а не из объектов моделей. Готовый XML кешируется
+(core.caching.conditional_cache) до следующего сохранения статьи или
+публикации и отдаётся с ETag и Last-Modified, поэтому агрегаторы и боты,
+опрашивающие ленту, в большинстве случаев получают 304.
+"""
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.translation import gettext as _
+
+from .caching import conditional_cache, get_profile
+from .models import Profile, BlogPost, Publication
+
+BLOG_FEED_VERSION = 'feed:blog'
+PUBLICATIONS_FEED_VERSION = 'feed:publications'
+
+# Модель → версии лент, которые строятся из неё (см. core.signals)
+FEED_VERSIONS = {
+    Profile: (BLOG_FEED_VERSION, PUBLICATIONS_FEED_VERSION),
+    BlogPost: (BLOG_FEED_VERSION,),
+    Publication: (PUBLICATIONS_FEED_VERSION,),
+}
+
+
+def _site_title():
+    profile = get_profile()
+    return profile.full_name if profile else ''
+
+
+class BlogFeed(Feed):
+    """Опубликованные статьи блога (RSS 2.0)"""
+
+    def title(self):
+        return f'{_("Блог")} — {_site_title()}'
+
+    def link(self):
+        return reverse('blog')
+
+    def description(self):
+        return _('Новые статьи блога')
+
+    def items(self):
+        return (
+            BlogPost.objects.filter(is_published=True)
+            .values('slug', 'title', 'excerpt', 'summary', 'published_at', 'created_at', 'updated_at')
+            [:settings.FEED_ITEMS]
+        )
+
+    def item_title(self, item):
+        return item['title']
+
+    def item_description(self, item):
+        # Анонс без разметки, вычисленный при сохранении, если краткое описание не написано
+        return item['excerpt'] or item['summary']
+
+    def item_link(self, item):
+        return reverse('blog_detail', kwargs={'slug': item['slug']})
+
+    def item_pubdate(self, item):
+        return item['published_at'] or item['created_at']
+
+    def item_updateddate(self, item):
+        return item['updated_at']
+
+
+class BlogAtomFeed(BlogFeed):
+    """Опубликованные статьи блога (Atom)"""
+    feed_type = Atom1Feed
+
+    def subtitle(self):
+        return self.description()
+
+
+class PublicationFeed(Feed):
+    """Новые публикации (RSS 2.0)"""
+
+    def title(self):
+        return f'{_("Публикации")} — {_site_title()}'
+
+    def link(self):
+        return reverse('publications')
+
+    def description(self):
+        return _('Новые научные публикации')
+
+    def items(self):
+        return (
+            Publication.objects.order_by('-created_at')
+            .values('pk', 'title', 'authors', 'journal', 'year', 'abstract', 'created_at', 'updated_at')
+            [:settings.FEED_ITEMS]
+        )
+
+    def item_title(self, item):
+        return item['title']
+
+    def item_description(self, item):
+        source = ', '.join(str(part) for part in (item['authors'], item['journal'], item['year']) if part)
+        return f'{source}. {item["abstract"]}' if item['abstract'] else source
+
+    def item_link(self, item):
+        return reverse('publication_detail', kwargs={'pk': item['pk']})
+
+    def item_pubdate(self, item):
+        return item['created_at']
+
+    def item_updateddate(self, item):
+        return item['updated_at']
+
+
+class PublicationAtomFeed(PublicationFeed):
+    """Новые публикации (Atom)"""
+    feed_type = Atom1Feed
+
+    def subtitle(self):
+        return self.description()
+
+
+def _blog_versions(request, *args, **kwargs):
+    return [BLOG_FEED_VERSION]
+
+
+def _publication_versions(request, *args, **kwargs):
+    return [PUBLICATIONS_FEED_VERSION]
+
+
+blog_rss = conditional_cache(_blog_versions)(BlogFeed())
+blog_atom = conditional_cache(_blog_versions)(BlogAtomFeed())
+publications_rss = conditional_cache(_publication_versions)(PublicationFeed())
+publications_atom = conditional_cache(_publication_versions)(PublicationAtomFeed())
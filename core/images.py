@@ -0,0 +1,275 @@
+"""
+Производные изображения для адаптивной вёрстки
+
+После загрузки изображения создаются его уменьшенные копии нескольких
+ширин (IMAGE_VARIANT_WIDTHS) в форматах WebP и AVIF (если Pillow
+собран с их поддержкой). Копии сохраняются рядом с оригиналом в том же
+хранилище (локальная папка media или MediaStorage на R2):
+blog/photo.jpg → blog/photo.640w.webp. Список копий хранится в поле
+<поле>_variants модели и выводится тегом {% responsive_image %}.
+Кодирование в AVIF/WebP занимает секунды, поэтому при сохранении модели
+изображение только помечается ({'pending': True}), а копии создаёт
+команда generate_image_variants, запускаемая по cron.
+
+Размеры оригинала (<поле>_width, <поле>_height) читаются из заголовка
+файла ещё при сохранении модели, чтобы страницы сразу резервировали место
+под изображение. Крошечное размытое превью (<поле>_lqip, data URI)
+создаётся вместе с копиями, поэтому шаблонам не приходится открывать файл
+в хранилище.
+"""
+import base64
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import models
+from PIL import ExifTags, Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+# Ширина превью-заглушки (LQIP) в пикселях
+LQIP_WIDTH = 16
+
+# Описание копий изображения, которое ждёт обработки командой generate_image_variants
+PENDING_VARIANTS = {'pending': True}
+
+FORMAT_OPTIONS = {
+    'avif': {'speed': 6},
+    'webp': {'method': 6},
+}
+
+
+class StoredImage:
+    """Изображение в хранилище, не привязанное к полю модели (например, из CKEditor)"""
+
+    def __init__(self, storage, name):
+        self.storage = storage
+        self.name = name
+
+    def __bool__(self):
+        return bool(self.name)
+
+
+def variant_formats():
+    """Форматы из IMAGE_VARIANT_FORMATS, которые поддерживает установленный Pillow"""
+    return [fmt for fmt in settings.IMAGE_VARIANT_FORMATS if features.check(fmt)]
+
+
+def image_fields(model):
+    """Поля ImageField модели, для которых хранятся производные (<поле>_variants)"""
+    names = {field.name for field in model._meta.get_fields()}
+    return [
+        field for field in model._meta.fields
+        if isinstance(field, models.ImageField) and f'{field.name}_variants' in names
+    ]
+
+
+def variant_name(name, width, fmt):
+    return f'{os.path.splitext(name)[0]}.{width}w.{fmt}'
+
+
+def variant_widths(width):
+    """Ширины копий: стандартные меньше оригинала и сам оригинал, если он не больше максимальной"""
+    widths = [target for target in settings.IMAGE_VARIANT_WIDTHS if target < width]
+    if width <= max(settings.IMAGE_VARIANT_WIDTHS):
+        widths.append(width)
+    return widths
+
+
+def _oriented_size(image):
+    """Размеры изображения, каким его покажет браузер (с учётом поворота из EXIF)"""
+    width, height = image.size
+    if image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+        width, height = height, width
+    return width, height
+
+
+def image_dimensions(fieldfile):
+    """
+    (ширина, высота) изображения поля по заголовку файла
+
+    Только что загруженный файл читается из памяти (до сохранения в
+    хранилище), поэтому при сохранении модели обращения к R2 нет
+    """
+    close = fieldfile.closed
+    fieldfile.open('rb')
+    try:
+        position = fieldfile.tell()
+        fieldfile.seek(0)
+        with Image.open(fieldfile) as image:
+            size = _oriented_size(image)
+        fieldfile.seek(position)
+    finally:
+        if close:
+            fieldfile.close()
+    return size
+
+
+def open_image(fieldfile, draft_size=None):
+    """
+    Открывает изображение из хранилища с учётом поворота из EXIF
+
+    draft_size позволяет декодировать JPEG сразу в уменьшенном виде
+    (когда нужны только размеры и превью)
+    """
+    with fieldfile.storage.open(fieldfile.name, 'rb') as source:
+        image = Image.open(source)
+        width, height = _oriented_size(image)
+        if draft_size:
+            image.draft('RGB', draft_size)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    image.info['original_size'] = (width, height)
+    if image.mode not in ('RGB', 'RGBA'):
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    return image
+
+
+def make_lqip(image):
+    """Крошечное превью в виде data URI для фона на время загрузки изображения"""
+    if image.mode == 'RGBA':
+        # Сквозь прозрачные области превью было бы видно
+        return ''
+    width, height = image.size
+    thumbnail = image.resize((LQIP_WIDTH, max(round(height * LQIP_WIDTH / width), 1)), Image.BILINEAR)
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, format='WEBP', quality=30)
+    return f'data:image/webp;base64,{base64.b64encode(buffer.getvalue()).decode("ascii")}'
+
+
+def image_metadata(image):
+    width, height = image.info.get('original_size', image.size)
+    return {'width': width, 'height': height, 'lqip': make_lqip(image)}
+
+
+def generate_variants(fieldfile, image=None):
+    """
+    Создаёт копии изображения и возвращает их описание:
+    {'sources': {'webp': [[ширина, имя файла], ...], ...}}
+    """
+    image = image or open_image(fieldfile)
+    width, height = image.size
+    storage = fieldfile.storage
+    quality = settings.IMAGE_VARIANT_QUALITY
+    sources = {}
+
+    for target in variant_widths(width):
+        resized = image if target == width else image.resize(
+            (target, max(round(height * target / width), 1)), Image.LANCZOS
+        )
+        for fmt in variant_formats():
+            buffer = io.BytesIO()
+            resized.save(buffer, format=fmt.upper(), quality=quality, **FORMAT_OPTIONS.get(fmt, {}))
+            name = storage.save(variant_name(fieldfile.name, target, fmt), ContentFile(buffer.getvalue()))
+            sources.setdefault(fmt, []).append([target, name])
+
+    return {'sources': sources}
+
+
+def existing_variants(fieldfile, width):
+    """Копии, созданные ранее (все ширины и форматы), или пустой словарь, если какой-то нет"""
+    sources = {}
+    for target in variant_widths(width):
+        for fmt in variant_formats():
+            name = variant_name(fieldfile.name, target, fmt)
+            if not fieldfile.storage.exists(name):
+                return {}
+            sources.setdefault(fmt, []).append([target, name])
+    return sources
+
+
+def delete_variants(storage, variants):
+    for fmt, files in (variants or {}).get('sources', {}).items():
+        for width, name in files:
+            try:
+                storage.delete(name)
+            except Exception as e:
+                logger.warning('Не удалось удалить копию изображения %s: %s', name, e)
+
+
+def save_fields(instance, values):
+    """Сохранение через UPDATE, чтобы не вызывать сигналы модели повторно"""
+    type(instance)._default_manager.filter(pk=instance.pk).update(**values)
+    for name, value in values.items():
+        setattr(instance, name, value)
+
+
+def metadata_fields(field_name, metadata):
+    return {
+        f'{field_name}_width': metadata.get('width'),
+        f'{field_name}_height': metadata.get('height'),
+        f'{field_name}_lqip': metadata.get('lqip', ''),
+    }
+
+
+def update_variants(instance, field_name):
+    """Пересоздаёт копии изображения поля и сохраняет их описание, размеры и превью"""
+    fieldfile = getattr(instance, field_name)
+    variants_field = f'{field_name}_variants'
+    delete_variants(fieldfile.storage, getattr(instance, variants_field))
+
+    variants, metadata = {}, {}
+    if fieldfile:
+        try:
+            image = open_image(fieldfile)
+            metadata = image_metadata(image)
+            variants = generate_variants(fieldfile, image)
+        except Exception as e:
+            logger.warning('Не удалось создать копии изображения %s: %s', fieldfile.name, e)
+
+    save_fields(instance, {variants_field: variants, **metadata_fields(field_name, metadata)})
+    return variants
+
+
+def mark_variants_pending(instance, field_name):
+    """
+    Удаляет копии прежнего изображения и ставит новое в очередь generate_image_variants
+
+    Размеры уже прочитаны при сохранении (read_image_dimensions) и
+    записываются вместе с отметкой; превью LQIP прежнего изображения
+    сбрасывается. До обработки страницы показывают оригинал.
+    """
+    fieldfile = getattr(instance, field_name)
+    delete_variants(fieldfile.storage, getattr(instance, f'{field_name}_variants'))
+    variants = PENDING_VARIANTS if fieldfile else {}
+    metadata = {
+        'width': getattr(instance, f'{field_name}_width'),
+        'height': getattr(instance, f'{field_name}_height'),
+    } if fieldfile else {}
+    save_fields(instance, {f'{field_name}_variants': variants, **metadata_fields(field_name, metadata)})
+
+
+def read_image_dimensions(instance, field_name):
+    """Записывает в модель размеры нового изображения поля (до сохранения записи)"""
+    fieldfile = getattr(instance, field_name)
+    width = height = None
+    if fieldfile:
+        try:
+            width, height = image_dimensions(fieldfile)
+        except Exception as e:
+            logger.warning('Не удалось прочитать размеры изображения %s: %s', fieldfile.name, e)
+    setattr(instance, f'{field_name}_width', width)
+    setattr(instance, f'{field_name}_height', height)
+
+
+def is_pending(variants):
+    """Нужно ли создать копии: их ещё нет или изображение заменено"""
+    return not variants or bool(variants.get('pending'))
+
+
+def update_metadata(instance, field_name):
+    """Заполняет размеры и превью изображения без создания копий"""
+    fieldfile = getattr(instance, field_name)
+    metadata = {}
+    if fieldfile:
+        image = open_image(fieldfile, draft_size=(LQIP_WIDTH * 4, LQIP_WIDTH * 4))
+        metadata = image_metadata(image)
+    save_fields(instance, metadata_fields(field_name, metadata))
+    return metadata
+
+
+def srcset(storage, files):
+    return ', '.join(f'{storage.url(name)} {width}w' for width, name in files)
@@ -0,0 +1,57 @@
+"""
+Management command to fill image dimensions and LQIP placeholders for existing images
+Usage: python manage.py backfill_image_metadata [--force] [--workers 8]
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.caching import invalidate_public_pages
+from core.images import image_fields, update_metadata
+
+
+class Command(BaseCommand):
+    help = 'Сохранить размеры и превью (LQIP) уже загруженных изображений'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Пересчитать и для изображений с заполненными размерами')
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Количество параллельных потоков (файлы читаются из хранилища по сети)')
+
+    def handle(self, *args, **options):
+        tasks = []
+        for model in apps.get_app_config('core').get_models():
+            for field in image_fields(model):
+                queryset = model.objects.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+                if not options['force']:
+                    queryset = queryset.filter(**{f'{field.name}_width__isnull': True})
+                for instance in queryset.only('pk', field.name):
+                    tasks.append((instance, field.name))
+
+        self.stdout.write(f'Изображений для обработки: {len(tasks)}')
+        processed = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {executor.submit(self.process, instance, name): (instance, name) for instance, name in tasks}
+            for future in as_completed(futures):
+                instance, name = futures[future]
+                error = future.result()
+                if error is None:
+                    processed += 1
+                else:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'  ✗ {getattr(instance, name).name}: {error}'))
+
+        if processed:
+            invalidate_public_pages()
+        self.stdout.write(self.style.SUCCESS(f'✓ Обработано: {processed}, с ошибкой: {failed}'))
+
+    def process(self, instance, name):
+        try:
+            update_metadata(instance, name)
+        except Exception as e:
+            return e
+        finally:
+            close_old_connections()
+        return None
@@ -0,0 +1,189 @@
+"""
+Management command to compare query plans of public listings with and without indexes
+Usage: python manage.py benchmark_indexes [--size 20000] [--repeat 20]
+
+Создаёт отдельную тестовую базу данных (рабочая база не затрагивается),
+заполняет её синтетическими данными, выполняет запросы публичных страниц
+с индексами из Meta.indexes и после их удаления и выводит планы запросов
+(EXPLAIN) и медианное время выполнения.
+"""
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core.models import (
+    Service, ServiceReview, Publication, Project, Category, BlogPost,
+    Achievement, Testimonial, Book
+)
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Сравнить планы и время запросов публичных страниц с индексами и без них'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=20000,
+                            help='Количество статей, публикаций и отзывов (книг и проектов — в 10 раз меньше)')
+        parser.add_argument('--repeat', type=int, default=20, help='Сколько раз выполнять каждый запрос')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f'Тестовая база: {connection.vendor}, записей: {options["size"]}')
+            random.seed(options['seed'])
+            self.stdout.write('Заполнение синтетическими данными...')
+            self.populate(options['size'])
+            self.analyze()
+
+            queries = self.queries()
+            with_indexes = {label: self.measure(queryset) for label, queryset in queries}
+            dropped = self.drop_indexes()
+            self.analyze()
+            without_indexes = {label: self.measure(queryset) for label, queryset in queries}
+
+            self.stdout.write(f'Удалено индексов для сравнения: {dropped}\n')
+            for label, queryset in queries:
+                self.report(label, without_indexes[label], with_indexes[label])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    # --- Данные ---------------------------------------------------------------
+
+    def populate(self, size):
+        now = timezone.now()
+        small = max(size // 10, 1)
+
+        def created():
+            return now - timedelta(minutes=random.randint(0, 60 * 24 * 3650))
+
+        services = self.bulk(Service, (
+            Service(created_at=created(), title=f'Услуга {i}', order=i % 10, is_active=i % 5 != 0) for i in range(50)
+        ))
+        categories = Category.objects.bulk_create(
+            Category(name=f'Категория {i}', slug=f'category-{i}', order=i) for i in range(20)
+        )
+        self.sample = {'service': services[0], 'category': categories[0]}
+
+        self.bulk(ServiceReview, (
+            ServiceReview(
+                created_at=created(), service=random.choice(services), patient_name='Пациент', text='Отзыв',
+                is_approved=random.random() < 0.7,
+            ) for i in range(size)
+        ))
+        self.bulk(Testimonial, (
+            Testimonial(created_at=created(), patient_name='Пациент', text='Отзыв', is_approved=random.random() < 0.3)
+            for i in range(size)
+        ))
+        self.bulk(Publication, (
+            Publication(
+                created_at=created(), title=f'Публикация {i}', authors='Максудов А.А.', year=random.randint(1990, 2025),
+                publication_type=random.choice(Publication.PUBLICATION_TYPES)[0],
+                is_featured=random.random() < 0.01,
+            ) for i in range(size)
+        ))
+        self.bulk(BlogPost, (
+            BlogPost(
+                created_at=created(), title=f'Статья {i}', slug=f'post-{i}', content='<p>Текст</p>',
+                category=random.choice(categories), is_published=random.random() < 0.8,
+                published_at=now - timedelta(minutes=random.randint(0, 60 * 24 * 3650)),
+            ) for i in range(size)
+        ))
+        self.bulk(Book, (
+            Book(
+                created_at=created(), title=f'Книга {i}', slug=f'book-{i}', description='Описание', cover_image='books/covers/x.jpg',
+                publication_year=random.randint(1990, 2025), is_available=random.random() < 0.9,
+                is_featured=random.random() < 0.02, order=random.randint(0, 100),
+            ) for i in range(small)
+        ))
+        self.bulk(Project, (
+            Project(
+                created_at=created(), title=f'Проект {i}', description='Описание', role='Руководитель', organization='Клиника',
+                start_date=date(2000, 1, 1) + timedelta(days=random.randint(0, 9000)),
+                is_active=random.random() < 0.5,
+            ) for i in range(small)
+        ))
+        self.bulk(Achievement, (
+            Achievement(
+                created_at=created(), title=f'Награда {i}', description='Описание', organization='Организация',
+                date=date(2000, 1, 1) + timedelta(days=random.randint(0, 9000)),
+            ) for i in range(small)
+        ))
+
+    def bulk(self, model, objects):
+        """bulk_create со значениями created_at из генератора, а не текущим временем"""
+        fields = [field for field in model._meta.concrete_fields if getattr(field, 'auto_now_add', False)]
+        for field in fields:
+            field.auto_now_add = False
+        try:
+            return model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+        finally:
+            for field in fields:
+                field.auto_now_add = True
+
+    # --- Запросы --------------------------------------------------------------
+
+    def queries(self):
+        service = self.sample['service']
+        category = self.sample['category']
+        return [
+            ('Главная: услуги', Service.objects.filter(is_active=True)[:6]),
+            ('Главная: избранные публикации', Publication.objects.filter(is_featured=True)[:3]),
+            ('Главная: отзывы', Testimonial.objects.filter(is_approved=True)[:3]),
+            ('Главная: книги', Book.objects.filter(is_featured=True, is_available=True)[:3]),
+            ('Обо мне: достижения', Achievement.objects.all()[:10]),
+            ('Услуга: отзывы', ServiceReview.objects.filter(service=service, is_approved=True).order_by('-created_at')[:10]),
+            ('Портфолио: проекты', Project.objects.filter(is_active=True)),
+            ('Публикации: тип и год', Publication.objects.filter(publication_type='article', year=2015)[:10]),
+            ('Публикации: список годов', Publication.objects.values_list('year', flat=True).distinct().order_by('-year')),
+            ('Блог: лента', BlogPost.objects.filter(is_published=True)[:6]),
+            ('Блог: категория', BlogPost.objects.filter(is_published=True, category=category)[:6]),
+            ('Книги: список', Book.objects.filter(is_available=True)[:9]),
+            ('Книги: год', Book.objects.filter(is_available=True, publication_year=2015)[:9]),
+        ]
+
+    def measure(self, queryset):
+        plan = queryset.explain()
+        timings = []
+        for i in range(self.repeat):
+            started = time.perf_counter()
+            list(queryset._chain())
+            timings.append((time.perf_counter() - started) * 1000)
+        return plan, statistics.median(timings)
+
+    # --- Индексы --------------------------------------------------------------
+
+    def drop_indexes(self):
+        dropped = 0
+        with connection.cursor() as cursor:
+            for model in apps.get_app_config('core').get_models():
+                for index in model._meta.indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+                    dropped += 1
+        return dropped
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    # --- Вывод ----------------------------------------------------------------
+
+    def report(self, label, before, after):
+        (plan_before, ms_before), (plan_after, ms_after) = before, after
+        speedup = ms_before / ms_after if ms_after else 0
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(f'  без индексов: {ms_before:.2f} мс')
+        for line in plan_before.splitlines():
+            self.stdout.write(f'      {line}')
+        self.stdout.write(f'  с индексами:  {ms_after:.2f} мс (x{speedup:.1f})')
+        for line in plan_after.splitlines():
+            self.stdout.write(f'      {line}')
+        self.stdout.write('')
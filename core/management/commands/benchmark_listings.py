@@ -0,0 +1,116 @@
+"""
+Management command to compare listing pages with and without card projections
+Usage: python manage.py benchmark_listings [--repeat 5]
+
+Открывает главную, блог, каталог книг и страницы статьи и книги (блоки
+«Похожие») на всех языках с CARD_PROJECTIONS_ENABLED=False и True и
+выводит для каждой страницы объём данных, полученных из базы (сумма
+размеров значений во всех строках результатов SELECT), и медианное
+время ответа. Кеш страниц и учёт просмотров на время замеров
+отключены, поэтому счётчики сайта не меняются.
+"""
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import translation
+
+from core.models import BlogPost, Book
+
+BENCHMARK_SETTINGS = {
+    'PAGE_CACHE_ENABLED': False,
+    'VIEW_COUNTERS_ENABLED': False,
+    'VIEW_COUNTER_FLUSH_INTERVAL': 0,
+    'QUERY_BUDGET_ENABLED': False,
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'}},
+}
+
+
+def value_size(value):
+    if value is None:
+        return 0
+    if isinstance(value, bytes):
+        return len(value)
+    return len(str(value).encode('utf-8'))
+
+
+def fetched_bytes(queries):
+    """Объём строк, которые вернули запросы SELECT (запросы выполняются повторно)"""
+    total = 0
+    with connection.cursor() as cursor:
+        for query in queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            cursor.execute(sql)
+            total += sum(value_size(value) for row in cursor.fetchall() for value in row)
+    return total
+
+
+class Command(BaseCommand):
+    help = 'Сравнить объём данных и время списков статей и книг с проекциями карточек и без них'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Количество замеров каждой страницы (берётся медиана)')
+
+    def handle(self, *args, **options):
+        post = BlogPost.objects.filter(is_published=True).only('slug').first()
+        book = Book.objects.filter(is_available=True).only('slug').first()
+        if post is None or book is None:
+            raise CommandError('Нужны хотя бы одна опубликованная статья и одна доступная книга')
+
+        hosts = [host for host in settings.ALLOWED_HOSTS if host and '*' not in host and not host.startswith('.')]
+        client = Client(HTTP_HOST=hosts[0] if hosts else 'localhost')
+
+        pages = []
+        for language, name in settings.LANGUAGES:
+            with translation.override(language):
+                pages += [
+                    reverse('index'),
+                    reverse('blog'),
+                    reverse('books'),
+                    reverse('blog_detail', kwargs={'slug': post.slug}),
+                    reverse('book_detail', kwargs={'slug': book.slug}),
+                ]
+
+        self.stdout.write(f'{"Страница":<45} {"Данные из БД":>25} {"Время, мс":>21}')
+        totals = {False: [0, 0.0], True: [0, 0.0]}
+        with override_settings(**BENCHMARK_SETTINGS):
+            for path in pages:
+                results = {}
+                for enabled in (False, True):
+                    with override_settings(CARD_PROJECTIONS_ENABLED=enabled):
+                        results[enabled] = self.measure(client, path, options['repeat'])
+                    totals[enabled][0] += results[enabled][0]
+                    totals[enabled][1] += results[enabled][1]
+                self.write_row(path, results[False], results[True])
+        self.stdout.write('-' * 93)
+        self.write_row('Итого', totals[False], totals[True])
+
+    def measure(self, client, path, repeat):
+        """(байт из базы, медианное время в мс) для страницы"""
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(path)
+        if response.status_code != 200:
+            raise CommandError(f'{path}: HTTP {response.status_code}')
+        size = fetched_bytes(context.captured_queries)
+
+        timings = []
+        for i in range(max(repeat, 1)):
+            started = time.perf_counter()
+            client.get(path)
+            timings.append((time.perf_counter() - started) * 1000)
+        return size, statistics.median(timings)
+
+    def write_row(self, label, before, after):
+        (bytes_before, ms_before), (bytes_after, ms_after) = before, after
+        saved = 100 * (1 - bytes_after / bytes_before) if bytes_before else 0
+        self.stdout.write(
+            f'{label:<45} {bytes_before / 1024:8.1f} → {bytes_after / 1024:6.1f} КБ (-{saved:2.0f}%)'
+            f' {ms_before:8.1f} → {ms_after:6.1f}'
+        )
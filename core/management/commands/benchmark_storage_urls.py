@@ -0,0 +1,87 @@
+"""
+Management command to compare the cost of media URL generation on R2 with and without the fast path
+Usage: python manage.py benchmark_storage_urls [--iterations 20000]
+
+Хранилища создаются с вымышленными ключами и endpoint: построение
+публичного URL не обращается к сети, поэтому команда работает и без R2.
+Перед замером проверяется, что быстрый путь (PublicUrlMixin) даёт те же
+URL, что и django-storages.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from core.storage_backends import MediaStorage
+
+SAMPLE_NAMES = [
+    'blog/featured.jpg',
+    'books/covers/Обложка книги (2024).jpg',
+    "uploads/2024/05/photo 1!*'~.webp",
+    'services/a+b=c&d.png',
+    'profile/photo.640w.avif',
+]
+
+CONFIGURATIONS = [
+    ('R2 endpoint, path-style', {'addressing_style': 'path'}),
+    ('R2 endpoint, virtual-hosted', {'addressing_style': 'virtual'}),
+    ('Custom domain', {'custom_domain': 'media.example.com'}),
+]
+
+
+class BaselineMediaStorage(S3Boto3Storage):
+    """MediaStorage без быстрого пути"""
+    location = MediaStorage.location
+    default_acl = MediaStorage.default_acl
+    file_overwrite = MediaStorage.file_overwrite
+
+
+class Command(BaseCommand):
+    help = 'Сравнить время построения URL медиафайлов на R2 с быстрым путём и без него'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000, help='Количество вызовов url() на замер')
+        parser.add_argument('--repeat', type=int, default=5, help='Количество замеров (берётся медиана)')
+
+    def handle(self, *args, **options):
+        for label, overrides in CONFIGURATIONS:
+            storage_options = {
+                'endpoint_url': 'https://account-id.r2.cloudflarestorage.com',
+                'bucket_name': 'maksudov-media',
+                'access_key': 'benchmark',
+                'secret_key': 'benchmark',
+                'region_name': 'auto',
+                'signature_version': 's3v4',
+                'querystring_auth': False,
+                'custom_domain': None,
+                **overrides,
+            }
+            baseline = BaselineMediaStorage(**storage_options)
+            fast = MediaStorage(**storage_options)
+
+            for name in SAMPLE_NAMES:
+                expected, actual = baseline.url(name), fast.url(name)
+                if expected != actual:
+                    raise CommandError(f'{label}: URL различаются для {name!r}:\n  {expected}\n  {actual}')
+
+            before = self.measure(baseline, options)
+            after = self.measure(fast, options)
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(f'  {fast.url(SAMPLE_NAMES[0])}')
+            self.stdout.write(f'  django-storages: {before:8.2f} мкс/вызов')
+            self.stdout.write(f'  быстрый путь:    {after:8.2f} мкс/вызов (x{before / after:.1f})')
+
+    def measure(self, storage, options):
+        """Медианное время одного вызова url() в микросекундах"""
+        iterations = options['iterations']
+        names = SAMPLE_NAMES * (iterations // len(SAMPLE_NAMES) + 1)
+        names = names[:iterations]
+        storage.url(names[0])  # клиент boto3 создаётся при первом вызове
+        timings = []
+        for i in range(options['repeat']):
+            started = time.perf_counter()
+            for name in names:
+                storage.url(name)
+            timings.append((time.perf_counter() - started) / iterations * 1e6)
+        return statistics.median(timings)
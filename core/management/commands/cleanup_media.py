@@ -0,0 +1,267 @@
+"""
+Management command to delete (or quarantine) media files that nothing references anymore
+Usage: python manage.py cleanup_media [--dry-run] [--quarantine] [--min-age 24] [--workers 8]
+
+MediaStorage не перезаписывает файлы (file_overwrite = False), поэтому
+после замены изображения или удаления объекта старые файлы остаются в
+хранилище навсегда. Команда:
+- обходит каталоги файловых полей моделей (upload_to) и CKEDITOR_UPLOAD_PATH
+  в несколько потоков: на R2 — постраничным ListObjectsV2 по каждому
+  каталогу, локально — по файловой системе;
+- собирает используемые файлы из всех FileField/ImageField и из ссылок
+  на media в текстовых полях (HTML из CKEditor на всех языках);
+- адаптивные копии (*.640w.webp) и миниатюры CKEditor (*_thumb.*) считаются
+  используемыми, пока используется их оригинал;
+- файлы моложе --min-age часов не трогает (их могли загрузить в
+  редакторе, но ещё не сохранить объект);
+- удаляет остальные пачками (на R2 — DeleteObjects по 1000 ключей) или с
+  --quarantine переносит их в orphaned/<дата>/, откуда их можно вернуть.
+
+С --dry-run только выводит отчёт: список файлов и объём по каталогам.
+"""
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+from core.models import EditorUpload
+from core.rendering import media_names
+
+# Копии из core/images.py: <имя>.<ширина>w.<формат>
+VARIANT_RE = re.compile(r'\.\d+w\.[a-z0-9]+$')
+THUMB_SUFFIX = '_thumb'
+
+QUARANTINE_PREFIX = 'orphaned'
+
+# Максимум ключей в одном запросе DeleteObjects
+DELETE_BATCH_SIZE = 1000
+
+
+def scan_prefixes():
+    """Каталоги хранилища, в которые сохраняют файлы поля моделей и CKEditor"""
+    prefixes = {settings.CKEDITOR_UPLOAD_PATH}
+    for model in apps.get_models():
+        for field in model._meta.fields:
+            if isinstance(field, models.FileField) and isinstance(field.upload_to, str):
+                # Часть пути до первого шаблона даты (uploads/%Y/%m/ → uploads/)
+                prefix = field.upload_to.split('%', 1)[0]
+                prefixes.add(prefix[:prefix.rfind('/') + 1])
+    prefixes = sorted(prefix for prefix in prefixes if prefix)
+    # Вложенные каталоги обходятся вместе с родительским
+    return [
+        prefix for prefix in prefixes
+        if not any(prefix != other and prefix.startswith(other) for other in prefixes)
+    ]
+
+
+def original_stem(name):
+    """Имя оригинала без расширения для адаптивной копии или миниатюры, иначе None"""
+    match = VARIANT_RE.search(name)
+    if match:
+        return name[:match.start()]
+    stem = os.path.splitext(name)[0]
+    if stem.endswith(THUMB_SUFFIX):
+        return stem[:-len(THUMB_SUFFIX)]
+    return None
+
+
+def list_s3(storage, prefix):
+    """(имя, размер, дата изменения) объектов с префиксом, постранично через ListObjectsV2"""
+    location = storage._normalize_name(clean_name(prefix))
+    root = storage._normalize_name('')
+    paginator = storage.connection.meta.client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=storage.bucket_name, Prefix=location):
+        for item in page.get('Contents', []):
+            name = item['Key'][len(root):].lstrip('/') if root else item['Key']
+            yield name, item['Size'], item['LastModified']
+
+
+def list_files(storage, prefix):
+    """(имя, размер, дата изменения) файлов каталога хранилища и его подкаталогов"""
+    try:
+        directories, files = storage.listdir(prefix)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        name = f'{prefix.rstrip("/")}/{filename}'
+        yield name, storage.size(name), storage.get_modified_time(name)
+    for directory in directories:
+        yield from list_files(storage, f'{prefix.rstrip("/")}/{directory}/')
+
+
+class Command(BaseCommand):
+    help = 'Удалить из хранилища media файлы, на которые больше ничего не ссылается'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Только показать отчёт о неиспользуемых файлах')
+        parser.add_argument('--quarantine', action='store_true',
+                            help=f'Переносить файлы в {QUARANTINE_PREFIX}/<дата>/ вместо удаления')
+        parser.add_argument('--min-age', type=float, default=24,
+                            help='Не трогать файлы моложе указанного числа часов (по умолчанию 24)')
+        parser.add_argument('--workers', type=int, default=8, help='Количество параллельных потоков')
+
+    def handle(self, *args, **options):
+        self.storage = storages['default']
+        self.workers = max(options['workers'], 1)
+        self.is_s3 = isinstance(self.storage, S3Boto3Storage)
+
+        prefixes = scan_prefixes()
+        self.stdout.write(f'Каталоги: {", ".join(prefixes)}')
+        # Сначала список файлов, затем ссылки: файл, загруженный во время
+        # обхода, либо не попадёт в список, либо уже будет найден в базе
+        stored = self.list_storage(prefixes)
+        referenced = self.referenced_names()
+        referenced_stems = {os.path.splitext(name)[0] for name in referenced}
+
+        cutoff = timezone.now() - timedelta(hours=options['min_age'])
+        orphans, recent = [], 0
+        for name, (size, modified) in stored.items():
+            if name in referenced or original_stem(name) in referenced_stems:
+                continue
+            if modified is not None and modified > cutoff:
+                recent += 1
+                continue
+            orphans.append((name, size))
+        orphans.sort()
+
+        self.report(stored, referenced, orphans, recent, verbose=options['dry_run'] or options['verbosity'] > 1)
+        if options['dry_run'] or not orphans:
+            return
+
+        names = [name for name, size in orphans]
+        if options['quarantine']:
+            target = f'{QUARANTINE_PREFIX}/{timezone.now():%Y%m%d-%H%M%S}/'
+            failed = self.quarantine(names, target)
+        else:
+            target = None
+            failed = self.delete(names)
+        removed = [name for name in names if name not in failed]
+        # Записи индекса загрузок CKEditor для удалённых файлов
+        EditorUpload.objects.filter(path__in=removed).delete()
+
+        action = f'Перенесено в {target}' if target else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(f'✓ {action}: {len(removed)}'))
+        if failed:
+            raise CommandError(f'Ошибок: {len(failed)}')
+
+    # --- Хранилище ----------------------------------------------------------
+
+    def list_storage(self, prefixes):
+        """{имя: (размер, дата изменения)} всех файлов в каталогах, каждый каталог в своём потоке"""
+        lister = list_s3 if self.is_s3 else list_files
+        stored = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(lambda prefix: list(lister(self.storage, prefix)), prefix) for prefix in prefixes]
+            for future in futures:
+                for name, size, modified in future.result():
+                    if timezone.is_naive(modified):
+                        modified = timezone.make_aware(modified)
+                    stored[name] = (size, modified)
+        return stored
+
+    def delete(self, names):
+        """Удаляет файлы пачками; возвращает множество имён, которые удалить не удалось"""
+        failed = set()
+        if self.is_s3:
+            client = self.storage.connection.meta.client
+            batches = [names[i:i + DELETE_BATCH_SIZE] for i in range(0, len(names), DELETE_BATCH_SIZE)]
+
+            def delete_batch(batch):
+                response = client.delete_objects(Bucket=self.storage.bucket_name, Delete={
+                    'Objects': [{'Key': self.storage._normalize_name(clean_name(name))} for name in batch],
+                    'Quiet': True,
+                })
+                return batch, response.get('Errors', [])
+
+            root = self.storage._normalize_name('')
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for batch, errors in executor.map(delete_batch, batches):
+                    for error in errors:
+                        name = error['Key'][len(root):].lstrip('/') if root else error['Key']
+                        failed.add(name)
+                        self.stdout.write(self.style.WARNING(f'  ✗ {name}: {error.get("Message")}'))
+            return failed
+        return self.run_parallel(self.storage.delete, names)
+
+    def quarantine(self, names, target):
+        """Переносит файлы в каталог target; возвращает множество имён, которые перенести не удалось"""
+        if self.is_s3:
+            client = self.storage.connection.meta.client
+            bucket = self.storage.bucket_name
+
+            def move(name):
+                client.copy_object(
+                    Bucket=bucket,
+                    Key=self.storage._normalize_name(clean_name(target + name)),
+                    CopySource={'Bucket': bucket, 'Key': self.storage._normalize_name(clean_name(name))},
+                )
+        else:
+            def move(name):
+                with self.storage.open(name) as f:
+                    self.storage.save(target + name, f)
+
+        failed = self.run_parallel(move, names)
+        # Оригиналы удаляются только после успешного копирования
+        return failed | self.delete([name for name in names if name not in failed])
+
+    def run_parallel(self, action, names):
+        failed = set()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(action, name): name for name in names}
+            for future, name in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    failed.add(name)
+                    self.stdout.write(self.style.WARNING(f'  ✗ {name}: {e}'))
+        return failed
+
+    # --- Ссылки на файлы ----------------------------------------------------
+
+    def referenced_names(self):
+        """Имена файлов из всех файловых полей и из ссылок на media в текстовых полях"""
+        referenced = set()
+        for model in apps.get_models():
+            file_fields = [field.attname for field in model._meta.concrete_fields if isinstance(field, models.FileField)]
+            text_fields = [field.attname for field in model._meta.concrete_fields if isinstance(field, models.TextField)]
+            if not file_fields and not text_fields:
+                continue
+            rows = model._base_manager.values_list(*file_fields, *text_fields).iterator(chunk_size=500)
+            for row in rows:
+                referenced.update(name for name in row[:len(file_fields)] if name)
+                for text in row[len(file_fields):]:
+                    if text and '/' in text:
+                        referenced.update(media_names(text))
+        return referenced
+
+    # --- Отчёт --------------------------------------------------------------
+
+    def report(self, stored, referenced, orphans, recent, verbose):
+        total = sum(size for size, modified in stored.values())
+        by_prefix = defaultdict(lambda: [0, 0])
+        for name, size in orphans:
+            directory = name.split('/', 1)[0] + '/'
+            by_prefix[directory][0] += 1
+            by_prefix[directory][1] += size
+            if verbose:
+                self.stdout.write(f'  - {name} ({filesizeformat(size)})')
+
+        self.stdout.write(
+            f'Файлов в хранилище: {len(stored)} ({filesizeformat(total)}), '
+            f'используется: {len(referenced)}, новее --min-age: {recent}'
+        )
+        for directory, (count, size) in sorted(by_prefix.items()):
+            self.stdout.write(f'  {directory:<20} {count:>6} файлов, {filesizeformat(size)}')
+        orphan_size = sum(size for name, size in orphans)
+        self.stdout.write(f'Неиспользуемых файлов: {len(orphans)} ({filesizeformat(orphan_size)})')
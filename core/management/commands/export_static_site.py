@@ -0,0 +1,138 @@
+"""
+Management command to pre-render the public site into static HTML files
+Usage: python manage.py export_static_site [--incremental] [--workers 4] [--output DIR]
+
+Отрисовывает главную, страницы «О враче», услуг, клинических случаев,
+публикаций, блога и книг, все активные услуги, публикации, опубликованные
+статьи и доступные книги на русском, узбекском (латиница) и узбекском
+(кириллица) в STATIC_SITE_ROOT (см. core/static_site.py). Страницы
+рендерятся в несколько потоков через тестовый клиент Django с хостом и
+схемой из STATIC_SITE_URL (ссылки og:url должны быть абсолютными).
+Файлы, содержимое которых не изменилось, не перезаписываются; страницы
+удалённых и снятых с публикации объектов удаляются.
+
+С --incremental перерисовываются только страницы, на которые повлияли
+изменения моделей с прошлого экспорта. Экспорт всё равно будет полным,
+если манифеста нет или с прошлого раза изменились шаблоны, переводы или
+манифест статики (site_version). После деплоя с изменениями кода
+запускайте полный экспорт без --incremental.
+Запускается по cron, например каждые 5 минут:
+    */5 * * * * cd ~/maksudov && python manage.py export_static_site --incremental
+"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.static_site import (
+    EXPORT_SETTINGS, affected_pages, all_fingerprints, all_pages, file_name, load_manifest, page_path,
+    remove_page, save_manifest, site_version, write_page,
+)
+
+
+def base_url():
+    """Схема и хост сайта: STATIC_SITE_URL или https://<первый хост из ALLOWED_HOSTS>"""
+    if settings.STATIC_SITE_URL:
+        parts = urlsplit(settings.STATIC_SITE_URL)
+        return parts.scheme or 'https', parts.netloc
+    hosts = [host for host in settings.ALLOWED_HOSTS if host and '*' not in host and not host.startswith('.')]
+    return ('http' if settings.DEBUG else 'https'), (hosts[0] if hosts else 'localhost')
+
+
+class Command(BaseCommand):
+    help = 'Сохранить публичные страницы сайта на всех языках в статические HTML-файлы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help='Перерисовать только страницы, затронутые изменениями с прошлого экспорта')
+        parser.add_argument('--workers', type=int, default=4, help='Количество потоков отрисовки')
+        parser.add_argument('--output', help='Каталог для файлов (по умолчанию STATIC_SITE_ROOT)')
+
+    def handle(self, *args, **options):
+        root = str(options['output'] or settings.STATIC_SITE_ROOT)
+        manifest = load_manifest(root)
+        started = time.monotonic()
+
+        with override_settings(**EXPORT_SETTINGS):
+            # Отпечатки снимаются до отрисовки: изменения во время экспорта
+            # попадут в следующий инкрементальный запуск
+            objects = all_fingerprints()
+            site = site_version()
+            paths = {
+                page_path(page, language): page
+                for page in all_pages()
+                for language, name in settings.LANGUAGES
+            }
+            old_pages = manifest['pages'] if manifest else {}
+
+            affected = None
+            if options['incremental'] and manifest and manifest.get('site') == site:
+                affected = affected_pages(manifest['objects'], objects)
+            if affected is None:
+                targets = sorted(paths)
+            else:
+                targets = sorted(path for path, page in paths.items() if page in affected or path not in old_pages)
+            mode = 'инкрементальный' if affected is not None else 'полный'
+            self.stdout.write(f'Экспорт ({mode}): {len(targets)} из {len(paths)} страниц → {root}')
+
+            pages = {path: digest for path, digest in old_pages.items() if path in paths}
+            written, failed = 0, []
+            if targets:
+                render = self.renderer(root)
+                with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+                    for path, digest, error in executor.map(lambda path: render(path, old_pages.get(path)), targets):
+                        if error:
+                            failed.append(path)
+                            pages.pop(path, None)
+                            self.stdout.write(self.style.WARNING(f'  ✗ {path}: {error}'))
+                            continue
+                        if digest != old_pages.get(path):
+                            written += 1
+                            if options['verbosity'] > 1:
+                                self.stdout.write(f'  + {path}')
+                        pages[path] = digest
+
+        stale = sorted(set(old_pages) - set(paths))
+        for path in stale:
+            remove_page(root, path)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  - {path}')
+        save_manifest(root, pages, objects, site)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Записано: {written}, без изменений: {len(targets) - written - len(failed)}, '
+            f'удалено: {len(stale)} ({time.monotonic() - started:.1f} с)'
+        ))
+        if failed:
+            raise CommandError(f'Не удалось отрисовать страниц: {len(failed)}')
+
+    def renderer(self, root):
+        """Функция отрисовки одной страницы: (путь, хеш, ошибка); у каждого потока свой клиент"""
+        scheme, host = base_url()
+        local = threading.local()
+
+        def render(path, old_digest):
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_HOST=host)
+            try:
+                response = local.client.get(path, secure=scheme == 'https')
+                if response.status_code != 200:
+                    return path, None, f'HTTP {response.status_code}'
+                content = response.content
+                if b'csrfmiddlewaretoken' in content:
+                    return path, None, 'страница содержит форму с CSRF-токеном'
+                digest = hashlib.sha256(content).hexdigest()
+                if digest != old_digest or not os.path.exists(os.path.join(root, file_name(path))):
+                    write_page(root, path, content)
+                return path, digest, None
+            except Exception as e:
+                return path, None, str(e)
+
+        return render
@@ -0,0 +1,15 @@
+"""
+Management command to flush buffered view counters to the database
+Usage: python manage.py flush_view_counts
+"""
+from django.core.management.base import BaseCommand
+
+from core.counters import flush_view_counts
+
+
+class Command(BaseCommand):
+    help = 'Перенести накопленные счётчики просмотров статей и книг в базу данных'
+
+    def handle(self, *args, **options):
+        flushed = flush_view_counts()
+        self.stdout.write(self.style.SUCCESS(f'✓ Перенесено просмотров: {flushed}'))
@@ -0,0 +1,92 @@
+"""
+Management command to generate responsive image variants (WebP/AVIF) for existing images
+Usage: python manage.py generate_image_variants [--force] [--workers 4]
+
+Создаёт копии изображений, помеченных при сохранении модели как ожидающие
+обработки, и изображений, для которых копий ещё нет (с --force — всех).
+Так же обрабатываются изображения, загруженные через CKEditor (индекс
+EditorUpload): после создания их копий HTML статей и книг с этими
+изображениями пересчитывается, и вместо <img> выводится <picture>.
+Запускается по cron, например каждую минуту:
+    * * * * * cd ~/maksudov && flock -n tmp/images.lock python manage.py generate_image_variants
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.caching import invalidate_public_pages
+from core.images import image_fields, is_pending, save_fields, update_variants
+from core.models import EditorUpload
+from core.rendering import editor_image_variants, rerender_editor_images
+
+
+class Command(BaseCommand):
+    help = 'Создать уменьшенные копии (WebP/AVIF) для уже загруженных изображений'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Пересоздать копии, даже если они уже есть')
+        parser.add_argument('--workers', type=int, default=4, help='Количество параллельных потоков')
+
+    def handle(self, *args, **options):
+        tasks = []
+        for model in apps.get_app_config('core').get_models():
+            for field in image_fields(model):
+                variants_field = f'{field.name}_variants'
+                queryset = model.objects.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+                for instance in queryset.only('pk', field.name, variants_field):
+                    if options['force'] or is_pending(getattr(instance, variants_field)):
+                        tasks.append((instance, field.name))
+
+        editor_images = [
+            record for record in EditorUpload.objects.filter(is_image=True).only('pk', 'path', 'variants')
+            if options['force'] or is_pending(record.variants)
+        ]
+        if editor_images:
+            self.process_editor_images(editor_images, options['workers'])
+
+        if not tasks:
+            return
+        self.stdout.write(f'Изображений для обработки: {len(tasks)}')
+        processed = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {executor.submit(self.process, instance, name): (instance, name) for instance, name in tasks}
+            for future in as_completed(futures):
+                instance, name = futures[future]
+                if future.result():
+                    processed += 1
+                else:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'  ✗ {getattr(instance, name).name}'))
+
+        if processed:
+            invalidate_public_pages()
+        self.stdout.write(self.style.SUCCESS(f'✓ Обработано: {processed}, с ошибкой: {failed}'))
+
+    def process(self, instance, name):
+        try:
+            return bool(update_variants(instance, name))
+        finally:
+            close_old_connections()
+
+    def process_editor_images(self, records, workers):
+        self.stdout.write(f'Изображений из редактора для обработки: {len(records)}')
+        processed = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(editor_image_variants, record.path): record for record in records}
+            for future in as_completed(futures):
+                record = futures[future]
+                values = future.result()
+                save_fields(record, values)
+                if values['variants']['sources']:
+                    processed.append(record.path)
+                else:
+                    self.stdout.write(self.style.WARNING(f'  ✗ {record.path}'))
+
+        if processed:
+            updated = rerender_editor_images(processed)
+            invalidate_public_pages()
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ Изображений из редактора: {len(processed)}, обновлено записей: {updated}'
+            ))
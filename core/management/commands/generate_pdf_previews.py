@@ -0,0 +1,58 @@
+"""
+Management command to create first-page previews and linearized copies of uploaded PDFs
+Usage: python manage.py generate_pdf_previews [--force]
+
+Обрабатывает PDF книг и публикаций, помеченные при сохранении флагом
+pdf_pending (с --force — все PDF). Превью создаётся библиотекой
+pypdfium2 (или PyMuPDF), линеаризованная копия — pikepdf (или qpdf), см.
+core/documents.py. Запускается по cron, например каждую минуту; flock не
+даёт двум запускам обрабатывать один и тот же большой файл:
+    * * * * * cd ~/maksudov && flock -n tmp/pdf.lock python manage.py generate_pdf_previews
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.caching import invalidate_public_pages
+from core.documents import linearizer, pdf_renderer, update_pdf_derivatives
+from core.models import Publication, Book
+
+
+class Command(BaseCommand):
+    help = 'Создать превью первой страницы и линеаризованные копии загруженных PDF книг и публикаций'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Пересоздать производные всех PDF, а не только новых')
+
+    def handle(self, *args, **options):
+        querysets = []
+        for model in (Publication, Book):
+            queryset = model.objects.exclude(pdf_file='').exclude(pdf_file__isnull=True)
+            if not options['force']:
+                queryset = queryset.filter(pdf_pending=True)
+            querysets.append(queryset)
+        if not any(queryset.exists() for queryset in querysets):
+            return
+
+        if pdf_renderer() is None:
+            self.stdout.write(self.style.WARNING(
+                'pypdfium2 и PyMuPDF не установлены (pip install -r requirements.txt): превью создаваться не будут'
+            ))
+        if settings.PDF_LINEARIZE and linearizer() is None:
+            self.stdout.write(self.style.WARNING(
+                'pikepdf и qpdf недоступны (pip install -r requirements.txt): линеаризация пропускается'
+            ))
+
+        processed = failed = 0
+        for queryset in querysets:
+            for instance in queryset.iterator():
+                try:
+                    update_pdf_derivatives(instance)
+                    processed += 1
+                    self.stdout.write(f'  ✓ {instance.pdf_file.name}')
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'  ✗ {instance.pdf_file.name}: {e}'))
+
+        if processed:
+            invalidate_public_pages()
+        self.stdout.write(self.style.SUCCESS(f'✓ Обработано: {processed}, с ошибкой: {failed}'))
@@ -0,0 +1,99 @@
+"""
+Management command to add files uploaded through CKEditor before the upload index existed
+Usage: python manage.py import_editor_uploads [--workers 8] [--dry-run]
+
+Один раз обходит каталог CKEDITOR_UPLOAD_PATH в хранилище и записывает в
+таблицу EditorUpload файлы, которых в ней ещё нет (миниатюры *_thumb и
+адаптивные копии *.640w.webp пропускаются). Размер, дата и размеры
+изображений читаются в несколько потоков. Автор для таких файлов
+неизвестен. Повторный запуск добавляет только новые файлы.
+"""
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from ckeditor_uploader.utils import storage
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from core.editor_uploads import image_info, is_thumbnail, upload_record
+from core.models import EditorUpload
+
+# Копии, которые core/rendering.py создаёт рядом с изображениями из редактора
+VARIANT_RE = re.compile(r'\.\d+w\.[a-z0-9]+$')
+
+BATCH_SIZE = 500
+
+
+def posix_join(path, name):
+    return f'{path.rstrip("/")}/{name}' if path else name
+
+
+def walk(path):
+    """Все файлы каталога хранилища и его подкаталогов"""
+    directories, files = storage.listdir(path)
+    for filename in files:
+        if not filename.startswith('.'):
+            yield posix_join(path, filename)
+    for directory in directories:
+        if not directory.startswith('.'):
+            yield from walk(posix_join(path, directory))
+
+
+class Command(BaseCommand):
+    help = 'Добавить в индекс EditorUpload файлы CKEditor, загруженные до его появления'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Количество потоков для чтения файлов')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать количество новых файлов')
+
+    def handle(self, *args, **options):
+        try:
+            listed = set(walk(settings.CKEDITOR_UPLOAD_PATH.rstrip('/')))
+        except FileNotFoundError:
+            listed = set()
+        known = set(EditorUpload.objects.values_list('path', flat=True))
+        paths = sorted(
+            path for path in listed - known
+            if not is_thumbnail(path) and not VARIANT_RE.search(path)
+        )
+        self.stdout.write(f'Файлов в хранилище: {len(listed)}, уже в индексе: {len(known & listed)}, новых: {len(paths)}')
+        if options['dry_run'] or not paths:
+            return
+
+        created = failed = 0
+        batch = []
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            for path, record in zip(paths, executor.map(self.describe, paths)):
+                if record is None:
+                    failed += 1
+                    continue
+                if record.thumbnail not in listed:
+                    record.thumbnail = ''
+                batch.append(record)
+                if len(batch) >= BATCH_SIZE:
+                    created += self.save(batch)
+                    batch = []
+        created += self.save(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Добавлено: {created}, с ошибкой: {failed}'))
+
+    def describe(self, path):
+        try:
+            try:
+                created_at = storage.get_modified_time(path)
+            except NotImplementedError:
+                created_at = None
+            info = None
+            if os.path.splitext(path)[1].lower() in Image.registered_extensions():
+                with storage.open(path) as f:
+                    info = image_info(f)
+            return upload_record(path, storage.size(path), info, created_at=created_at)
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f'  ✗ {path}: {e}'))
+            return None
+
+    def save(self, batch):
+        EditorUpload.objects.bulk_create(batch, ignore_conflicts=True)
+        return len(batch)
@@ -8,7 +8,7 @@ from django.conf import settings
 from datetime import date, timedelta
 from core.models import (
     Profile, Service, Publication, Project, BlogPost,
-    Achievement, Testimonial, Book
+    Category, Tag, Achievement, Testimonial, Book
 )
 
 
@@ -275,10 +275,18 @@ class Command(BaseCommand):
         ]
 
         for blog_data in blog_posts_data:
-            BlogPost.objects.get_or_create(
+            category_name = blog_data.pop('category')
+            tag_names = [name.strip() for name in blog_data.pop('tags').split(',')]
+            # slug создаёт save() через unique_slug — так же, как в админке
+            category, _ = Category.objects.get_or_create(name=category_name)
+            post, _ = BlogPost.objects.get_or_create(
                 slug=blog_data['slug'],
-                defaults=blog_data
+                defaults={**blog_data, 'category': category}
             )
+            post.tags.set([
+                Tag.objects.get_or_create(name=name)[0]
+                for name in tag_names
+            ])
         self.stdout.write(self.style.SUCCESS(f'✓ {len(blog_posts_data)} Blog posts created'))
 
         # Create Achievements
@@ -0,0 +1,45 @@
+"""
+Management command to send queued notifications from the Outbox
+Usage: python manage.py process_outbox [--loop] [--interval 10]
+
+Запускается по cron (например, каждую минуту) или постоянно с --loop
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.notifications import process_outbox, process_telegram_outbox, MAX_ATTEMPTS
+
+
+class Command(BaseCommand):
+    help = 'Отправить уведомления (email и Telegram) из очереди Outbox с повторными попытками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Сколько писем отправлять за проход')
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS, help='Число попыток до статуса "Ошибка"')
+        parser.add_argument('--loop', action='store_true', help='Работать постоянно, опрашивая очередь')
+        parser.add_argument('--interval', type=float, default=10, help='Пауза между проходами в режиме --loop (сек.)')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.drain(options['batch_size'], options['max_attempts'])
+            if sent or failed:
+                self.stdout.write(f'Email отправлено: {sent}, с ошибкой: {failed}')
+            sent, failed = process_telegram_outbox(max_attempts=options['max_attempts'])
+            if sent or failed:
+                self.stdout.write(f'Telegram отправлено: {sent}, с ошибкой: {failed}')
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+
+    def drain(self, batch_size, max_attempts):
+        """Обрабатывает очередь писем, пока в ней есть готовые к отправке"""
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = process_outbox(batch_size=batch_size, max_attempts=max_attempts)
+            total_sent += sent
+            total_failed += failed
+            if sent + failed < batch_size:
+                return total_sent, total_failed
@@ -0,0 +1,54 @@
+"""
+Management command to prepare editor HTML of blog posts, books and publications for display
+Usage: python manage.py render_rich_content [--batch-size 100]
+
+Заполняет на всех языках BlogPost.content_html, Book.description_html и
+Publication.abstract_html (очищенный HTML, изображения из редактора
+заменяются уменьшенными копиями с srcset, размерами и lazy loading), а
+также анонс (summary), количество слов и время чтения. Новые и
+изменённые записи обрабатываются при сохранении; команда нужна для уже
+существующего контента. Записи читаются и сохраняются пачками
+(bulk_update), кеш страниц сбрасывается один раз в конце.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.caching import invalidate_public_pages
+from core.models import BlogPost, Book, Publication
+from core.rendering import render_instance, rendered_fields, rendered_sources
+
+
+class Command(BaseCommand):
+    help = 'Подготовить HTML статей, книг и публикаций к показу, посчитать анонс и время чтения'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Количество записей в одном UPDATE')
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        processed = 0
+        for model in (BlogPost, Book, Publication):
+            model_name = model._meta.model_name
+            targets = rendered_fields(model_name)
+
+            batch = []
+            # bulk_update без save(), чтобы не сбрасывать кеш страниц на каждой записи
+            queryset = model.objects.only('pk', *rendered_sources(model_name))
+            for instance in queryset.iterator(chunk_size=batch_size):
+                render_instance(instance)
+                batch.append(instance)
+                if len(batch) >= batch_size:
+                    processed += self.save(model, batch, targets)
+                    batch = []
+            processed += self.save(model, batch, targets)
+            self.stdout.write(f'  {model._meta.verbose_name_plural}: готово')
+
+        if processed:
+            invalidate_public_pages()
+        self.stdout.write(self.style.SUCCESS(f'✓ Обработано записей: {processed}'))
+
+    def save(self, model, batch, targets):
+        if batch:
+            with transaction.atomic():
+                model.objects.bulk_update(batch, targets)
+        return len(batch)
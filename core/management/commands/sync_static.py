@@ -0,0 +1,205 @@
+"""
+Management command to upload only changed static files to the static storage (R2)
+Usage: python manage.py sync_static [--dry-run] [--workers 16] [--delete] [--full]
+
+Замена collectstatic для USE_R2_FOR_STATIC: collectstatic проверяет или
+загружает на R2 каждый файл по очереди (admin, CKEditor с тысячами файлов
+плагинов), и деплой занимает минуты. sync_static:
+- собирает статику локально в STATIC_BUILD_ROOT тем же хранилищем, что и
+  режим без R2 (CompressedStaticStorage): имена с хешем и манифест
+  staticfiles.json в обоих режимах одинаковые;
+- сравнивает SHA-256 содержимого собранных файлов с локальным манифестом
+  (STATIC_SYNC_MANIFEST) от предыдущей загрузки в то же хранилище;
+- загружает только новые и изменённые файлы в несколько потоков;
+- с --delete удаляет из хранилища файлы, пропавшие из проекта (их нет в
+  манифесте staticfiles.json последней сборки);
+- с --dry-run только выводит список изменений (локальная сборка
+  выполняется).
+
+Сжатые копии .br/.gz на R2 не загружаются: CDN не выбирает их по
+Accept-Encoding, а StaticStorage сам сжимает текстовые файлы.
+
+Работает с любым STATICFILES_STORAGE, поэтому проверяется на локальном
+S3-совместимом сервере (MinIO и т.п., R2_ENDPOINT_URL=http://127.0.0.1:9000)
+или на файловом хранилище без сети.
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.contrib.staticfiles.management.commands.collectstatic import Command as CollectStaticCommand
+from django.core.files.storage import FileSystemStorage, storages
+from django.core.management.base import BaseCommand, CommandError
+
+from core.storage_backends import CompressedStaticStorage
+
+MANIFEST_VERSION = 1
+
+# Сжатые копии нужны только WhiteNoise
+SKIP_SUFFIXES = ('.br', '.gz')
+
+
+def storage_target(storage):
+    """Идентификатор хранилища: манифест действителен только для него"""
+    parts = [type(storage).__module__, type(storage).__name__]
+    for attr in ('endpoint_url', 'bucket_name', 'location'):
+        value = getattr(storage, attr, None)
+        if value:
+            parts.append(str(value))
+    return ':'.join(parts)
+
+
+def file_digest(storage, path):
+    digest = hashlib.sha256()
+    with storage.open(path) as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = 'Загрузить в хранилище статики только изменившиеся файлы (по манифесту хешей)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, что будет загружено и удалено')
+        parser.add_argument('--workers', type=int, default=settings.STATIC_SYNC_WORKERS,
+                            help='Количество параллельных загрузок')
+        parser.add_argument('--delete', action='store_true',
+                            help='Удалить из хранилища файлы, которых больше нет в проекте')
+        parser.add_argument('--full', action='store_true', help='Игнорировать манифест и загрузить все файлы')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        self.storage = storages['staticfiles']
+        location = getattr(self.storage, 'location', None)
+        if isinstance(self.storage, FileSystemStorage) and os.path.realpath(location) == os.path.realpath(settings.STATIC_BUILD_ROOT):
+            raise CommandError('Статика хранится в каталоге сборки (режим без R2) — используйте collectstatic')
+        self.manifest_path = settings.STATIC_SYNC_MANIFEST
+        target = storage_target(self.storage)
+        started = time.perf_counter()
+
+        local = self.collect()
+        previous = {} if options['full'] else self.load_manifest(target)
+
+        upload = sorted(path for path, digest in local.items() if previous.get(path) != digest)
+        delete = sorted(set(previous) - set(local)) if options['delete'] else []
+        unchanged = len(local) - len(upload)
+
+        self.stdout.write(f'Хранилище: {target}')
+        self.stdout.write(f'Файлов: {len(local)}, без изменений: {unchanged}, к загрузке: {len(upload)}'
+                          + (f', к удалению: {len(delete)}' if options['delete'] else ''))
+
+        if options['dry_run']:
+            for path in upload:
+                self.stdout.write(f'  {"~" if path in previous else "+"} {path}')
+            for path in delete:
+                self.stdout.write(f'  - {path}')
+            return
+
+        manifest = dict(previous)
+        failed = self.run_parallel(self.upload, upload, options['workers'], manifest, local)
+        failed += self.run_parallel(self.delete, delete, options['workers'], manifest, local)
+        # Манифест сохраняется и при ошибках: успешно загруженные файлы
+        # не будут загружаться повторно
+        self.save_manifest(target, manifest)
+
+        elapsed = time.perf_counter() - started
+        if failed:
+            raise CommandError(f'Ошибок: {failed} (успешно обработанные файлы записаны в манифест)')
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Загружено: {len(upload)}, удалено: {len(delete)}, за {elapsed:.1f} с'
+        ))
+
+    # --- Файлы проекта ------------------------------------------------------
+
+    def collect(self):
+        """
+        Собирает статику в STATIC_BUILD_ROOT и возвращает {путь: sha256} собранных файлов
+
+        collectstatic не удаляет из каталога сборки файлы, пропавшие из
+        проекта, поэтому список файлов берётся из манифеста staticfiles.json
+        (исходные имена и имена с хешем), а остальные файлы каталога
+        удаляются: с --delete они удалятся и из хранилища.
+        """
+        build_storage = CompressedStaticStorage(location=settings.STATIC_BUILD_ROOT)
+        collector = CollectStaticCommand(stdout=self.stdout, stderr=self.stderr)
+        collector.storage = build_storage
+        collector.set_options(
+            interactive=False, verbosity=0, link=False, clear=False, dry_run=False,
+            ignore_patterns=[], use_default_ignore_patterns=True, post_process=True,
+        )
+        collector.collect()
+
+        current = {build_storage.manifest_name}
+        for name, hashed_name in build_storage.hashed_files.items():
+            current.update((name, hashed_name))
+
+        self.source = FileSystemStorage(location=settings.STATIC_BUILD_ROOT)
+        files = {}
+        root = str(settings.STATIC_BUILD_ROOT)
+        for directory, dirnames, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, '/')
+                original = path[:-len(os.path.splitext(path)[1])] if path.endswith(SKIP_SUFFIXES) else path
+                if original not in current:
+                    os.remove(os.path.join(directory, filename))
+                    continue
+                if path != original:
+                    continue
+                files[path] = file_digest(self.source, path)
+        return files
+
+    # --- Синхронизация ------------------------------------------------------
+
+    def run_parallel(self, action, paths, workers, manifest, local):
+        failed = 0
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = {executor.submit(action, path): path for path in paths}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'  ✗ {path}: {e}'))
+                    continue
+                if path in local:
+                    manifest[path] = local[path]
+                else:
+                    manifest.pop(path, None)
+                if self.verbosity > 1:
+                    self.stdout.write(f'  ✓ {path}')
+        return failed
+
+    def upload(self, path):
+        if not getattr(self.storage, 'file_overwrite', False) and self.storage.exists(path):
+            # Хранилища без перезаписи (файловое) сохранили бы файл под другим именем
+            self.storage.delete(path)
+        with self.source.open(path) as f:
+            self.storage.save(path, f)
+
+    def delete(self, path):
+        self.storage.delete(path)
+
+    # --- Манифест -----------------------------------------------------------
+
+    def load_manifest(self, target):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != MANIFEST_VERSION or data.get('target') != target:
+            self.stdout.write(self.style.WARNING('Манифест относится к другому хранилищу — будут загружены все файлы'))
+            return {}
+        return data.get('files', {})
+
+    def save_manifest(self, target, files):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        temporary = f'{self.manifest_path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'target': target, 'files': files}, f, indent=0, sort_keys=True)
+        os.replace(temporary, self.manifest_path)
@@ -0,0 +1,120 @@
+"""
+Учёт SQL-запросов каждого HTTP-запроса (для разработки и стенда)
+
+QueryBudgetMiddleware считает запросы к базе данных, их суммарное время
+и повторы. Один и тот же SQL с разными параметрами, выполненный
+QUERY_BUDGET_DUPLICATE_THRESHOLD и более раз, — подозрение на N+1
+(обычно ленивая загрузка связей в цикле шаблона). Итоги пишутся в лог
+core.queries и в заголовок Server-Timing (виден в DevTools браузера).
+
+При превышении бюджета (QUERY_BUDGET_MAX_QUERIES или значение из
+декоратора @query_budget) в лог пишется предупреждение, а с
+QUERY_BUDGET_RAISE = True выбрасывается QueryBudgetExceeded, и тест,
+запросивший страницу через тестовый клиент, падает.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('core.queries')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries):
+    """Свой бюджет запросов для представления (декоратор ставится внешним)"""
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+class QueryRecorder:
+    """Обёртка execute_wrapper, собирающая статистику запросов"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.exact = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+            self.exact[(sql, repr(params))] += 1
+
+    def duplicates(self):
+        """Количество лишних выполнений полностью одинаковых запросов"""
+        return sum(count - 1 for count in self.exact.values() if count > 1)
+
+    def suspects(self, threshold):
+        """Повторяющиеся запросы (SQL без учёта параметров) — подозрения на N+1"""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.max_queries = settings.QUERY_BUDGET_MAX_QUERIES
+        self.threshold = settings.QUERY_BUDGET_DUPLICATE_THRESHOLD
+        self.raise_on_excess = settings.QUERY_BUDGET_RAISE
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        budget = getattr(request, '_query_budget', self.max_queries)
+        suspects = recorder.suspects(self.threshold)
+        self._add_server_timing(response, recorder, suspects, total)
+        self._log(request, recorder, suspects, budget)
+
+        if budget is not None and recorder.count > budget and self.raise_on_excess:
+            raise QueryBudgetExceeded(
+                f'{request.method} {request.get_full_path()}: {recorder.count} SQL-запросов при бюджете {budget}'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = getattr(view_func, 'query_budget', None)
+        if budget is not None:
+            request._query_budget = budget
+
+    def _add_server_timing(self, response, recorder, suspects, total):
+        metrics = [
+            f'db;dur={recorder.duration * 1000:.1f};desc="SQL: {recorder.count}"',
+            f'app;dur={total * 1000:.1f}',
+        ]
+        if suspects:
+            metrics.append(f'nplus1;desc="N+1: {len(suspects)}"')
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = ', '.join(([existing] if existing else []) + metrics)
+
+    def _log(self, request, recorder, suspects, budget):
+        over_budget = budget is not None and recorder.count > budget
+        level = logging.WARNING if over_budget or suspects else logging.INFO
+        logger.log(
+            level, '%s %s: %d SQL-запросов (бюджет %s), %.1f мс, повторов %d',
+            request.method, request.get_full_path(), recorder.count, budget,
+            recorder.duration * 1000, recorder.duplicates(),
+        )
+        for sql, count in suspects:
+            logger.warning('Возможный N+1 (%d раз): %s', count, sql[:300])
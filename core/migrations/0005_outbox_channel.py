@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_outbox'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='outbox',
+            name='outbox_status_next_idx',
+        ),
+        migrations.AddField(
+            model_name='outbox',
+            name='channel',
+            field=models.CharField(choices=[('email', 'Email'), ('telegram', 'Telegram')], default='email', max_length=20, verbose_name='Канал'),
+        ),
+        migrations.AlterField(
+            model_name='outbox',
+            name='recipients',
+            field=models.TextField(help_text='По одному адресу (или ID чата Telegram) в строке', verbose_name='Получатели'),
+        ),
+        migrations.AddIndex(
+            model_name='outbox',
+            index=models.Index(fields=['channel', 'status', 'next_attempt_at'], name='outbox_channel_status_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_publication_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('name_ru', models.CharField(max_length=100, null=True, verbose_name='Название')),
+                ('name_uz', models.CharField(max_length=100, null=True, verbose_name='Название')),
+                ('name_uz_cyrl', models.CharField(max_length=100, null=True, verbose_name='Название')),
+                ('slug', models.SlugField(allow_unicode=True, blank=True, max_length=100, unique=True, verbose_name='URL slug')),
+                ('posts_count', models.IntegerField(default=0, editable=False, verbose_name='Опубликованных статей')),
+                ('order', models.IntegerField(default=0, verbose_name='Порядок')),
+            ],
+            options={
+                'verbose_name': 'Категория блога',
+                'verbose_name_plural': 'Категории блога',
+                'ordering': ['order', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('name_ru', models.CharField(max_length=100, null=True, verbose_name='Название')),
+                ('name_uz', models.CharField(max_length=100, null=True, verbose_name='Название')),
+                ('name_uz_cyrl', models.CharField(max_length=100, null=True, verbose_name='Название')),
+                ('slug', models.SlugField(allow_unicode=True, blank=True, max_length=100, unique=True, verbose_name='URL slug')),
+                ('posts_count', models.IntegerField(default=0, editable=False, verbose_name='Опубликованных статей')),
+            ],
+            options={
+                'verbose_name': 'Тег',
+                'verbose_name_plural': 'Теги',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='category_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posts', to='core.category', verbose_name='Категория'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, related_name='posts', to='core.tag', verbose_name='Теги'),
+        ),
+    ]
@@ -0,0 +1,106 @@
+from django.db import migrations
+from django.db.models import Count, Q
+from django.utils.text import slugify
+
+LANGUAGE_SUFFIXES = ('ru', 'uz', 'uz_cyrl')
+
+# Копия core.models.CYRILLIC_TO_LATIN на момент миграции: slug совпадают с созданными в админке
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'zh', 'з': 'z', 'и': 'i',
+    'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't',
+    'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ъ': '', 'ы': 'y',
+    'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya', 'ў': 'o', 'қ': 'q', 'ғ': 'g', 'ҳ': 'h',
+}
+
+
+def _split(value):
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+def _unique_slug(model, name):
+    """Как core.models.unique_slug: латинский slug с номером, если он занят"""
+    text = ''.join(CYRILLIC_TO_LATIN.get(char, char) for char in name.lower())
+    max_length = model._meta.get_field('slug').max_length
+    base = slugify(text)[:max_length].strip('-') or model._meta.model_name
+    slug, index = base, 2
+    while model.objects.filter(slug=slug).exists():
+        suffix = f'-{index}'
+        slug = base[:max_length - len(suffix)].rstrip('-') + suffix
+        index += 1
+    return slug
+
+
+def _get_or_create(model, cache, names):
+    """Находит объект по русскому названию без учёта регистра или создаёт его"""
+    key = names['ru'].lower()
+    if key not in cache:
+        obj = model.objects.filter(name_ru__iexact=names['ru']).first()
+        if obj is None:
+            obj = model.objects.create(
+                name=names['ru'],
+                slug=_unique_slug(model, names['ru']),
+                **{f'name_{suffix}': names.get(suffix) for suffix in LANGUAGE_SUFFIXES},
+            )
+        cache[key] = obj
+    return cache[key]
+
+
+def forwards(apps, schema_editor):
+    BlogPost = apps.get_model('core', 'BlogPost')
+    Category = apps.get_model('core', 'Category')
+    Tag = apps.get_model('core', 'Tag')
+    categories = {}
+    tags = {}
+
+    for post in BlogPost.objects.all():
+        category_names = {
+            suffix: getattr(post, f'category_{suffix}') or None for suffix in LANGUAGE_SUFFIXES
+        }
+        category_names['ru'] = category_names['ru'] or post.category or None
+        if category_names['ru']:
+            post.category_ref = _get_or_create(Category, categories, category_names)
+            post.save(update_fields=['category_ref'])
+
+        # Теги на разных языках сопоставляются по позиции в списке
+        tag_lists = {suffix: _split(getattr(post, f'tags_{suffix}')) for suffix in LANGUAGE_SUFFIXES}
+        if not tag_lists['ru']:
+            tag_lists['ru'] = _split(post.tags)
+        post_tags = []
+        for index, name in enumerate(tag_lists['ru']):
+            names = {'ru': name}
+            for suffix in ('uz', 'uz_cyrl'):
+                if len(tag_lists[suffix]) == len(tag_lists['ru']):
+                    names[suffix] = tag_lists[suffix][index]
+            post_tags.append(_get_or_create(Tag, tags, names))
+        post.tag_set.set(post_tags)
+
+    for category in Category.objects.annotate(total=Count('posts', filter=Q(posts__is_published=True))):
+        Category.objects.filter(pk=category.pk).update(posts_count=category.total)
+    for tag in Tag.objects.annotate(total=Count('posts', filter=Q(posts__is_published=True))):
+        Tag.objects.filter(pk=tag.pk).update(posts_count=tag.total)
+
+
+def backwards(apps, schema_editor):
+    BlogPost = apps.get_model('core', 'BlogPost')
+    for post in BlogPost.objects.select_related('category_ref').prefetch_related('tag_set'):
+        post_tags = list(post.tag_set.all())
+        for suffix in LANGUAGE_SUFFIXES:
+            if post.category_ref:
+                setattr(post, f'category_{suffix}', getattr(post.category_ref, f'name_{suffix}') or '')
+            setattr(post, f'tags_{suffix}', ', '.join(
+                getattr(tag, f'name_{suffix}') for tag in post_tags if getattr(tag, f'name_{suffix}')
+            ))
+        post.category = post.category_ref.name if post.category_ref else ''
+        post.tags = ', '.join(tag.name for tag in post_tags)
+        post.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_blog_category_tag'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_migrate_blog_categories_and_tags'),
+    ]
+
+    operations = [
+        migrations.RemoveField(model_name='blogpost', name='category'),
+        migrations.RemoveField(model_name='blogpost', name='category_ru'),
+        migrations.RemoveField(model_name='blogpost', name='category_uz'),
+        migrations.RemoveField(model_name='blogpost', name='category_uz_cyrl'),
+        migrations.RemoveField(model_name='blogpost', name='tags'),
+        migrations.RemoveField(model_name='blogpost', name='tags_ru'),
+        migrations.RemoveField(model_name='blogpost', name='tags_uz'),
+        migrations.RemoveField(model_name='blogpost', name='tags_uz_cyrl'),
+        migrations.RenameField(model_name='blogpost', old_name='category_ref', new_name='category'),
+        migrations.RenameField(model_name='blogpost', old_name='tag_set', new_name='tags'),
+    ]
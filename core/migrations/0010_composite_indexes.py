@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_replace_blog_category_and_tags'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='achievement',
+            index=models.Index(fields=['-date', 'order'], name='achievement_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-published_at', '-created_at'], name='blogpost_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['category', '-published_at', '-created_at'], name='blogpost_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['-is_featured', 'order', '-publication_year'], name='book_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['publication_year'], name='book_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-start_date', 'order'], name='project_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['publication_type', 'year'], name='publication_type_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['-year'], name='publication_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['-year'], name='publication_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order'], name='service_active_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceimage',
+            index=models.Index(fields=['service', 'order', 'created_at'], name='serviceimage_service_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicereview',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['service', '-created_at'], name='review_service_approved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['-created_at'], name='testimonial_approved_idx'),
+        ),
+    ]
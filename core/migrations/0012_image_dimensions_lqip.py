@@ -0,0 +1,142 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:42
+
+from django.db import migrations, models
+
+IMAGE_FIELDS = {
+    'profile': 'photo',
+    'serviceimage': 'image',
+    'project': 'image',
+    'blogpost': 'featured_image',
+    'achievement': 'certificate_image',
+    'testimonial': 'patient_photo',
+    'book': 'cover_image',
+}
+
+
+def copy_dimensions_from_variants(apps, schema_editor):
+    """Размеры изображений, для которых уже созданы копии, хранились в <поле>_variants"""
+    for model_name, field in IMAGE_FIELDS.items():
+        model = apps.get_model('core', model_name)
+        for pk, variants in model.objects.values_list('pk', f'{field}_variants'):
+            if variants and variants.get('width'):
+                model.objects.filter(pk=pk).update(**{
+                    f'{field}_width': variants['width'],
+                    f'{field}_height': variants['height'],
+                    f'{field}_variants': {'sources': variants.get('sources', {})},
+                })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='achievement',
+            name='certificate_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота изображения'),
+        ),
+        migrations.AddField(
+            model_name='achievement',
+            name='certificate_image_lqip',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью изображения (LQIP)'),
+        ),
+        migrations.AddField(
+            model_name='achievement',
+            name='certificate_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='featured_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота изображения'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='featured_image_lqip',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью изображения (LQIP)'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='featured_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='cover_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота изображения'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='cover_image_lqip',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью изображения (LQIP)'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='cover_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='photo_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота изображения'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='photo_lqip',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью изображения (LQIP)'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='photo_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота изображения'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_lqip',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью изображения (LQIP)'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.AddField(
+            model_name='serviceimage',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота изображения'),
+        ),
+        migrations.AddField(
+            model_name='serviceimage',
+            name='image_lqip',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью изображения (LQIP)'),
+        ),
+        migrations.AddField(
+            model_name='serviceimage',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='patient_photo_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота изображения'),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='patient_photo_lqip',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью изображения (LQIP)'),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='patient_photo_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.RunPython(copy_dimensions_from_variants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:44
+
+from django.db import migrations, models
+from django.db.models import F
+
+RICH_CONTENT_FIELDS = {
+    'blogpost': ('content', 'content_html'),
+    'book': ('description', 'description_html'),
+}
+LANGUAGES = ('ru', 'uz', 'uz_cyrl')
+
+
+def copy_source_html(apps, schema_editor):
+    """
+    До обработки командой render_rich_content показывается исходный HTML
+
+    Иначе для языка без обработанного HTML modeltranslation подставил бы
+    текст на русском
+    """
+    for model_name, (source, target) in RICH_CONTENT_FIELDS.items():
+        apps.get_model('core', model_name).objects.update(**{
+            target: F(source),
+            **{f'{target}_{lang}': F(f'{source}_{lang}') for lang in LANGUAGES},
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_image_dimensions_lqip'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Содержание для показа'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_html_ru',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Содержание для показа'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_html_uz',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Содержание для показа'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_html_uz_cyrl',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Содержание для показа'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='description_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Описание для показа'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='description_html_ru',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Описание для показа'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='description_html_uz',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Описание для показа'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='description_html_uz_cyrl',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Описание для показа'),
+        ),
+        migrations.RunPython(copy_source_html, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_rich_content_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='pdf_preview',
+            field=models.ImageField(blank=True, editable=False, upload_to='books/previews/', verbose_name='Превью PDF'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='pdf_preview_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота изображения'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='pdf_preview_lqip',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью изображения (LQIP)'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='pdf_preview_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Копии изображения'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='pdf_preview_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='pdf_web_file',
+            field=models.FileField(blank=True, editable=False, upload_to='books/pdfs/', verbose_name='PDF для просмотра в браузере'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='pdf_preview',
+            field=models.ImageField(blank=True, editable=False, upload_to='publications/previews/', verbose_name='Превью PDF'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='pdf_preview_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота изображения'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='pdf_preview_lqip',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью изображения (LQIP)'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='pdf_preview_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Копии изображения'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='pdf_preview_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='pdf_web_file',
+            field=models.FileField(blank=True, editable=False, upload_to='publications/', verbose_name='PDF для просмотра в браузере'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0014_pdf_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EditorUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500, unique=True, verbose_name='Путь в хранилище')),
+                ('filename', models.CharField(max_length=255, verbose_name='Имя файла')),
+                ('thumbnail', models.CharField(blank=True, max_length=500, verbose_name='Миниатюра')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='Размер (байт)')),
+                ('width', models.PositiveIntegerField(blank=True, null=True, verbose_name='Ширина')),
+                ('height', models.PositiveIntegerField(blank=True, null=True, verbose_name='Высота')),
+                ('is_image', models.BooleanField(default=False, verbose_name='Изображение')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Загружено')),
+                ('uploaded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='editor_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Загрузил')),
+            ],
+            options={
+                'verbose_name': 'Файл редактора',
+                'verbose_name_plural': 'Файлы редактора',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at'], name='editorupload_created_idx'), models.Index(fields=['uploaded_by', '-created_at'], name='editorupload_user_idx')],
+            },
+        ),
+    ]
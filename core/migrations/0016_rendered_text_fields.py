@@ -0,0 +1,213 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_editor_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='reading_time_ru',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='reading_time_uz',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='reading_time_uz_cyrl',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='summary',
+            field=models.TextField(blank=True, editable=False, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='summary_ru',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='summary_uz',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='summary_uz_cyrl',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество слов'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='word_count_ru',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Количество слов'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='word_count_uz',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Количество слов'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='word_count_uz_cyrl',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Количество слов'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='reading_time_ru',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='reading_time_uz',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='reading_time_uz_cyrl',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='summary',
+            field=models.TextField(blank=True, editable=False, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='summary_ru',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='summary_uz',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='summary_uz_cyrl',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество слов'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='word_count_ru',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Количество слов'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='word_count_uz',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Количество слов'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='word_count_uz_cyrl',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Количество слов'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='abstract_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Аннотация для показа'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='abstract_html_ru',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Аннотация для показа'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='abstract_html_uz',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Аннотация для показа'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='abstract_html_uz_cyrl',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Аннотация для показа'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='reading_time_ru',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='reading_time_uz',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='reading_time_uz_cyrl',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='summary',
+            field=models.TextField(blank=True, editable=False, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='summary_ru',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='summary_uz',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='summary_uz_cyrl',
+            field=models.TextField(blank=True, editable=False, null=True, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество слов'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='word_count_ru',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Количество слов'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='word_count_uz',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Количество слов'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='word_count_uz_cyrl',
+            field=models.PositiveIntegerField(default=0, editable=False, null=True, verbose_name='Количество слов'),
+        ),
+    ]
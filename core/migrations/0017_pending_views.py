@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_rendered_text_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingView',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=50, verbose_name='Модель')),
+                ('slug', models.SlugField(max_length=500, verbose_name='URL slug')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Просмотры')),
+            ],
+            options={
+                'verbose_name': 'Неперенесённые просмотры',
+                'verbose_name_plural': 'Неперенесённые просмотры',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='pendingview',
+            constraint=models.UniqueConstraint(fields=('model_name', 'slug'), name='pendingview_unique'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:30
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_pending_views'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outbox',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Для статуса «Отправляется» — срок, после которого запись снова можно взять в отправку', verbose_name='Следующая попытка'),
+        ),
+        migrations.AlterField(
+            model_name='outbox',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Ожидает отправки'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус'),
+        ),
+    ]
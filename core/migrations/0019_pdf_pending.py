@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+def queue_missing_derivatives(apps, schema_editor):
+    """PDF, для которых ещё нет ни превью, ни линеаризованной копии, обработает generate_pdf_previews"""
+    for model_name in ('Book', 'Publication'):
+        model = apps.get_model('core', model_name)
+        model.objects.exclude(pdf_file='').exclude(pdf_file__isnull=True).filter(
+            pdf_preview='', pdf_web_file=''
+        ).update(pdf_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_outbox_sending_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='pdf_pending',
+            field=models.BooleanField(default=False, editable=False, verbose_name='PDF ждёт обработки'),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='pdf_pending',
+            field=models.BooleanField(default=False, editable=False, verbose_name='PDF ждёт обработки'),
+        ),
+        migrations.RunPython(queue_missing_derivatives, migrations.RunPython.noop),
+    ]
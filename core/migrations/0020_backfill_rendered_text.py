@@ -0,0 +1,81 @@
+import html
+import math
+import re
+
+from django.conf import settings
+from django.db import migrations
+from django.utils.html import linebreaks
+
+LANGUAGE_SUFFIXES = ('ru', 'uz', 'uz_cyrl')
+
+# Модель → (поле с текстом, поле краткого описания, длина анонса в словах, текст без разметки)
+SOURCES = {
+    'BlogPost': ('content', 'excerpt', 20, False),
+    'Book': ('description', 'short_description', 20, False),
+    'Publication': ('abstract', None, 40, True),
+}
+
+_hidden_re = re.compile(r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_tag_re = re.compile(r'<[^>]*>')
+
+
+def _text(value, plain):
+    """Текст без разметки (приближённо; точные значения пересчитывает render_rich_content)"""
+    if not value:
+        return ''
+    if not plain:
+        value = html.unescape(_tag_re.sub(' ', _hidden_re.sub(' ', value)))
+    return ' '.join(value.split())
+
+
+def _summary(text, max_words):
+    words = text.split()
+    if len(words) > max_words:
+        return ' '.join(words[:max_words]) + '…'
+    return ' '.join(words)
+
+
+def _reading_time(words):
+    return max(1, math.ceil(words / getattr(settings, 'READING_WORDS_PER_MINUTE', 180))) if words else 0
+
+
+def backfill(apps, schema_editor):
+    """Анонс, количество слов и время чтения для записей, сохранённых до 0016"""
+    for model_name, (source, manual_field, max_words, plain) in SOURCES.items():
+        model = apps.get_model('core', model_name)
+        names = ('summary', 'word_count', 'reading_time') + (('abstract_html',) if plain else ())
+        # Основное поле modeltranslation хранит русское значение
+        fields = [*names, *(f'{name}_{suffix}' for name in names for suffix in LANGUAGE_SUFFIXES)]
+
+        batch = []
+        # Записи, сохранённые после 0016, уже обработаны render_instance
+        for instance in model.objects.filter(summary_ru='', word_count_ru=0).iterator(chunk_size=100):
+            texts = {suffix: _text(getattr(instance, f'{source}_{suffix}'), plain) for suffix in LANGUAGE_SUFFIXES}
+            for suffix, text in texts.items():
+                manual = _text(getattr(instance, f'{manual_field}_{suffix}'), True) if manual_field else ''
+                words = len((text or texts['ru']).split())
+                setattr(instance, f'summary_{suffix}', _summary(manual or text, max_words))
+                setattr(instance, f'word_count_{suffix}', words)
+                setattr(instance, f'reading_time_{suffix}', _reading_time(words))
+                if plain:
+                    value = getattr(instance, f'{source}_{suffix}')
+                    setattr(instance, f'abstract_html_{suffix}', linebreaks(value, autoescape=True) if value else value)
+            for name in names:
+                setattr(instance, name, getattr(instance, f'{name}_ru'))
+            batch.append(instance)
+            if len(batch) >= 100:
+                model.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_pdf_pending'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_backfill_rendered_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='editorupload',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Создаются командой generate_image_variants; пустой словарь — ещё не созданы', verbose_name='Копии изображения'),
+        ),
+    ]
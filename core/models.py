@@ -1,15 +1,50 @@
 from django.db import models
+from django.conf import settings
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.functions import Coalesce
 from ckeditor.fields import RichTextField
 from ckeditor_uploader.fields import RichTextUploadingField
 
 
+# Транслитерация русской и узбекской кириллицы для URL
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'zh', 'з': 'z', 'и': 'i',
+    'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't',
+    'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ъ': '', 'ы': 'y',
+    'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya', 'ў': 'o', 'қ': 'q', 'ғ': 'g', 'ҳ': 'h',
+}
+
+
+def unique_slug(instance, value, fallback):
+    """
+    Латинский slug из value, уникальный среди объектов модели
+
+    Кириллица транслитерируется; если slug занят, добавляется номер
+    (-2, -3...); если от названия ничего не осталось, берётся fallback
+    """
+    text = ''.join(CYRILLIC_TO_LATIN.get(char, char) for char in value.lower())
+    max_length = instance._meta.get_field('slug').max_length
+    base = slugify(text)[:max_length].strip('-') or fallback
+    others = type(instance)._default_manager.exclude(pk=instance.pk)
+    slug, index = base, 2
+    while others.filter(slug=slug).exists():
+        suffix = f'-{index}'
+        slug = base[:max_length - len(suffix)].rstrip('-') + suffix
+        index += 1
+    return slug
+
+
 class Profile(models.Model):
     """Профиль уролога"""
     full_name = models.CharField('ФИО', max_length=255)
     photo = models.ImageField('Фото профиля', upload_to='profile/', blank=True, null=True)
+    photo_variants = models.JSONField('Копии изображения', default=dict, blank=True, editable=False)
+    photo_width = models.PositiveIntegerField('Ширина изображения', blank=True, null=True, editable=False)
+    photo_height = models.PositiveIntegerField('Высота изображения', blank=True, null=True, editable=False)
+    photo_lqip = models.TextField('Превью изображения (LQIP)', blank=True, editable=False)
     birth_date = models.DateField('Дата рождения', blank=True, null=True)
     education = models.TextField('Образование')
     academic_degree = models.CharField('Ученая степень', max_length=255, blank=True)
@@ -56,6 +91,9 @@ class Service(models.Model):
         verbose_name = 'Услуга'
         verbose_name_plural = 'Услуги'
         ordering = ['order', 'title']
+        indexes = [
+            models.Index(fields=['order'], condition=models.Q(is_active=True), name='service_active_order_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -68,6 +106,10 @@ class ServiceImage(models.Model):
     """Изображения для услуг (галерея)"""
     service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='images', verbose_name='Услуга')
     image = models.ImageField('Изображение', upload_to='services/gallery/')
+    image_variants = models.JSONField('Копии изображения', default=dict, blank=True, editable=False)
+    image_width = models.PositiveIntegerField('Ширина изображения', blank=True, null=True, editable=False)
+    image_height = models.PositiveIntegerField('Высота изображения', blank=True, null=True, editable=False)
+    image_lqip = models.TextField('Превью изображения (LQIP)', blank=True, editable=False)
     alt_text = models.CharField('Альтернативный текст', max_length=255, blank=True)
     order = models.IntegerField('Порядок', default=0)
     created_at = models.DateTimeField('Создано', auto_now_add=True)
@@ -76,6 +118,9 @@ class ServiceImage(models.Model):
         verbose_name = 'Изображение услуги'
         verbose_name_plural = 'Изображения услуг'
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['service', 'order', 'created_at'], name='serviceimage_service_idx'),
+        ]
     
     def __str__(self):
         return f"{self.service.title} - Изображение {self.order}"
@@ -95,6 +140,9 @@ class ServiceReview(models.Model):
         verbose_name = 'Отзыв по услуге'
         verbose_name_plural = 'Отзывы по услугам'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['service', '-created_at'], condition=models.Q(is_approved=True), name='review_service_approved_idx'),
+        ]
     
     def __str__(self):
         return f"{self.service.title} - {self.patient_name}"
@@ -122,9 +170,20 @@ class Publication(models.Model):
     isbn = models.CharField('ISBN', max_length=50, blank=True)
     link = models.URLField('Ссылка', blank=True)
     abstract = models.TextField('Аннотация', blank=True)
+    abstract_html = models.TextField('Аннотация для показа', blank=True, editable=False)
+    summary = models.TextField('Анонс', blank=True, editable=False)
+    word_count = models.PositiveIntegerField('Количество слов', default=0, editable=False)
+    reading_time = models.PositiveIntegerField('Время чтения, мин', default=0, editable=False)
     keywords = models.CharField('Ключевые слова', max_length=500, blank=True, help_text='Через запятую')
     citation_count = models.IntegerField('Цитирования', default=0)
     pdf_file = models.FileField('PDF файл', upload_to='publications/', blank=True, null=True)
+    pdf_preview = models.ImageField('Превью PDF', upload_to='publications/previews/', blank=True, editable=False)
+    pdf_preview_variants = models.JSONField('Копии изображения', default=dict, blank=True, editable=False)
+    pdf_preview_width = models.PositiveIntegerField('Ширина изображения', blank=True, null=True, editable=False)
+    pdf_preview_height = models.PositiveIntegerField('Высота изображения', blank=True, null=True, editable=False)
+    pdf_preview_lqip = models.TextField('Превью изображения (LQIP)', blank=True, editable=False)
+    pdf_web_file = models.FileField('PDF для просмотра в браузере', upload_to='publications/', blank=True, editable=False)
+    pdf_pending = models.BooleanField('PDF ждёт обработки', default=False, editable=False)
     is_featured = models.BooleanField('Избранная', default=False)
     created_at = models.DateTimeField('Создано', auto_now_add=True)
     updated_at = models.DateTimeField('Обновлено', auto_now=True)
@@ -133,6 +192,11 @@ class Publication(models.Model):
         verbose_name = 'Публикация'
         verbose_name_plural = 'Публикации'
         ordering = ['-year', 'title']
+        indexes = [
+            models.Index(fields=['publication_type', 'year'], name='publication_type_year_idx'),
+            models.Index(fields=['-year'], name='publication_year_idx'),
+            models.Index(fields=['-year'], condition=models.Q(is_featured=True), name='publication_featured_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.year})"
@@ -152,6 +216,10 @@ class Project(models.Model):
     funding = models.CharField('Финансирование', max_length=255, blank=True)
     results = models.TextField('Результаты', blank=True)
     image = models.ImageField('Изображение', upload_to='projects/', blank=True, null=True)
+    image_variants = models.JSONField('Копии изображения', default=dict, blank=True, editable=False)
+    image_width = models.PositiveIntegerField('Ширина изображения', blank=True, null=True, editable=False)
+    image_height = models.PositiveIntegerField('Высота изображения', blank=True, null=True, editable=False)
+    image_lqip = models.TextField('Превью изображения (LQIP)', blank=True, editable=False)
     is_active = models.BooleanField('Активный', default=True)
     order = models.IntegerField('Порядок', default=0)
     created_at = models.DateTimeField('Создано', auto_now_add=True)
@@ -161,6 +229,9 @@ class Project(models.Model):
         verbose_name = 'Проект'
         verbose_name_plural = 'Проекты'
         ordering = ['-start_date', 'order']
+        indexes = [
+            models.Index(fields=['-start_date', 'order'], condition=models.Q(is_active=True), name='project_active_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -170,15 +241,80 @@ class Project(models.Model):
         return self.end_date is None
 
 
+class Category(models.Model):
+    """Категории статей блога"""
+    name = models.CharField('Название', max_length=100)
+    slug = models.SlugField('URL slug', max_length=100, unique=True, blank=True, allow_unicode=True)
+    posts_count = models.IntegerField('Опубликованных статей', default=0, editable=False)
+    order = models.IntegerField('Порядок', default=0)
+    
+    class Meta:
+        verbose_name = 'Категория блога'
+        verbose_name_plural = 'Категории блога'
+        ordering = ['order', 'name']
+    
+    def __str__(self):
+        return self.name
+    
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = unique_slug(self, self.name, 'category')
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def update_counts(cls):
+        """Пересчитывает количество опубликованных статей в категориях"""
+        published = BlogPost.objects.filter(
+            is_published=True, category=models.OuterRef('pk')
+        ).order_by().values('category').annotate(total=models.Count('pk')).values('total')
+        cls.objects.update(posts_count=Coalesce(models.Subquery(published), 0))
+
+
+class Tag(models.Model):
+    """Теги статей блога"""
+    name = models.CharField('Название', max_length=100)
+    slug = models.SlugField('URL slug', max_length=100, unique=True, blank=True, allow_unicode=True)
+    posts_count = models.IntegerField('Опубликованных статей', default=0, editable=False)
+    
+    class Meta:
+        verbose_name = 'Тег'
+        verbose_name_plural = 'Теги'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = unique_slug(self, self.name, 'tag')
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def update_counts(cls):
+        """Пересчитывает количество опубликованных статей с тегом (для облака тегов)"""
+        published = BlogPost.objects.filter(
+            is_published=True, tags=models.OuterRef('pk')
+        ).order_by().values('tags').annotate(total=models.Count('pk')).values('total')
+        cls.objects.update(posts_count=Coalesce(models.Subquery(published), 0))
+
+
 class BlogPost(models.Model):
     """Блог/Статьи"""
     title = models.CharField('Заголовок', max_length=500)
     slug = models.SlugField('URL slug', max_length=500, unique=True, blank=True)
     content = RichTextUploadingField('Содержание', config_name='default')
+    content_html = models.TextField('Содержание для показа', blank=True, editable=False)
+    summary = models.TextField('Анонс', blank=True, editable=False)
+    word_count = models.PositiveIntegerField('Количество слов', default=0, editable=False)
+    reading_time = models.PositiveIntegerField('Время чтения, мин', default=0, editable=False)
     excerpt = models.TextField('Краткое описание', max_length=500, blank=True)
     featured_image = models.ImageField('Изображение', upload_to='blog/', blank=True, null=True)
-    category = models.CharField('Категория', max_length=100, blank=True)
-    tags = models.CharField('Теги', max_length=500, blank=True, help_text='Через запятую')
+    featured_image_variants = models.JSONField('Копии изображения', default=dict, blank=True, editable=False)
+    featured_image_width = models.PositiveIntegerField('Ширина изображения', blank=True, null=True, editable=False)
+    featured_image_height = models.PositiveIntegerField('Высота изображения', blank=True, null=True, editable=False)
+    featured_image_lqip = models.TextField('Превью изображения (LQIP)', blank=True, editable=False)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, blank=True, null=True, related_name='posts', verbose_name='Категория')
+    tags = models.ManyToManyField(Tag, blank=True, related_name='posts', verbose_name='Теги')
     views_count = models.IntegerField('Просмотры', default=0)
     is_published = models.BooleanField('Опубликовано', default=True)
     published_at = models.DateTimeField('Дата публикации', blank=True, null=True)
@@ -189,6 +325,10 @@ class BlogPost(models.Model):
         verbose_name = 'Статья блога'
         verbose_name_plural = 'Статьи блога'
         ordering = ['-published_at', '-created_at']
+        indexes = [
+            models.Index(fields=['-published_at', '-created_at'], condition=models.Q(is_published=True), name='blogpost_published_idx'),
+            models.Index(fields=['category', '-published_at', '-created_at'], condition=models.Q(is_published=True), name='blogpost_category_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -202,8 +342,8 @@ class BlogPost(models.Model):
         return reverse('blog_detail', kwargs={'slug': self.slug})
     
     def increment_views(self):
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        from .counters import record_view
+        record_view(type(self), self.slug)
 
 
 class ServiceOrder(models.Model):
@@ -243,6 +383,10 @@ class Achievement(models.Model):
     date = models.DateField('Дата')
     organization = models.CharField('Организация', max_length=255)
     certificate_image = models.ImageField('Изображение сертификата', upload_to='achievements/', blank=True, null=True)
+    certificate_image_variants = models.JSONField('Копии изображения', default=dict, blank=True, editable=False)
+    certificate_image_width = models.PositiveIntegerField('Ширина изображения', blank=True, null=True, editable=False)
+    certificate_image_height = models.PositiveIntegerField('Высота изображения', blank=True, null=True, editable=False)
+    certificate_image_lqip = models.TextField('Превью изображения (LQIP)', blank=True, editable=False)
     order = models.IntegerField('Порядок', default=0)
     created_at = models.DateTimeField('Создано', auto_now_add=True)
     updated_at = models.DateTimeField('Обновлено', auto_now=True)
@@ -251,6 +395,9 @@ class Achievement(models.Model):
         verbose_name = 'Достижение'
         verbose_name_plural = 'Достижения'
         ordering = ['-date', 'order']
+        indexes = [
+            models.Index(fields=['-date', 'order'], name='achievement_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.date.year})"
@@ -261,6 +408,10 @@ class Testimonial(models.Model):
     patient_name = models.CharField('Имя пациента', max_length=255)
     patient_age = models.IntegerField('Возраст', blank=True, null=True)
     patient_photo = models.ImageField('Фото пациента', upload_to='testimonials/', blank=True, null=True)
+    patient_photo_variants = models.JSONField('Копии изображения', default=dict, blank=True, editable=False)
+    patient_photo_width = models.PositiveIntegerField('Ширина изображения', blank=True, null=True, editable=False)
+    patient_photo_height = models.PositiveIntegerField('Высота изображения', blank=True, null=True, editable=False)
+    patient_photo_lqip = models.TextField('Превью изображения (LQIP)', blank=True, editable=False)
     text = models.TextField('Текст отзыва')
     rating = models.IntegerField('Рейтинг', validators=[MinValueValidator(1), MaxValueValidator(5)], default=5)
     is_approved = models.BooleanField('Одобрен', default=False)
@@ -270,6 +421,9 @@ class Testimonial(models.Model):
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], condition=models.Q(is_approved=True), name='testimonial_approved_idx'),
+        ]
     
     def __str__(self):
         return f"{self.patient_name} - {self.rating}/5"
@@ -299,9 +453,24 @@ class Book(models.Model):
     slug = models.SlugField('URL slug', max_length=500, unique=True, blank=True)
     author = models.CharField('Автор(ы)', max_length=500, default='Максудов А.А.')
     description = RichTextUploadingField('Описание', config_name='default')
+    description_html = models.TextField('Описание для показа', blank=True, editable=False)
+    summary = models.TextField('Анонс', blank=True, editable=False)
+    word_count = models.PositiveIntegerField('Количество слов', default=0, editable=False)
+    reading_time = models.PositiveIntegerField('Время чтения, мин', default=0, editable=False)
     short_description = models.TextField('Краткое описание', max_length=500, blank=True)
     cover_image = models.ImageField('Обложка', upload_to='books/covers/')
+    cover_image_variants = models.JSONField('Копии изображения', default=dict, blank=True, editable=False)
+    cover_image_width = models.PositiveIntegerField('Ширина изображения', blank=True, null=True, editable=False)
+    cover_image_height = models.PositiveIntegerField('Высота изображения', blank=True, null=True, editable=False)
+    cover_image_lqip = models.TextField('Превью изображения (LQIP)', blank=True, editable=False)
     pdf_file = models.FileField('PDF файл', upload_to='books/pdfs/', blank=True, null=True, help_text='PDF файл книги для просмотра')
+    pdf_preview = models.ImageField('Превью PDF', upload_to='books/previews/', blank=True, editable=False)
+    pdf_preview_variants = models.JSONField('Копии изображения', default=dict, blank=True, editable=False)
+    pdf_preview_width = models.PositiveIntegerField('Ширина изображения', blank=True, null=True, editable=False)
+    pdf_preview_height = models.PositiveIntegerField('Высота изображения', blank=True, null=True, editable=False)
+    pdf_preview_lqip = models.TextField('Превью изображения (LQIP)', blank=True, editable=False)
+    pdf_web_file = models.FileField('PDF для просмотра в браузере', upload_to='books/pdfs/', blank=True, editable=False)
+    pdf_pending = models.BooleanField('PDF ждёт обработки', default=False, editable=False)
     
     publisher = models.CharField('Издательство', max_length=255, blank=True)
     publication_year = models.IntegerField('Год издания')
@@ -328,6 +497,10 @@ class Book(models.Model):
         verbose_name = 'Книга'
         verbose_name_plural = 'Книги'
         ordering = ['-is_featured', 'order', '-publication_year']
+        indexes = [
+            models.Index(fields=['-is_featured', 'order', '-publication_year'], condition=models.Q(is_available=True), name='book_available_idx'),
+            models.Index(fields=['publication_year'], name='book_year_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.publication_year})"
@@ -341,8 +514,8 @@ class Book(models.Model):
         return reverse('book_detail', kwargs={'slug': self.slug})
     
     def increment_views(self):
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        from .counters import record_view
+        record_view(type(self), self.slug)
 
 
 class BookOrder(models.Model):
@@ -380,3 +553,95 @@ class BookOrder(models.Model):
             return int(self.book.price) * self.quantity
         return None
 
+
+class Outbox(models.Model):
+    """Исходящие уведомления (отправляются командой process_outbox)"""
+    CHANNEL_CHOICES = [
+        ('email', 'Email'),
+        ('telegram', 'Telegram'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает отправки'),
+        ('sending', 'Отправляется'),
+        ('sent', 'Отправлено'),
+        ('failed', 'Ошибка'),
+    ]
+    
+    channel = models.CharField('Канал', max_length=20, choices=CHANNEL_CHOICES, default='email')
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=255, blank=True)
+    recipients = models.TextField('Получатели', help_text='По одному адресу (или ID чата Telegram) в строке')
+    status = models.CharField('Статус', max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField('Попытки', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now,
+        help_text='Для статуса «Отправляется» — срок, после которого запись снова можно взять в отправку'
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', blank=True, null=True)
+    
+    class Meta:
+        verbose_name = 'Исходящее уведомление'
+        verbose_name_plural = 'Исходящие уведомления'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['channel', 'status', 'next_attempt_at'], name='outbox_channel_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} ({self.get_status_display()})"
+    
+    def get_recipients(self):
+        return [email for email in self.recipients.split() if email]
+
+
+class EditorUpload(models.Model):
+    """Файл, загруженный через CKEditor: индекс для окна выбора изображений вместо обхода хранилища"""
+    path = models.CharField('Путь в хранилище', max_length=500, unique=True)
+    filename = models.CharField('Имя файла', max_length=255)
+    thumbnail = models.CharField('Миниатюра', max_length=500, blank=True)
+    size = models.PositiveBigIntegerField('Размер (байт)', default=0)
+    width = models.PositiveIntegerField('Ширина', blank=True, null=True)
+    height = models.PositiveIntegerField('Высота', blank=True, null=True)
+    is_image = models.BooleanField('Изображение', default=False)
+    variants = models.JSONField(
+        'Копии изображения', default=dict, blank=True, editable=False,
+        help_text='Создаются командой generate_image_variants; пустой словарь — ещё не созданы'
+    )
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True,
+        related_name='editor_uploads', verbose_name='Загрузил'
+    )
+    created_at = models.DateTimeField('Загружено', default=timezone.now)
+    
+    class Meta:
+        verbose_name = 'Файл редактора'
+        verbose_name_plural = 'Файлы редактора'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='editorupload_created_idx'),
+            models.Index(fields=['uploaded_by', '-created_at'], name='editorupload_user_idx'),
+        ]
+    
+    def __str__(self):
+        return self.path
+
+
+class PendingView(models.Model):
+    """Просмотры статьи или книги, ещё не перенесённые в views_count (см. core/counters.py)"""
+    model_name = models.CharField('Модель', max_length=50)
+    slug = models.SlugField('URL slug', max_length=500)
+    count = models.PositiveIntegerField('Просмотры', default=0)
+    
+    class Meta:
+        verbose_name = 'Неперенесённые просмотры'
+        verbose_name_plural = 'Неперенесённые просмотры'
+        constraints = [
+            models.UniqueConstraint(fields=['model_name', 'slug'], name='pendingview_unique'),
+        ]
+    
+    def __str__(self):
+        return f'{self.model_name}:{self.slug} +{self.count}'
@@ -0,0 +1,308 @@
+"""
+Уведомления о заказах и сообщениях через очередь Outbox
+
+Представления только записывают уведомления в таблицу Outbox в той же
+транзакции, что и заказ; отправку выполняет команда process_outbox.
+Уведомления в Telegram, накопившиеся за TELEGRAM_COALESCE_INTERVAL,
+объединяются в одно сообщение.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import telegram
+from .models import Outbox
+
+logger = logging.getLogger(__name__)
+
+# Задержка перед повторной попыткой: 1, 2, 4, 8... минут, но не больше часа
+RETRY_BASE_DELAY = timedelta(minutes=1)
+RETRY_MAX_DELAY = timedelta(hours=1)
+MAX_ATTEMPTS = 8
+
+# Срок, на который запись берётся в отправку; если процесс упадёт, после
+# него запись отправит следующий проход
+CLAIM_LEASE = timedelta(minutes=10)
+
+TELEGRAM_NEXT_SEND_KEY = 'core:telegram:next-send-at'
+TELEGRAM_SEPARATOR = '\n\n— — —\n\n'
+
+
+def queue_mail(subject, body, recipient_list, from_email=None):
+    """Ставит письмо в очередь на отправку"""
+    return Outbox.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients='\n'.join(recipient_list),
+    )
+
+
+def queue_telegram(subject, text):
+    """Ставит сообщение для чата администратора в очередь Telegram"""
+    if not telegram.is_configured():
+        return None
+    return Outbox.objects.create(
+        channel='telegram',
+        subject=subject,
+        body=text,
+        recipients=settings.TELEGRAM_CHAT_ID,
+    )
+
+
+def notify_service_order(order):
+    """Уведомления о новом заказе услуги: администратору и пациенту"""
+    age_info = f"Возраст: {order.age} лет\n" if order.age else ""
+    queue_mail(
+        subject=f'Новый заказ услуги: {order.service.title}',
+        body=f'Пациент: {order.full_name}\nEmail: {order.email}\nТелефон: {order.phone}\n{age_info}\nОписание проблемы: {order.message}',
+        recipient_list=[settings.ADMIN_EMAIL],
+    )
+    queue_mail(
+        subject='Подтверждение записи на прием',
+        body=f'Здравствуйте, {order.full_name}!\n\nВаша заявка на услугу "{order.service.title}" принята. Мы свяжемся с вами в ближайшее время для подтверждения записи.\n\nС уважением,\nД-р Максудов Абдурахман',
+        recipient_list=[order.email],
+    )
+    queue_telegram(
+        f'Заказ услуги: {order.service.title}',
+        f'🩺 Новый заказ услуги: {order.service.title}\n'
+        f'Пациент: {order.full_name}\nТелефон: {order.phone}\nEmail: {order.email}\n{age_info}'
+        f'Описание проблемы: {order.message}',
+    )
+
+
+def notify_service_detail_order(order):
+    """Уведомление о заказе со страницы услуги"""
+    service = order.service
+    queue_mail(
+        subject=f'Новый заказ услуги: {service.title}',
+        body=f'Получен новый заказ услуги "{service.title}"\n\n'
+             f'Пациент: {order.full_name}\n'
+             f'Email: {order.email}\n'
+             f'Телефон: {order.phone}\n'
+             f'Возраст: {order.age}\n'
+             f'Желаемая дата: {order.preferred_date}\n'
+             f'Сообщение: {order.message}',
+        recipient_list=[settings.EMAIL_HOST_USER],
+        from_email=settings.EMAIL_HOST_USER,
+    )
+    queue_telegram(
+        f'Заказ услуги: {service.title}',
+        f'🩺 Новый заказ услуги: {service.title}\n'
+        f'Пациент: {order.full_name}\nТелефон: {order.phone}\nEmail: {order.email}\n'
+        f'Возраст: {order.age}\nЖелаемая дата: {order.preferred_date}\nСообщение: {order.message}',
+    )
+
+
+def notify_book_order(order):
+    """Уведомления о новом заказе книги: администратору и клиенту"""
+    total_price = order.get_total_price()
+    price_info = f"Общая стоимость: {total_price} ₽" if total_price else "Цена не указана"
+    queue_mail(
+        subject=f'Новый заказ книги: {order.book.title}',
+        body=f'Клиент: {order.full_name}\nEmail: {order.email}\nТелефон: {order.phone}\nАдрес: {order.address}\nКоличество: {order.quantity}\n{price_info}\n\nДополнительно: {order.message}',
+        recipient_list=[settings.ADMIN_EMAIL],
+    )
+    queue_mail(
+        subject='Подтверждение заказа книги',
+        body=f'Здравствуйте, {order.full_name}!\n\nВаш заказ книги "{order.book.title}" (количество: {order.quantity}) принят. Мы свяжемся с вами в ближайшее время для уточнения деталей доставки.\n\n{price_info}\n\nС уважением,\nД-р Максудов Абдурахман',
+        recipient_list=[order.email],
+    )
+    queue_telegram(
+        f'Заказ книги: {order.book.title}',
+        f'📚 Новый заказ книги: {order.book.title}\n'
+        f'Клиент: {order.full_name}\nТелефон: {order.phone}\nEmail: {order.email}\n'
+        f'Адрес: {order.address}\nКоличество: {order.quantity}\n{price_info}\n'
+        f'Дополнительно: {order.message}',
+    )
+
+
+def notify_contact_message(contact_message):
+    """Уведомление администратору о сообщении из контактной формы"""
+    queue_mail(
+        subject=f'Новое сообщение: {contact_message.subject}',
+        body=f'От: {contact_message.name} ({contact_message.email})\n\n{contact_message.message}',
+        recipient_list=[settings.ADMIN_EMAIL],
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой"""
+    return min(RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0), RETRY_MAX_DELAY)
+
+
+def claim_messages(channel, limit=None):
+    """
+    Берёт готовые к отправке записи канала в работу
+
+    В короткой транзакции записи переводятся в статус «Отправляется» с
+    арендой на CLAIM_LEASE (срок хранится в next_attempt_at), после чего
+    транзакция фиксируется: сама отправка идёт вне транзакции и не держит
+    блокировку базы. Записи, аренда которых истекла (процесс упал во время
+    отправки), берутся снова. Возвращает список взятых записей.
+    """
+    now = timezone.now()
+    ready = Q(status='pending') | Q(status='sending')
+    with transaction.atomic():
+        candidates = (
+            Outbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(ready, channel=channel, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'pk')
+            .values_list('pk', flat=True)
+        )
+        if limit:
+            candidates = candidates[:limit]
+        claimed = [
+            pk for pk in list(candidates)
+            # Условный UPDATE: запись, которую успел взять другой процесс, пропускается
+            if Outbox.objects.filter(ready, pk=pk, next_attempt_at__lte=now).update(
+                status='sending', next_attempt_at=now + CLAIM_LEASE,
+            )
+        ]
+    return list(Outbox.objects.filter(pk__in=claimed).order_by('created_at', 'pk'))
+
+
+def release_messages(messages):
+    """Возвращает взятые, но не отправленные записи в очередь без учёта попытки"""
+    Outbox.objects.filter(pk__in=[message.pk for message in messages], status='sending').update(
+        status='pending', next_attempt_at=timezone.now(),
+    )
+
+
+def process_outbox(batch_size=50, max_attempts=MAX_ATTEMPTS):
+    """
+    Отправляет накопившиеся email-уведомления
+
+    Все письма пачки отправляются через одно SMTP-соединение; результат
+    каждого письма записывается сразу после его отправки, поэтому сбой
+    процесса приводит к повторной отправке не больше одного письма.
+    Возвращает кортеж (отправлено, с ошибкой)
+    """
+    sent = failed = 0
+    messages = claim_messages('email', batch_size)
+    if not messages:
+        return sent, failed
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        logger.warning('Не удалось подключиться к почтовому серверу: %s', e)
+        for message in messages:
+            _record_failure(message, e, max_attempts)
+        return sent, len(messages)
+
+    try:
+        for message in messages:
+            try:
+                EmailMessage(
+                    subject=message.subject,
+                    body=message.body,
+                    from_email=message.from_email or None,
+                    to=message.get_recipients(),
+                    connection=connection,
+                ).send()
+            except Exception as e:
+                logger.warning('Не удалось отправить уведомление %s: %s', message.pk, e)
+                _record_failure(message, e, max_attempts)
+                failed += 1
+            else:
+                _record_success([message])
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _record_success(messages):
+    Outbox.objects.filter(pk__in=[message.pk for message in messages]).update(
+        status='sent', attempts=F('attempts') + 1, sent_at=timezone.now(), last_error='',
+    )
+
+
+def _record_failure(message, error, max_attempts):
+    message.attempts += 1
+    message.last_error = str(error)
+    if message.attempts >= max_attempts:
+        message.status = 'failed'
+    else:
+        message.status = 'pending'
+        message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+    message.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error'])
+
+
+def process_telegram_outbox(max_attempts=MAX_ATTEMPTS):
+    """
+    Отправляет накопившиеся уведомления Telegram
+
+    Все готовые к отправке записи для чата объединяются в одно сообщение;
+    сообщения уходят не чаще раза в TELEGRAM_COALESCE_INTERVAL секунд,
+    а ответ 429 откладывает следующую отправку на retry_after. Как и
+    письма, записи берутся в работу короткой транзакцией, а запросы к
+    Telegram выполняются вне её.
+    Возвращает кортеж (отправлено, с ошибкой)
+    """
+    if not telegram.is_configured():
+        return 0, 0
+    next_send_at = cache.get(TELEGRAM_NEXT_SEND_KEY)
+    if next_send_at and next_send_at > time.time():
+        return 0, 0
+
+    sent = failed = 0
+    by_chat = {}
+    for message in claim_messages('telegram'):
+        by_chat.setdefault(message.recipients.strip(), []).append(message)
+
+    client = telegram.get_client()
+    for chat_id, messages in by_chat.items():
+        batch = _fit_telegram_batch(messages)
+        # Не поместившиеся в сообщение записи уйдут следующим проходом
+        release_messages(messages[len(batch):])
+        text = TELEGRAM_SEPARATOR.join(message.body for message in batch)
+        if len(batch) > 1:
+            text = f'Новых уведомлений: {len(batch)}{TELEGRAM_SEPARATOR}{text}'
+        try:
+            client.send_message(chat_id, text)
+        except telegram.TelegramError as e:
+            if e.retry_after:
+                # Лимит Telegram: откладываем отправку, попытку не засчитываем
+                cache.set(TELEGRAM_NEXT_SEND_KEY, time.time() + e.retry_after, e.retry_after)
+                release_messages([message for chat in by_chat.values() for message in chat])
+                return sent, failed
+            logger.warning('Ошибка Telegram для чата %s: %s', chat_id, e)
+            for message in batch:
+                _record_failure(message, e, max_attempts)
+            failed += len(batch)
+        except Exception as e:
+            logger.warning('Не удалось отправить сообщение в Telegram: %s', e)
+            for message in batch:
+                _record_failure(message, e, max_attempts)
+            failed += len(batch)
+        else:
+            _record_success(batch)
+            sent += len(batch)
+
+    if sent:
+        interval = settings.TELEGRAM_COALESCE_INTERVAL
+        cache.set(TELEGRAM_NEXT_SEND_KEY, time.time() + interval, interval)
+    return sent, failed
+
+
+def _fit_telegram_batch(messages):
+    """Берёт столько уведомлений, сколько помещается в одно сообщение Telegram"""
+    batch = [messages[0]]
+    length = len(messages[0].body)
+    for message in messages[1:]:
+        length += len(TELEGRAM_SEPARATOR) + len(message.body)
+        if length > telegram.MAX_MESSAGE_LENGTH - 100:
+            break
+        batch.append(message)
+    return batch
@@ -0,0 +1,240 @@
+"""
+Постраничный вывод списков публикаций, статей блога и книг
+
+Режим курсора (?cursor=...) выбирает страницу условием по ключу
+сортировки модели (Meta.ordering + первичный ключ) без COUNT(*) и OFFSET,
+поэтому глубокие страницы стоят столько же, сколько первая. Курсор —
+значения ключа крайней записи страницы в base64: ссылки стабильны и
+пригодны для индексации.
+
+Ссылки вида ?page=N обслуживает CachedCountPaginator: результат COUNT(*)
+хранится в кеше до следующего изменения контента (поколение кеша страниц).
+"""
+import base64
+import datetime
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from modeltranslation.translator import NotRegistered, translator
+from modeltranslation.utils import build_localized_fieldname, get_language
+
+from .caching import get_generation
+
+COUNT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def ordering_keys(model, using='default'):
+    """
+    Ключ сортировки модели: [(поле, по убыванию, NULL в конце), ...]
+
+    Переводимые поля заменяются столбцом активного языка (так же их
+    сортирует modeltranslation); в конец добавляется первичный ключ, чтобы
+    ключ однозначно задавал позицию. NULL располагаются так же, как при
+    обычной сортировке в данной СУБД.
+    """
+    try:
+        translated = translator.get_options_for_model(model).fields
+    except NotRegistered:
+        translated = {}
+
+    nulls_largest = connections[using].features.nulls_order_largest
+    keys = []
+    for item in model._meta.ordering:
+        name = item.lstrip('-')
+        descending = item.startswith('-')
+        if name == 'pk':
+            name = model._meta.pk.name
+        if name in translated:
+            name = build_localized_fieldname(name, get_language())
+        keys.append((model._meta.get_field(name), descending, descending != nulls_largest))
+    if not any(field.primary_key for field, descending, nulls_last in keys):
+        keys.append((model._meta.pk, False, True))
+    return keys
+
+
+def supports_keyset(queryset):
+    """Курсор возможен только для сортировки по умолчанию (Meta.ordering)"""
+    if not queryset.model._meta.ordering or not queryset.query.default_ordering:
+        return False
+    # Менеджер modeltranslation явно задаёт order_by из Meta.ordering
+    default = queryset.model._default_manager.all().query.order_by
+    return not queryset.query.order_by or tuple(queryset.query.order_by) == tuple(default)
+
+
+def _order_by(keys, reverse):
+    """Сортировка по ключу в прямом или обратном порядке"""
+    ordering = []
+    for field, descending, nulls_last in keys:
+        nulls = {'nulls_last' if nulls_last != reverse else 'nulls_first': True} if field.null else {}
+        expression = F(field.attname)
+        ordering.append(expression.desc(**nulls) if descending != reverse else expression.asc(**nulls))
+    return ordering
+
+
+def _seek(keys, values, reverse):
+    """Условие «запись идёт после values» в прямом (или обратном) порядке"""
+    (field, descending, nulls_last), value = keys[0], values[0]
+    name = field.attname
+    nulls_after = nulls_last != reverse
+    rest = _seek(keys[1:], values[1:], reverse) if len(keys) > 1 else Q(pk__in=[])
+
+    if value is None:
+        condition = Q(**{f'{name}__isnull': True}) & rest
+        if not nulls_after:
+            # NULL идут первыми: все остальные значения — после них
+            condition |= Q(**{f'{name}__isnull': False})
+        return condition
+
+    lookup = 'lt' if descending != reverse else 'gt'
+    condition = Q(**{f'{name}__{lookup}': value}) | (Q(**{name: value}) & rest)
+    if field.null and nulls_after:
+        condition |= Q(**{f'{name}__isnull': True})
+    return condition
+
+
+def _dump(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+class KeysetPage:
+    """Страница в режиме курсора (интерфейс, похожий на django.core.paginator.Page)"""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Постраничный вывод по курсору, построенному из Meta.ordering модели"""
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.keys = ordering_keys(queryset.model, queryset.db)
+
+    def cursor_for(self, obj, reverse=False):
+        """Курсор страницы после obj (reverse=True — страницы перед obj)"""
+        values = [_dump(getattr(obj, field.attname)) for field, descending, nulls_last in self.keys]
+        payload = json.dumps(['p' if reverse else 'n', values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode(self, cursor):
+        """Возвращает (reverse, values); при повреждённом курсоре — InvalidCursor"""
+        try:
+            payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, raw = json.loads(payload)
+            if direction not in ('n', 'p') or len(raw) != len(self.keys):
+                raise ValueError('cursor does not match ordering')
+            values = [
+                None if value is None else field.to_python(value)
+                for (field, descending, nulls_last), value in zip(self.keys, raw)
+            ]
+        except (ValueError, TypeError, ValidationError) as e:
+            raise InvalidCursor(str(e)) from e
+        return direction == 'p', values
+
+    def get_page(self, cursor=None):
+        """Страница по курсору; без курсора или с неверным курсором — первая"""
+        reverse, values = False, None
+        if cursor:
+            try:
+                reverse, values = self.decode(cursor)
+            except InvalidCursor:
+                pass
+
+        queryset = self.queryset.order_by(*_order_by(self.keys, reverse))
+        if values is not None:
+            queryset = queryset.filter(_seek(self.keys, values, reverse))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if reverse:
+            if not has_more:
+                # Дошли до начала списка: показываем обычную первую страницу
+                return self.get_page()
+            rows.reverse()
+            has_next, has_previous = True, True
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        return KeysetPage(
+            rows, self,
+            next_cursor=self.cursor_for(rows[-1]) if has_next and rows else None,
+            previous_cursor=self.cursor_for(rows[0], reverse=True) if has_previous and rows else None,
+        )
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который кеширует COUNT(*) до изменения контента"""
+
+    @cached_property
+    def count(self):
+        try:
+            sql, params = self.object_list.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        digest = hashlib.md5(f'{sql}|{params!r}'.encode('utf-8')).hexdigest()
+        key = f'core:count:{get_generation()}:{digest}'
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+
+def paginate(request, queryset, per_page):
+    """
+    Страница списка для представления
+
+    ?cursor= — режим курсора; иначе номер страницы ?page= с кешированным
+    количеством. На обычной странице next_cursor указывает на следующую
+    страницу в режиме курсора, чтобы обход «вперёд» не использовал OFFSET.
+    """
+    keyset = KeysetPaginator(queryset, per_page) if supports_keyset(queryset) else None
+    cursor = request.GET.get('cursor')
+    if keyset is not None and cursor:
+        return keyset.get_page(cursor)
+
+    page = CachedCountPaginator(queryset, per_page).get_page(request.GET.get('page'))
+    page.is_cursor = False
+    page.previous_cursor = None
+    page.next_cursor = keyset.cursor_for(page[-1]) if keyset is not None and page.has_next() else None
+    return page
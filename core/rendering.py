@@ -0,0 +1,458 @@
+"""
+Обработка HTML из CKEditor при сохранении
+
+HTML очищается по списку разрешённых тегов и атрибутов (скрипты,
+обработчики событий и ссылки javascript: удаляются), а теги <img> с
+изображениями из media заменяются на <picture> с уменьшенными копиями
+(AVIF/WebP, srcset/sizes), размерами и атрибутами loading="lazy" и
+decoding="async". Заодно вычисляются анонс без разметки, количество слов
+и время чтения. Результат хранится в отдельных полях на каждом языке
+(BlogPost.content_html, Book.description_html, Publication.abstract_html,
+summary, word_count, reading_time), поэтому при показе страницы HTML не
+разбирается.
+
+Размеры и копии изображений из редактора берутся из индекса EditorUpload
+одним запросом, без обращения к хранилищу. Копии кодирует команда
+generate_image_variants (editor_image_variants): до этого на странице
+выводится исходный <img> с размерами, а после — <picture>; HTML записей,
+в которых встречается изображение, команда пересчитывает сама
+(rerender_editor_images).
+"""
+import logging
+import math
+import re
+from html import escape, unescape
+from html.parser import HTMLParser
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils.html import linebreaks
+
+from .images import (
+    StoredImage, existing_variants, generate_variants, image_metadata, is_pending, open_image, save_fields
+)
+from .models import BlogPost, Book, EditorUpload
+
+logger = logging.getLogger(__name__)
+
+# Поля с HTML из редактора (или текстом) и поля для обработанного HTML
+RICH_CONTENT_FIELDS = {
+    'blogpost': ('content', 'content_html'),
+    'book': ('description', 'description_html'),
+    'publication': ('abstract', 'abstract_html'),
+}
+
+# Модели, в которых исходное поле — обычный текст (абзацы по переводам строк)
+PLAIN_TEXT_MODELS = {'publication'}
+
+# Краткое описание, написанное вручную (если заполнено, анонс берётся из
+# него, а не из начала текста), и длина анонса в словах
+SUMMARY_FIELDS = {
+    'blogpost': ('excerpt', 20),
+    'book': ('short_description', 20),
+    'publication': (None, 40),
+}
+
+# Поля, которые вычисляются вместе с HTML
+TEXT_STAT_FIELDS = ('summary', 'word_count', 'reading_time')
+
+# Ширина колонки с текстом статьи или описанием книги
+DEFAULT_SIZES = '(max-width: 992px) 100vw, 66vw'
+
+_img_re = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_style_width_re = re.compile(r'(?:^|;)\s*width\s*:\s*(\d+)px', re.IGNORECASE)
+
+
+class _TagParser(HTMLParser):
+    """Разбирает атрибуты одного тега"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.attrs = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.attrs is None:
+            self.attrs = dict(attrs)
+
+    handle_startendtag = handle_starttag
+
+
+def _parse_attrs(tag):
+    parser = _TagParser()
+    parser.feed(tag)
+    parser.close()
+    return parser.attrs
+
+
+def _build_tag(name, attrs):
+    parts = [name]
+    for key, value in attrs.items():
+        parts.append(key if value is None else f'{key}="{escape(str(value), quote=True)}"')
+    return f'<{" ".join(parts)}>'
+
+
+# Теги и атрибуты, которые остаются в HTML из редактора
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'caption', 'cite', 'code', 'col', 'colgroup', 'dd', 'del', 'div',
+    'dl', 'dt', 'em', 'figcaption', 'figure', 'font', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'iframe',
+    'img', 'ins', 'kbd', 'li', 'mark', 'ol', 'p', 'pre', 's', 'small', 'span', 'strike', 'strong', 'sub',
+    'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    '*': {'class', 'style', 'title', 'id', 'dir', 'lang'},
+    'a': {'href', 'target', 'rel', 'name'},
+    'blockquote': {'cite'},
+    'col': {'span', 'width'},
+    'colgroup': {'span', 'width'},
+    'font': {'color', 'face', 'size'},
+    'iframe': {'src', 'width', 'height', 'allow', 'allowfullscreen', 'frameborder', 'loading'},
+    'img': {'src', 'alt', 'width', 'height', 'srcset', 'sizes'},
+    'li': {'value'},
+    'ol': {'start', 'type', 'reversed'},
+    'p': {'align'},
+    'table': {'border', 'cellpadding', 'cellspacing', 'align', 'summary', 'width'},
+    'td': {'colspan', 'rowspan', 'align', 'valign', 'width'},
+    'th': {'colspan', 'rowspan', 'align', 'valign', 'width', 'scope'},
+}
+# Теги, которые удаляются вместе с содержимым (остальные неразрешённые
+# теги удаляются, а их текст остаётся)
+DROPPED_TAGS = {'script', 'style', 'noscript', 'template', 'object', 'applet', 'svg', 'math', 'head', 'title',
+                'textarea', 'select', 'button', 'frameset'}
+VOID_TAGS = {'br', 'col', 'hr', 'img'}
+# Теги, после которых в тексте без разметки ставится пробел
+BLOCK_TAGS = {
+    'blockquote', 'br', 'caption', 'dd', 'div', 'dt', 'figcaption', 'figure', 'h1', 'h2', 'h3', 'h4', 'h5',
+    'h6', 'hr', 'li', 'p', 'pre', 'td', 'th', 'tr',
+}
+URL_SCHEMES = {'http', 'https', 'mailto', 'tel'}
+FRAME_SCHEMES = {'https'}
+
+_control_re = re.compile(r'[\x00-\x20\x7f]+')
+_unsafe_style_re = re.compile(r'expression|javascript:|url\s*\(|behavior|@import', re.IGNORECASE)
+_css_comment_re = re.compile(r'/\*.*?(?:\*/|$)', re.DOTALL)
+_css_escape_re = re.compile(r'\\(?:([0-9a-fA-F]{1,6})\s?|(.))', re.DOTALL)
+
+
+def _css_unescape(match):
+    if match.group(1) is None:
+        return match.group(2)
+    code = int(match.group(1), 16)
+    return chr(code) if 0 < code <= 0x10FFFF else '\ufffd'
+
+
+def _safe_style(value):
+    """Стиль без url(), expression() и т.п., в том числе записанных через экранирование CSS или с комментариями"""
+    return not _unsafe_style_re.search(_css_escape_re.sub(_css_unescape, _css_comment_re.sub('', value)))
+
+
+def _safe_url(value, schemes):
+    try:
+        scheme = urlsplit(_control_re.sub('', value)).scheme.lower()
+    except ValueError:
+        # Некорректный URL (например, «http://[oops») браузер может разобрать по-своему
+        return False
+    return not scheme or scheme in schemes
+
+
+class _Sanitizer(HTMLParser):
+    """Собирает очищенный HTML и текст без разметки за один проход"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.text = []
+        self.open_tags = []
+        self.dropped = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.dropped += 1
+            return
+        if self.dropped:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag not in ALLOWED_TAGS:
+            return
+        self.html.append(_build_tag(tag, self._clean_attrs(tag, attrs)))
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in DROPPED_TAGS:
+            self.dropped -= 1
+        elif not self.dropped and tag in ALLOWED_TAGS and tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropped = max(self.dropped - 1, 0)
+            return
+        if self.dropped:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag not in self.open_tags:
+            return
+        # Закрываем и незакрытые вложенные теги
+        while self.open_tags:
+            name = self.open_tags.pop()
+            self.html.append(f'</{name}>')
+            if name == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropped:
+            return
+        self.html.append(escape(data, quote=False))
+        self.text.append(data)
+
+    def close(self):
+        super().close()
+        self.html += [f'</{name}>' for name in reversed(self.open_tags)]
+        self.open_tags = []
+
+    def _clean_attrs(self, tag, attrs):
+        allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(tag, set())
+        cleaned = {}
+        for name, value in attrs:
+            if name not in allowed:
+                continue
+            if value is not None and name in ('href', 'src', 'cite'):
+                if not _safe_url(value, FRAME_SCHEMES if tag == 'iframe' else URL_SCHEMES):
+                    continue
+            elif value is not None and name == 'srcset':
+                if not all(_safe_url(candidate.strip().split(' ')[0], URL_SCHEMES) for candidate in value.split(',')):
+                    continue
+            elif value is not None and name == 'style' and not _safe_style(value):
+                continue
+            cleaned[name] = value
+        if tag == 'iframe' and not cleaned.get('src'):
+            cleaned['src'] = 'about:blank'
+        if cleaned.get('target') == '_blank':
+            rel = set((cleaned.get('rel') or '').split())
+            cleaned['rel'] = ' '.join(sorted(rel | {'noopener', 'noreferrer'}))
+        return cleaned
+
+
+def sanitize_html(html):
+    """
+    HTML без запрещённых тегов и атрибутов и текст без разметки: (html, text)
+
+    В тексте пробельные символы схлопываются в один пробел
+    """
+    if not html:
+        return html, ''
+    parser = _Sanitizer()
+    parser.feed(html)
+    parser.close()
+    return ''.join(parser.html), ' '.join(''.join(parser.text).split())
+
+
+def media_name(src):
+    """Имя файла в хранилище по его URL или None, если это не файл из media"""
+    if not src:
+        return None
+    for prefix in (settings.MEDIA_URL, urlsplit(settings.MEDIA_URL).path):
+        if prefix and prefix != '/' and src.startswith(prefix):
+            return unquote(src[len(prefix):].split('?', 1)[0]) or None
+    return None
+
+
+_url_attr_re = re.compile(r"""\b(src|href|srcset|data-src|poster)\s*=\s*(["'])(.*?)\2""", re.IGNORECASE | re.DOTALL)
+
+
+def media_names(html):
+    """Имена файлов из media, на которые ссылается HTML (src, href, srcset)"""
+    names = set()
+    for match in _url_attr_re.finditer(html or ''):
+        value = unescape(match.group(3)).strip()
+        if match.group(1).lower() == 'srcset':
+            candidates = [candidate.strip().split(' ')[0] for candidate in value.split(',')]
+        else:
+            candidates = [value]
+        names.update(filter(None, map(media_name, candidates)))
+    return names
+
+
+def editor_images(names):
+    """
+    {имя файла: {'width', 'height', 'sources'}} для изображений из редактора
+
+    Берётся из индекса EditorUpload; файлов без записи или с неизвестными
+    размерами в словаре нет. Пока копии не созданы, sources пуст.
+    """
+    images = {}
+    records = EditorUpload.objects.filter(path__in=names, is_image=True, width__isnull=False, height__isnull=False)
+    for path, width, height, variants in records.values_list('path', 'width', 'height', 'variants'):
+        images[path] = {
+            'width': width,
+            'height': height,
+            'sources': {} if is_pending(variants) else variants.get('sources', {}),
+        }
+    return images
+
+
+def editor_image_variants(path):
+    """
+    Создаёт копии изображения из редактора (или находит созданные ранее)
+
+    Возвращает значения полей EditorUpload (variants, width, height); база
+    данных не используется, поэтому функцию можно вызывать в потоках
+    """
+    image_file = StoredImage(default_storage, path)
+    try:
+        image = open_image(image_file)
+        metadata = image_metadata(image)
+        sources = existing_variants(image_file, image.size[0]) or generate_variants(image_file, image)['sources']
+    except Exception as e:
+        logger.warning('Не удалось создать копии изображения %s из редактора: %s', path, e)
+        # Пустой список копий: изображение не будет обрабатываться повторно
+        return {'variants': {'sources': {}}}
+    return {'variants': {'sources': sources}, 'width': metadata['width'], 'height': metadata['height']}
+
+
+def rerender_editor_images(paths):
+    """Пересчитывает обработанный HTML записей, в тексте которых есть изображения paths"""
+    updated = 0
+    for model in (BlogPost, Book):
+        source_field = RICH_CONTENT_FIELDS[model._meta.model_name][0]
+        query = Q()
+        for path in paths:
+            for name in localized_names(source_field):
+                query |= Q(**{f'{name}__contains': path})
+        if not query:
+            continue
+        fields = rendered_fields(model._meta.model_name)
+        for instance in model.objects.filter(query):
+            render_instance(instance)
+            save_fields(instance, {name: getattr(instance, name) for name in fields})
+            updated += 1
+    return updated
+
+
+def _sizes(attrs):
+    """Ширина картинки, заданная в редакторе, точнее общей ширины колонки"""
+    if attrs.get('sizes'):
+        return attrs['sizes']
+    if (attrs.get('width') or '').isdigit():
+        return f'{attrs["width"]}px'
+    match = _style_width_re.search(attrs.get('style') or '')
+    if match:
+        return f'{match.group(1)}px'
+    return DEFAULT_SIZES
+
+
+def _srcset(files):
+    return ', '.join(f'{default_storage.url(name)} {width}w' for width, name in files)
+
+
+def _rewrite_image(match, images):
+    tag = match.group(0)
+    attrs = _parse_attrs(tag)
+    if attrs is None:
+        return tag
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+
+    name = media_name(attrs.get('src'))
+    data = images.get(name) if name else None
+    if not data:
+        return _build_tag('img', attrs)
+
+    sizes = _sizes(attrs)
+    if 'width' not in attrs and 'height' not in attrs:
+        attrs['width'] = data['width']
+        attrs['height'] = data['height']
+
+    sources = data['sources']
+    webp = sources.get('webp')
+    if webp:
+        attrs['src'] = default_storage.url(webp[-1][1])
+        attrs['srcset'] = _srcset(webp)
+        attrs['sizes'] = sizes
+    img = _build_tag('img', attrs)
+
+    avif = sources.get('avif')
+    if not avif:
+        return img
+    source = _build_tag('source', {'type': 'image/avif', 'srcset': _srcset(avif), 'sizes': sizes})
+    return f'<picture>{source}{img}</picture>'
+
+
+def render_rich_content(html):
+    """Обработанный HTML для показа на сайте"""
+    if not html:
+        return html
+    names = set()
+    for tag in _img_re.findall(html):
+        attrs = _parse_attrs(tag)
+        name = media_name(attrs.get('src')) if attrs else None
+        if name:
+            names.add(name)
+    images = editor_images(names) if names else {}
+    return _img_re.sub(lambda match: _rewrite_image(match, images), html)
+
+
+def summarize(text, max_words):
+    """Первые max_words слов текста"""
+    words = (text or '').split()
+    if len(words) > max_words:
+        return ' '.join(words[:max_words]) + '…'
+    return ' '.join(words)
+
+
+def reading_time(word_count):
+    """Время чтения в минутах (не меньше минуты для непустого текста)"""
+    if not word_count:
+        return 0
+    return max(1, math.ceil(word_count / settings.READING_WORDS_PER_MINUTE))
+
+
+def localized_names(name):
+    return [f'{name}_{code.replace("-", "_")}' for code, language in settings.LANGUAGES]
+
+
+def rendered_sources(model_name):
+    """Поля (с вариантами на всех языках), от которых зависит результат render_instance"""
+    source_field, html_field = RICH_CONTENT_FIELDS[model_name]
+    names = [name for name in (source_field, SUMMARY_FIELDS[model_name][0]) if name]
+    return names + [localized for name in names for localized in localized_names(name)]
+
+
+def rendered_fields(model_name):
+    """Поля на всех языках, которые заполняет render_instance"""
+    html_field = RICH_CONTENT_FIELDS[model_name][1]
+    return [localized for name in (html_field, *TEXT_STAT_FIELDS) for localized in localized_names(name)]
+
+
+def render_instance(instance):
+    """Заполняет поля обработанного HTML, анонса, количества слов и времени чтения на всех языках"""
+    model_name = instance._meta.model_name
+    source_field, html_field = RICH_CONTENT_FIELDS[model_name]
+    summary_field, summary_words = SUMMARY_FIELDS[model_name]
+    counts = {}
+    for code, name in settings.LANGUAGES:
+        suffix = code.replace('-', '_')
+        source = getattr(instance, f'{source_field}_{suffix}')
+        if model_name in PLAIN_TEXT_MODELS:
+            html, text = (linebreaks(source, autoescape=True) if source else source), ' '.join((source or '').split())
+        else:
+            html, text = sanitize_html(source)
+            html = render_rich_content(html)
+        # Пустые HTML и анонс для языка без текста: modeltranslation подставит русские
+        manual = getattr(instance, f'{summary_field}_{suffix}') if summary_field else ''
+        setattr(instance, f'{html_field}_{suffix}', html)
+        setattr(instance, f'summary_{suffix}', summarize(manual or text, summary_words))
+        counts[suffix] = len(text.split())
+
+    # Числа 0 modeltranslation не заменяет, поэтому язык без текста получает
+    # количество слов и время чтения русского текста, который на нём показывается
+    default = counts[settings.LANGUAGE_CODE.replace('-', '_')]
+    for suffix, words in counts.items():
+        words = words or default
+        setattr(instance, f'word_count_{suffix}', words)
+        setattr(instance, f'reading_time_{suffix}', reading_time(words))
@@ -0,0 +1,228 @@
+"""
+Полнотекстовый поиск по публикациям
+
+SQLite: внешняя FTS5-таблица core_publication_fts, которую поддерживают
+триггеры на core_publication. PostgreSQL: обычный столбец search_vector
+(tsvector) с GIN-индексом, который заполняет триггер BEFORE INSERT OR
+UPDATE. Генерируемый столбец (GENERATED ALWAYS AS ... STORED) не
+используется: он зависит от столбцов переводов, и миграции AlterField
+для них падали бы с «cannot alter type of a column used by a generated
+column». Функция триггера пересоздаётся после каждого migrate
+(post_migrate), поэтому переименованные или новые столбцы подхватываются
+автоматически. Индексируются название, авторы,
+ключевые слова и аннотация на всех языках сайта. На других СУБД (или если
+индекс не создан) используется поиск через icontains.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from modeltranslation.utils import build_localized_fieldname
+
+TABLE = 'core_publication'
+FTS_TABLE = 'core_publication_fts'
+
+# Поле и вес: чем больше вес, тем выше релевантность совпадения
+SEARCH_FIELDS = (
+    ('title', 10.0, 'A'),
+    ('keywords', 5.0, 'B'),
+    ('authors', 3.0, 'B'),
+    ('abstract', 1.0, 'C'),
+)
+
+_word_re = re.compile(r'\w+', re.UNICODE)
+
+
+def _language_codes():
+    return [code for code, name in settings.LANGUAGES]
+
+
+def _columns():
+    """Столбцы переводов в порядке SEARCH_FIELDS: title_ru, title_uz, ..."""
+    return [
+        build_localized_fieldname(field, language)
+        for field, weight, label in SEARCH_FIELDS
+        for language in _language_codes()
+    ]
+
+
+def _weights():
+    return [weight for field, weight, label in SEARCH_FIELDS for language in _language_codes()]
+
+
+# --- Создание индекса -------------------------------------------------------
+
+def fts5_available(conn=connection):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def install_search_index(conn=connection):
+    """
+    Создаёт поисковый индекс, если его ещё нет (можно вызывать повторно)
+
+    На SQLite пересоздание таблицы при миграциях удаляет триггеры, поэтому
+    функция вызывается и после каждого migrate.
+    """
+    if conn.vendor == 'sqlite':
+        _install_sqlite(conn)
+    elif conn.vendor == 'postgresql':
+        _install_postgresql(conn)
+
+
+def uninstall_search_index(conn=connection):
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif conn.vendor == 'postgresql':
+            cursor.execute(f'DROP TRIGGER IF EXISTS {TABLE}_search_trigger ON {TABLE}')
+            cursor.execute(f'DROP FUNCTION IF EXISTS {TABLE}_search_update()')
+            cursor.execute(f'DROP INDEX IF EXISTS {TABLE}_search_idx')
+            cursor.execute(f'ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector')
+
+
+def _install_sqlite(conn):
+    if not fts5_available(conn):
+        return
+    columns = _columns()
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+            [f'{FTS_TABLE}%'],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        triggers = {f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au'}
+        if FTS_TABLE in existing and triggers <= existing:
+            return
+
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"{column_list}, content='{TABLE}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {FTS_TABLE}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        )
+        # Индекс мог устареть, пока триггеров не было
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _postgresql_config(language):
+    return 'russian' if language == 'ru' else 'simple'
+
+
+def _postgresql_vector(row):
+    """Выражение tsvector по столбцам строки row (NEW в триггере или имя таблицы)"""
+    parts = []
+    for field, weight, label in SEARCH_FIELDS:
+        for language in _language_codes():
+            column = build_localized_fieldname(field, language)
+            config = _postgresql_config(language)
+            parts.append(
+                f"setweight(to_tsvector('{config}'::regconfig, coalesce({row}.{column}, '')), '{label}')"
+            )
+    return ' || '.join(parts)
+
+
+def _install_postgresql(conn):
+    with conn.cursor() as cursor:
+        # Генерируемый столбец из прежней версии заменяется обычным
+        cursor.execute(
+            "SELECT is_generated FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = %s AND column_name = 'search_vector'",
+            [TABLE],
+        )
+        row = cursor.fetchone()
+        if row and row[0] == 'ALWAYS':
+            cursor.execute(f'ALTER TABLE {TABLE} DROP COLUMN search_vector')
+
+        cursor.execute(f'ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector')
+        cursor.execute(
+            f"CREATE OR REPLACE FUNCTION {TABLE}_search_update() RETURNS trigger AS $$ "
+            f"BEGIN NEW.search_vector := {_postgresql_vector('NEW')}; RETURN NEW; END "
+            f"$$ LANGUAGE plpgsql"
+        )
+        # Без списка столбцов (UPDATE OF ...): иначе триггер мешал бы AlterField так же,
+        # как генерируемый столбец
+        cursor.execute(f'DROP TRIGGER IF EXISTS {TABLE}_search_trigger ON {TABLE}')
+        cursor.execute(
+            f'CREATE TRIGGER {TABLE}_search_trigger BEFORE INSERT OR UPDATE ON {TABLE} '
+            f'FOR EACH ROW EXECUTE FUNCTION {TABLE}_search_update()'
+        )
+        # Столбцы переводов могли измениться, пока функция была старой
+        cursor.execute(f'UPDATE {TABLE} SET search_vector = {_postgresql_vector(TABLE)}')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {TABLE}_search_idx ON {TABLE} USING GIN (search_vector)')
+
+
+# --- Поиск ------------------------------------------------------------------
+
+_sqlite_index_ready = None
+
+
+def _sqlite_ready():
+    global _sqlite_index_ready
+    if _sqlite_index_ready is None:
+        _sqlite_index_ready = FTS_TABLE in connection.introspection.table_names()
+    return _sqlite_index_ready
+
+
+def _fts5_query(query):
+    """Запрос пользователя в синтаксисе FTS5: все слова, с поиском по префиксу"""
+    words = _word_re.findall(query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_publications(queryset, query):
+    """
+    Фильтрует публикации по поисковому запросу
+
+    Результаты упорядочены по релевантности (поле search_rank)
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+
+    if connection.vendor == 'sqlite' and _sqlite_ready():
+        match = _fts5_query(query)
+        if not match:
+            return queryset.none()
+        weights = ', '.join(str(weight) for weight in _weights())
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {TABLE}.id',
+            [match], output_field=FloatField(),
+        )).order_by('-search_rank', *queryset.model._meta.ordering)
+
+    if connection.vendor == 'postgresql':
+        tsquery = "(websearch_to_tsquery('russian', %s) || websearch_to_tsquery('simple', %s))"
+        return queryset.filter(
+            RawSQL(f'{TABLE}.search_vector @@ {tsquery}', [query, query], output_field=BooleanField())
+        ).annotate(search_rank=RawSQL(
+            f'ts_rank({TABLE}.search_vector, {tsquery})', [query, query], output_field=FloatField(),
+        )).order_by('-search_rank', *queryset.model._meta.ordering)
+
+    condition = Q()
+    for column in _columns():
+        condition |= Q(**{f'{column}__icontains': query})
+    return queryset.filter(condition)
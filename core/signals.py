@@ -0,0 +1,262 @@
+"""
+Сигналы моделей: сброс кеша публичных страниц при изменении контента
+"""
+import logging
+from collections import defaultdict
+
+from django.db import connections, transaction
+from django.db.models.signals import pre_save, post_init, post_save, post_delete, post_migrate, m2m_changed
+from ckeditor_uploader.utils import storage as ckeditor_storage
+
+from .caching import bump_version, invalidate_public_pages, invalidate_profile
+from .images import (
+    image_fields, mark_variants_pending, read_image_dimensions, delete_variants, variant_formats, variant_name,
+    variant_widths
+)
+from .rendering import render_instance, rendered_fields, rendered_sources
+from .documents import delete_derivatives, mark_pdf_pending
+from .feeds import FEED_VERSIONS
+from .search import install_search_index
+from .sitemaps import SITEMAPS, sitemap_version
+from .models import (
+    Profile, Service, ServiceImage, ServiceReview, Publication, Project, BlogPost,
+    Category, Tag, Achievement, Testimonial, Book, EditorUpload
+)
+
+logger = logging.getLogger(__name__)
+
+# Модели, содержимое которых выводится на публичных страницах
+CONTENT_MODELS = (
+    Profile, Service, ServiceImage, ServiceReview, Publication, Project, BlogPost,
+    Category, Tag, Achievement, Testimonial, Book,
+)
+
+
+# Поля, изменение которых не влияет на содержимое кешированных страниц
+NON_CONTENT_FIELDS = {'views_count'}
+
+
+def invalidate_page_cache(sender, update_fields=None, **kwargs):
+    """Сбрасывает кеш страниц при сохранении или удалении контента"""
+    if update_fields and set(update_fields) <= NON_CONTENT_FIELDS:
+        return
+    invalidate_public_pages()
+
+
+for model in CONTENT_MODELS:
+    post_save.connect(invalidate_page_cache, sender=model, dispatch_uid=f'page_cache_save_{model.__name__}')
+    post_delete.connect(invalidate_page_cache, sender=model, dispatch_uid=f'page_cache_delete_{model.__name__}')
+
+
+# Версии закешированных документов (разделы карты сайта, ленты), которые строятся из модели
+DOCUMENT_VERSIONS = defaultdict(list)
+for section, site in SITEMAPS.items():
+    if site.model:
+        DOCUMENT_VERSIONS[site.model].append(sitemap_version(section))
+for model, versions in FEED_VERSIONS.items():
+    DOCUMENT_VERSIONS[model].extend(versions)
+
+
+def invalidate_documents(sender, update_fields=None, **kwargs):
+    """Перестраивает карту сайта и ленты, построенные из изменённой модели"""
+    if update_fields and set(update_fields) <= NON_CONTENT_FIELDS:
+        return
+    bump_version(*DOCUMENT_VERSIONS[sender])
+
+
+for model in DOCUMENT_VERSIONS:
+    post_save.connect(invalidate_documents, sender=model, dispatch_uid=f'documents_save_{model.__name__}')
+    post_delete.connect(invalidate_documents, sender=model, dispatch_uid=f'documents_delete_{model.__name__}')
+
+
+def invalidate_profile_cache(sender, **kwargs):
+    """Сбрасывает закешированный профиль врача"""
+    invalidate_profile()
+
+
+post_save.connect(invalidate_profile_cache, sender=Profile, dispatch_uid='profile_cache_save')
+post_delete.connect(invalidate_profile_cache, sender=Profile, dispatch_uid='profile_cache_delete')
+
+
+def update_blog_counts(sender, update_fields=None, **kwargs):
+    """Пересчитывает число статей в категориях и облаке тегов"""
+    if update_fields and set(update_fields) <= NON_CONTENT_FIELDS:
+        return
+    Category.update_counts()
+    Tag.update_counts()
+
+
+def blog_tags_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        Tag.update_counts()
+        invalidate_public_pages()
+
+
+post_save.connect(update_blog_counts, sender=BlogPost, dispatch_uid='blog_counts_save')
+post_delete.connect(update_blog_counts, sender=BlogPost, dispatch_uid='blog_counts_delete')
+m2m_changed.connect(blog_tags_changed, sender=BlogPost.tags.through, dispatch_uid='blog_tags_changed')
+
+
+def ensure_search_index(sender, using='default', **kwargs):
+    """
+    Восстанавливает поисковый индекс публикаций после migrate
+
+    SQLite пересоздаёт таблицу при изменении её схемы, и триггеры FTS5 теряются
+    """
+    if sender.name != 'core':
+        return
+    install_search_index(connections[using])
+
+
+post_migrate.connect(ensure_search_index, dispatch_uid='publication_search_index')
+
+
+# Модели с изображениями, для которых создаются уменьшенные копии
+IMAGE_MODELS = (Profile, ServiceImage, Publication, Project, BlogPost, Achievement, Testimonial, Book)
+
+
+def _image_names(instance):
+    """Имена файлов изображений без обращения к отложенным (deferred) полям"""
+    names = {}
+    for field in image_fields(type(instance)):
+        if field.attname in instance.__dict__:
+            value = instance.__dict__[field.attname]
+            names[field.name] = getattr(value, 'name', value) or ''
+    return names
+
+
+def remember_image_names(sender, instance, **kwargs):
+    instance._image_names = _image_names(instance)
+
+
+def read_new_image_dimensions(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Размеры новых изображений сохраняются вместе с записью: страницы сразу резервируют под них место"""
+    if raw:
+        return
+    previous = getattr(instance, '_image_names', {})
+    for name, filename in _image_names(instance).items():
+        # У новой записи post_init уже видел переданный файл
+        if (update_fields is None or name in update_fields) and (
+            filename != previous.get(name) or (filename and instance._state.adding)
+        ):
+            read_image_dimensions(instance, name)
+
+
+def build_image_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Ставит новые изображения в очередь на создание копий после фиксации транзакции"""
+    if raw:
+        return
+    previous = getattr(instance, '_image_names', {})
+    current = _image_names(instance)
+    changed = [
+        name for name, filename in current.items()
+        if (update_fields is None or name in update_fields)
+        and (filename != previous.get(name) or (filename and not getattr(instance, f'{name}_variants')))
+    ]
+    instance._image_names = current
+    if not changed:
+        return
+
+    def build():
+        for name in changed:
+            mark_variants_pending(instance, name)
+        invalidate_public_pages()
+
+    transaction.on_commit(build)
+
+
+def remove_image_variants(sender, instance, **kwargs):
+    def remove():
+        for field in image_fields(sender):
+            delete_variants(field.storage, instance.__dict__.get(f'{field.name}_variants'))
+
+    transaction.on_commit(remove)
+
+
+for model in IMAGE_MODELS:
+    post_init.connect(remember_image_names, sender=model, dispatch_uid=f'image_names_{model.__name__}')
+    pre_save.connect(read_new_image_dimensions, sender=model, dispatch_uid=f'image_dimensions_{model.__name__}')
+    post_save.connect(build_image_variants, sender=model, dispatch_uid=f'image_variants_save_{model.__name__}')
+    post_delete.connect(remove_image_variants, sender=model, dispatch_uid=f'image_variants_delete_{model.__name__}')
+
+
+def render_rich_content_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Готовит HTML к показу (очистка, изображения, lazy loading), анонс и время чтения при сохранении"""
+    if raw:
+        return
+    model_name = sender._meta.model_name
+    if update_fields is None:
+        render_instance(instance)
+        return
+    if not set(rendered_sources(model_name)) & set(update_fields):
+        return
+    # Вычисляемые поля не входят в update_fields — сохраняем их отдельно
+    render_instance(instance)
+    sender._default_manager.filter(pk=instance.pk).update(
+        **{name: getattr(instance, name) for name in rendered_fields(model_name)}
+    )
+
+
+for model in (BlogPost, Book, Publication):
+    pre_save.connect(render_rich_content_fields, sender=model, dispatch_uid=f'rich_content_{model.__name__}')
+
+
+# Модели с PDF, для которых создаются превью и линеаризованные копии
+PDF_MODELS = (Publication, Book)
+
+
+def remember_pdf_name(sender, instance, **kwargs):
+    value = instance.__dict__.get('pdf_file')
+    instance._pdf_name = getattr(value, 'name', value) or ''
+
+
+def build_pdf_derivatives(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Ставит новый PDF в очередь на создание превью и линеаризованной копии после фиксации транзакции"""
+    if raw or 'pdf_file' not in instance.__dict__:
+        return
+    if update_fields is not None and 'pdf_file' not in update_fields:
+        return
+    current = instance.pdf_file.name or ''
+    if current == getattr(instance, '_pdf_name', ''):
+        return
+    instance._pdf_name = current
+
+    def build():
+        mark_pdf_pending(instance)
+        invalidate_public_pages()
+
+    transaction.on_commit(build)
+
+
+def remove_pdf_derivatives(sender, instance, **kwargs):
+    transaction.on_commit(lambda: delete_derivatives(instance))
+
+
+for model in PDF_MODELS:
+    post_init.connect(remember_pdf_name, sender=model, dispatch_uid=f'pdf_name_{model.__name__}')
+    post_save.connect(build_pdf_derivatives, sender=model, dispatch_uid=f'pdf_derivatives_save_{model.__name__}')
+    post_delete.connect(remove_pdf_derivatives, sender=model, dispatch_uid=f'pdf_derivatives_delete_{model.__name__}')
+
+
+def remove_editor_upload_files(sender, instance, **kwargs):
+    """Удаляет из хранилища файл редактора вместе с миниатюрой и адаптивными копиями"""
+    names = [instance.path]
+    if instance.thumbnail:
+        names.append(instance.thumbnail)
+    if instance.is_image and instance.width:
+        names += [
+            variant_name(instance.path, width, fmt)
+            for width in variant_widths(instance.width) for fmt in variant_formats()
+        ]
+
+    def remove():
+        for name in names:
+            try:
+                ckeditor_storage.delete(name)
+            except Exception as e:
+                logger.warning('Не удалось удалить файл редактора %s: %s', name, e)
+
+    transaction.on_commit(remove)
+
+
+post_delete.connect(remove_editor_upload_files, sender=EditorUpload, dispatch_uid='editor_upload_delete')
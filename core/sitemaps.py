@@ -1,9 +1,47 @@
+"""
+Карта сайта для всех языков
+
+Каждый адрес выводится для ru, uz и uz-cyrl (i18n_patterns) со ссылками
+xhtml:link hreflang на остальные языковые версии. Пока адресов не больше
+50 000, /sitemap.xml — обычный urlset; если больше, /sitemap.xml
+становится индексом со ссылками на разделы /sitemap-<раздел>.xml
+(с ?p=2… для страниц раздела).
+
+Ответы кешируются (core.caching.conditional_cache) до изменения моделей
+своего раздела: сохранение статьи блога перестраивает только раздел blog
+и индекс. Роботы получают ETag и Last-Modified и 304 на повторный запрос.
+"""
 from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps import views as sitemap_views
+from django.http import Http404
 from django.urls import reverse
+from django.utils.functional import cached_property
+
+from .caching import conditional_cache
 from .models import BlogPost, Publication, Book
 
 
-class StaticViewSitemap(Sitemap):
+class I18nSitemap(Sitemap):
+    """Адреса на всех языках из LANGUAGES с альтернативными ссылками hreflang"""
+    i18n = True
+    alternates = True
+    x_default = True
+    # Модель, изменения которой меняют раздел (см. core.signals)
+    model = None
+
+    @cached_property
+    def paginator(self):
+        # Django обращается к paginator несколько раз за запрос, и каждый
+        # раз заново выполнял бы items()
+        return super().paginator
+
+    def get_latest_lastmod(self):
+        if not callable(getattr(self, 'lastmod', None)):
+            return None
+        return max((self.lastmod(item) for item, language in self.paginator.object_list), default=None)
+
+
+class StaticViewSitemap(I18nSitemap):
     """Sitemap для статических страниц"""
     priority = 0.8
     changefreq = 'monthly'
@@ -15,38 +53,77 @@ class StaticViewSitemap(Sitemap):
         return reverse(item)
 
 
-class BlogPostSitemap(Sitemap):
+class BlogPostSitemap(I18nSitemap):
     """Sitemap для статей блога"""
     changefreq = 'weekly'
     priority = 0.7
+    model = BlogPost
 
     def items(self):
-        return BlogPost.objects.filter(is_published=True)
+        return BlogPost.objects.filter(is_published=True).only('slug', 'updated_at')
 
     def lastmod(self, obj):
         return obj.updated_at
 
 
-class PublicationSitemap(Sitemap):
+class PublicationSitemap(I18nSitemap):
     """Sitemap для публикаций"""
     changefreq = 'monthly'
     priority = 0.6
+    model = Publication
 
     def items(self):
-        return Publication.objects.all()
+        return Publication.objects.only('pk', 'updated_at')
 
     def lastmod(self, obj):
         return obj.updated_at
 
 
-class BookSitemap(Sitemap):
+class BookSitemap(I18nSitemap):
     """Sitemap для книг"""
     changefreq = 'monthly'
     priority = 0.8
+    model = Book
 
     def items(self):
-        return Book.objects.filter(is_available=True)
+        return Book.objects.filter(is_available=True).only('slug', 'updated_at')
 
     def lastmod(self, obj):
         return obj.updated_at
 
+
+SITEMAPS = {
+    'static': StaticViewSitemap,
+    'blog': BlogPostSitemap,
+    'publications': PublicationSitemap,
+    'books': BookSitemap,
+}
+
+
+def sitemap_version(section):
+    return f'sitemap:{section}'
+
+
+def _all_sections(request, *args, **kwargs):
+    return [sitemap_version(section) for section in SITEMAPS]
+
+
+def _one_section(request, section):
+    return [sitemap_version(section)]
+
+
+@conditional_cache(_all_sections)
+def sitemap(request):
+    """Вся карта сайта или, если адресов больше лимита, индекс разделов"""
+    sites = {section: site() for section, site in SITEMAPS.items()}
+    if sum(site.paginator.count for site in sites.values()) > Sitemap.limit:
+        return sitemap_views.index(request, sites, sitemap_url_name='sitemap_section')
+    return sitemap_views.sitemap(request, sites)
+
+
+@conditional_cache(_one_section)
+def sitemap_section(request, section):
+    """Раздел карты сайта (страница ?p=N) для индекса"""
+    if section not in SITEMAPS:
+        raise Http404('Раздел карты сайта не найден')
+    return sitemap_views.sitemap(request, SITEMAPS, section=section)
@@ -0,0 +1,307 @@
+"""
+Статическая копия публичных страниц (SSG)
+
+Большая часть сайта — контент, который меняется несколько раз в неделю,
+поэтому анонимные GET-запросы без строки запроса может обслуживать
+веб-сервер из готовых HTML-файлов, не запуская Django (правила для
+.htaccess — в README). Команда export_static_site отрисовывает все
+публичные страницы на всех языках через полный стек Django (middleware,
+шаблоны, context processors) в каталог STATIC_SITE_ROOT:
+
+    index.html, uz/index.html, uz-cyrl/blog/<slug>/index.html, ...
+
+и кладёт рядом сжатые копии .gz и .br (если установлен brotli).
+
+В манифесте (.manifest.json) хранятся хеши страниц и «отпечатки» строк
+моделей, из которых строятся страницы (хеш значений полей без счётчиков
+просмотров). В инкрементальном режиме отпечатки сравниваются с текущими,
+и по AFFECTED_PAGES определяются страницы, на которых выводятся
+изменённые, новые или удалённые объекты; перерисовываются только они.
+Изменения шаблонов, переводов и статики отслеживаются хешем site_version:
+если он не совпадает с сохранённым, экспорт выполняется полностью.
+Изменения кода (views, теги шаблонов) не отслеживаются — после такого
+деплоя нужен полный экспорт.
+"""
+import hashlib
+import json
+import os
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Q
+from django.template.utils import get_app_template_dirs
+from django.urls import reverse
+from django.utils import translation
+from whitenoise.compress import Compressor
+
+from .models import (
+    Profile, Service, ServiceImage, ServiceReview, Publication, Project, BlogPost,
+    Category, Tag, Achievement, Testimonial, Book
+)
+from .signals import NON_CONTENT_FIELDS
+
+MANIFEST_NAME = '.manifest.json'
+MANIFEST_VERSION = 1
+
+# Страницы без параметров (контакты и заказы содержат формы с CSRF и не экспортируются)
+STATIC_PAGES = ('index', 'about', 'services', 'portfolio', 'publications', 'blog', 'books')
+
+# Имя URL страницы объекта → имя аргумента
+PAGE_ARGS = {
+    'service_detail': 'pk',
+    'publication_detail': 'pk',
+    'blog_detail': 'slug',
+    'book_detail': 'slug',
+}
+
+# Настройки на время отрисовки: страницы строятся заново, просмотры не
+# учитываются, а кеш профиля и документов — временный, в памяти
+EXPORT_SETTINGS = {
+    'PAGE_CACHE_ENABLED': False,
+    'VIEW_COUNTERS_ENABLED': False,
+    'VIEW_COUNTER_FLUSH_INTERVAL': 0,
+    'QUERY_BUDGET_ENABLED': False,
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'static-site'}},
+}
+
+# Поля, изменение которых не требует перерисовки страниц
+IGNORED_FIELDS = NON_CONTENT_FIELDS | {'updated_at'}
+
+
+def all_pages():
+    """Все публичные страницы: [(имя URL, аргумент или None)]"""
+    pages = [(name, None) for name in STATIC_PAGES]
+    pages += [('service_detail', pk) for pk in Service.objects.filter(is_active=True).values_list('pk', flat=True)]
+    pages += [('publication_detail', pk) for pk in Publication.objects.values_list('pk', flat=True)]
+    pages += [
+        ('blog_detail', slug) for slug in BlogPost.objects.filter(is_published=True).values_list('slug', flat=True)
+    ]
+    pages += [('book_detail', slug) for slug in Book.objects.filter(is_available=True).values_list('slug', flat=True)]
+    return pages
+
+
+def page_path(page, language):
+    """URL страницы на языке language"""
+    name, arg = page
+    with translation.override(language):
+        return reverse(name, kwargs=None if arg is None else {PAGE_ARGS[name]: arg})
+
+
+def file_name(path):
+    """HTML-файл страницы относительно STATIC_SITE_ROOT: /uz/blog/ → uz/blog/index.html"""
+    return f'{path.strip("/")}/index.html'.lstrip('/')
+
+
+# --- Отпечатки объектов ------------------------------------------------------
+
+def fingerprints(model):
+    """{pk: хеш значений полей и связей many-to-many} для всех строк модели"""
+    fields = [field.attname for field in model._meta.concrete_fields if field.name not in IGNORED_FIELDS]
+    related = defaultdict(list)
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        for pk, value in through.objects.order_by(source, target).values_list(f'{source}_id', f'{target}_id'):
+            related[pk].append((field.name, value))
+
+    with translation.override(settings.LANGUAGE_CODE):
+        rows = model._default_manager.order_by('pk').values_list('pk', *fields)
+        return {
+            str(row[0]): hashlib.md5(repr((row, related[row[0]])).encode('utf-8')).hexdigest()
+            for row in rows.iterator()
+        }
+
+
+def model_key(model):
+    return model._meta.label_lower
+
+
+def all_fingerprints():
+    return {model_key(model): fingerprints(model) for model in AFFECTED_PAGES}
+
+
+# --- Страницы, которые зависят от объектов -----------------------------------
+
+def _everything(changed, deleted):
+    return None
+
+
+def _service_pages(changed, deleted):
+    return {('index', None), ('services', None), *(('service_detail', pk) for pk in changed)}
+
+
+def _service_children_pages(model):
+    def pages(changed, deleted):
+        if deleted:
+            services = Service.objects.values_list('pk', flat=True)
+        else:
+            services = model.objects.filter(pk__in=changed).values_list('service_id', flat=True)
+        return {('service_detail', pk) for pk in services}
+    return pages
+
+
+def _publication_pages(changed, deleted):
+    return {('index', None), ('publications', None), *(('publication_detail', pk) for pk in changed)}
+
+
+def _blog_pages(changed, deleted):
+    """Статья выводится на главной, в блоге и в «Похожих» статьях своей категории"""
+    posts = BlogPost.objects.filter(is_published=True)
+    if not deleted:
+        categories = list(BlogPost.objects.filter(pk__in=changed).values_list('category_id', flat=True))
+        query = Q(pk__in=changed) | Q(category__in=[pk for pk in categories if pk is not None])
+        if None in categories:
+            query |= Q(category__isnull=True)
+        posts = posts.filter(query)
+    return {('index', None), ('blog', None), *(('blog_detail', slug) for slug in posts.values_list('slug', flat=True))}
+
+
+def _book_pages(changed, deleted):
+    """Книга выводится на главной, в каталоге и в «Похожих» книгах того же автора или года"""
+    books = Book.objects.filter(is_available=True)
+    if not deleted:
+        changed_books = Book.objects.filter(pk__in=changed)
+        books = books.filter(
+            Q(pk__in=changed)
+            | Q(author__in=changed_books.values('author'))
+            | Q(publication_year__in=changed_books.values('publication_year'))
+        )
+    return {('index', None), ('books', None), *(('book_detail', slug) for slug in books.values_list('slug', flat=True))}
+
+
+def _blog_taxonomy_pages(changed, deleted):
+    """Категории и теги выводятся в блоге, на карточках и в статьях"""
+    return _blog_pages(changed, deleted=True)
+
+
+# Модель → функция (pk изменённых и новых объектов, были ли удаления) →
+# множество страниц или None, если меняется каждая страница
+AFFECTED_PAGES = {
+    Profile: _everything,  # шапка и подвал каждой страницы
+    Service: _service_pages,
+    ServiceImage: _service_children_pages(ServiceImage),
+    ServiceReview: _service_children_pages(ServiceReview),
+    Publication: _publication_pages,
+    Project: lambda changed, deleted: {('portfolio', None)},
+    BlogPost: _blog_pages,
+    Category: _blog_taxonomy_pages,
+    Tag: _blog_taxonomy_pages,
+    Achievement: lambda changed, deleted: {('about', None)},
+    Testimonial: lambda changed, deleted: {('index', None)},
+    Book: _book_pages,
+}
+
+
+def affected_pages(old, new):
+    """
+    Страницы, которые нужно перерисовать после изменения объектов
+
+    old и new — отпечатки {модель: {pk: хеш}} из манифеста и текущие.
+    Возвращает множество страниц или None, если перерисовать нужно всё.
+    """
+    pages = set()
+    for model, rule in AFFECTED_PAGES.items():
+        before, after = old.get(model_key(model), {}), new.get(model_key(model), {})
+        changed = [pk for pk, digest in after.items() if before.get(pk) != digest]
+        deleted = bool(set(before) - set(after))
+        if not changed and not deleted:
+            continue
+        # pk в манифесте хранятся строками
+        model_pages = rule([model._meta.pk.to_python(pk) for pk in changed], deleted)
+        if model_pages is None:
+            return None
+        pages |= model_pages
+    return pages
+
+
+# --- Файлы -------------------------------------------------------------------
+
+def _tree_files(root, suffixes):
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith(suffixes):
+                yield os.path.join(directory, filename)
+
+
+def site_version():
+    """
+    Хеш шаблонов, переводов и манифеста статики (staticfiles.json)
+
+    От них зависит каждая страница, но в отпечатках моделей они не видны:
+    если после деплоя хеш изменился, инкрементальный экспорт становится полным
+    """
+    digest = hashlib.sha256()
+    sources = [
+        *((str(directory), ('.html', '.txt', '.xml')) for directory in get_app_template_dirs('templates')),
+        *((str(directory), ('.html', '.txt', '.xml')) for config in settings.TEMPLATES for directory in config['DIRS']),
+        *((str(directory), ('.mo',)) for directory in settings.LOCALE_PATHS),
+    ]
+    for root, suffixes in sources:
+        for path in _tree_files(root, suffixes):
+            with open(path, 'rb') as f:
+                digest.update(os.path.relpath(path, root).encode('utf-8') + b'\0' + hashlib.md5(f.read()).digest())
+    static_manifest = os.path.join(str(settings.STATIC_BUILD_ROOT), 'staticfiles.json')
+    if os.path.exists(static_manifest):
+        with open(static_manifest, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def load_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST_NAME), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+
+def save_manifest(root, pages, objects, site):
+    os.makedirs(root, exist_ok=True)
+    _write_atomic(os.path.join(root, MANIFEST_NAME), json.dumps(
+        {'version': MANIFEST_VERSION, 'pages': pages, 'objects': objects, 'site': site},
+        ensure_ascii=False, sort_keys=True
+    ).encode('utf-8'))
+
+
+def _write_atomic(path, data):
+    tmp = f'{path}.tmp{os.getpid()}'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+_compressor = Compressor(quiet=True)
+
+
+def write_page(root, path, content):
+    """Записывает HTML страницы и сжатые копии; файлы заменяются атомарно"""
+    target = os.path.join(root, file_name(path))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    _write_atomic(target, content)
+    copies = []
+    if _compressor.use_brotli:
+        copies.append(('.br', _compressor.compress_brotli(content)))
+    if _compressor.use_gzip:
+        copies.append(('.gz', _compressor.compress_gzip(content)))
+    for suffix, data in copies:
+        _write_atomic(target + suffix, data)
+
+
+def remove_page(root, path):
+    """Удаляет файлы страницы и опустевшие каталоги"""
+    target = os.path.join(root, file_name(path))
+    for suffix in ('', '.br', '.gz'):
+        try:
+            os.remove(target + suffix)
+        except FileNotFoundError:
+            pass
+    directory = os.path.dirname(target)
+    while os.path.abspath(directory) != os.path.abspath(root):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
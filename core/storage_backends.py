@@ -1,23 +1,123 @@
 """
 Custom storage backends for Cloudflare R2 с правильным кешированием
 """
+import os
+import re
+from urllib.parse import quote, urlsplit
 
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestFilesMixin
+from django.core.files.storage import FileSystemStorage
+from django.utils.functional import cached_property
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+from whitenoise.compress import Compressor
+from whitenoise.storage import CompressedManifestStaticFilesStorage
 
+# Имя с хешем содержимого от ManifestFilesMixin: styles.5f1c2a9b3d4e.css
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
 
-class StaticStorage(S3Boto3Storage):
+
+class PublicUrlMixin:
+    """
+    Публичные URL объектов без обращения к boto3
+
+    При AWS_QUERYSTRING_AUTH = False и без custom domain django-storages
+    строит каждый URL через generate_presigned_url клиента boto3 (сотни
+    микросекунд на вызов), хотя результат — просто endpoint, bucket и ключ.
+    Здесь URL собирается из строк так же, как это делает botocore
+    (ключ экранируется с safe='/~'). Подписанные ссылки, параметры и
+    custom domain обрабатываются исходной реализацией.
+    """
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        base = self._public_base_url
+        if base is None or parameters or http_method not in (None, 'GET'):
+            return super().url(name, parameters, expire, http_method)
+        return base + quote(self._normalize_name(clean_name(name)), safe='/~')
+
+    @cached_property
+    def _public_base_url(self):
+        """Начало URL объектов или None, если быстрый путь неприменим"""
+        if self.querystring_auth or self.custom_domain or not self.endpoint_url:
+            return None
+        endpoint = urlsplit(self.endpoint_url)
+        if self.addressing_style == 'virtual':
+            if '.' in self.bucket_name:
+                # botocore переключается на path-style для таких bucket
+                return None
+            return f'{endpoint.scheme}://{self.bucket_name}.{endpoint.netloc}/'
+        return f'{endpoint.scheme}://{endpoint.netloc}/{self.bucket_name}/'
+
+
+class IncrementalCompressor(Compressor):
+    """
+    Не сжимает файл повторно, если его .br/.gz уже есть и не устарели
+
+    WhiteNoise при каждом collectstatic заново сжимает все файлы (дерево
+    плагинов CKEditor — десятки секунд). Содержимое файла с хешем в имени
+    не меняется (Django лишь перезаписывает его при каждой сборке), а для
+    остальных сжатая копия должна иметь время изменения исходного файла.
+    """
+
+    def compress(self, path):
+        suffixes = [suffix for suffix, enabled in (('.br', self.use_brotli), ('.gz', self.use_gzip)) if enabled]
+        existing = [path + suffix for suffix in suffixes if os.path.exists(path + suffix)]
+        if suffixes and len(existing) == len(suffixes):
+            if HASHED_NAME_RE.search(path):
+                return existing
+            mtime = os.stat(path).st_mtime
+            if all(os.stat(name).st_mtime == mtime for name in existing):
+                return existing
+        return super().compress(path)
+
+
+class CompressedStaticStorage(CompressedManifestStaticFilesStorage):
+    """
+    Статика без R2 (WhiteNoise): имена с хешем содержимого, манифест
+    staticfiles.json и сжатые копии .br/.gz рядом с файлами
+
+    WhiteNoise отдаёт файлы с хешем с Cache-Control: immutable, а сжатые
+    копии — по Accept-Encoding без сжатия на лету. Этим же классом
+    sync_static собирает статику для R2, поэтому манифест в обоих режимах
+    одинаковый.
+    """
+
+    def __init__(self, location=None, *args, **kwargs):
+        super().__init__(location or settings.STATIC_BUILD_ROOT, *args, **kwargs)
+
+    def create_compressor(self, **kwargs):
+        return IncrementalCompressor(**kwargs)
+
+
+class StaticStorage(ManifestFilesMixin, PublicUrlMixin, S3Boto3Storage):
     """
     Storage for static files on Cloudflare R2
-    Статические файлы кешируются на 1 год (они версионируются через collectstatic)
+    Файлы с хешем в имени кешируются на 1 год (immutable), остальные — на час.
+    Манифест staticfiles.json читается из локального каталога сборки
+    (STATIC_BUILD_ROOT), а не из R2, чтобы не обращаться к сети при запуске.
     """
     location = 'static'
     default_acl = None
     file_overwrite = True
     
     object_parameters = {
+        'CacheControl': 'public, max-age=3600',
+        'ContentDisposition': 'inline',
+    }
+    hashed_object_parameters = {
         'CacheControl': 'public, max-age=31536000, immutable',
         'ContentDisposition': 'inline',
     }
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('manifest_storage', FileSystemStorage(location=settings.STATIC_BUILD_ROOT))
+        super().__init__(*args, **kwargs)
+
+    def get_object_parameters(self, name):
+        if HASHED_NAME_RE.search(name):
+            return self.hashed_object_parameters.copy()
+        return super().get_object_parameters(name)
     
     gzip = True
     gzip_content_types = (
@@ -30,7 +130,7 @@ class StaticStorage(S3Boto3Storage):
     )
 
 
-class MediaStorage(S3Boto3Storage):
+class MediaStorage(PublicUrlMixin, S3Boto3Storage):
     """
     Storage for media files on Cloudflare R2
     Медиа файлы кешируются на 30 дней (могут обновляться)
@@ -44,12 +144,13 @@ class MediaStorage(S3Boto3Storage):
         'ContentDisposition': 'inline',
     }
     
+    # PDF не сжимается: он уже сжат внутри, а Content-Encoding: gzip
+    # ломает запросы частей файла (Range) просмотрщиком PDF
     gzip = True
     gzip_content_types = (
         'text/css',
         'text/javascript',
         'application/javascript',
-        'application/pdf',
         'image/svg+xml',
     )
 
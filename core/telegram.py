@@ -0,0 +1,104 @@
+"""
+Клиент Telegram Bot API для уведомлений о заказах
+
+Использует одно постоянное (keep-alive) HTTP-соединение на поток.
+Адрес API задаётся настройкой TELEGRAM_API_URL, поэтому в тестах
+его можно направить на локальный сервер-заглушку.
+"""
+import http.client
+import json
+import threading
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+# Максимальная длина сообщения в Telegram
+MAX_MESSAGE_LENGTH = 4096
+
+_local = threading.local()
+
+
+class TelegramError(Exception):
+    """Ошибка Bot API; retry_after задан, если Telegram просит подождать (HTTP 429)"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TelegramClient:
+    """Клиент Bot API с постоянным HTTP-соединением"""
+
+    def __init__(self, token, api_url=None, timeout=10):
+        self.api_url = api_url or settings.TELEGRAM_API_URL
+        parsed = urlsplit(self.api_url)
+        self.token = token
+        self.scheme = parsed.scheme
+        self.host = parsed.netloc
+        self.base_path = parsed.path.rstrip('/')
+        self.timeout = timeout
+        self._connection = None
+
+    def _get_connection(self):
+        if self._connection is None:
+            connection_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            self._connection = connection_class(self.host, timeout=self.timeout)
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def call(self, method, payload):
+        """Вызывает метод Bot API и возвращает поле result ответа"""
+        body = json.dumps(payload).encode('utf-8')
+        path = f'{self.base_path}/bot{self.token}/{method}'
+        headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+
+        # Сервер мог закрыть простаивающее соединение: одна повторная попытка с новым
+        for attempt in range(2):
+            connection = self._get_connection()
+            try:
+                connection.request('POST', path, body=body, headers=headers)
+                response = connection.getresponse()
+                raw = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                self.close()
+                if attempt:
+                    raise
+
+        try:
+            data = json.loads(raw or b'{}')
+        except ValueError:
+            data = {}
+        if response.status != 200 or not data.get('ok'):
+            parameters = data.get('parameters') or {}
+            raise TelegramError(
+                data.get('description') or f'HTTP {response.status}',
+                retry_after=parameters.get('retry_after'),
+            )
+        return data.get('result')
+
+    def send_message(self, chat_id, text):
+        return self.call('sendMessage', {
+            'chat_id': chat_id,
+            'text': text[:MAX_MESSAGE_LENGTH],
+            'disable_web_page_preview': True,
+        })
+
+
+def get_client():
+    """Клиент для текущего потока (соединение переиспользуется между отправками)"""
+    client = getattr(_local, 'client', None)
+    if client is None or (client.token, client.api_url) != (settings.TELEGRAM_BOT_TOKEN, settings.TELEGRAM_API_URL):
+        if client is not None:
+            client.close()
+        client = TelegramClient(settings.TELEGRAM_BOT_TOKEN)
+        _local.client = client
+    return client
+
+
+def is_configured():
+    return bool(settings.TELEGRAM_BOT_TOKEN and settings.TELEGRAM_CHAT_ID)
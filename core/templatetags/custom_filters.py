@@ -1,5 +1,6 @@
 """Custom template filters"""
 from django import template
+from django.urls import translate_url
 
 register = template.Library()
 
@@ -34,17 +35,6 @@ def format_price(price):
         return price_str
 
 
-@register.filter
-def first_words(value, num_words=20):
-    """Возвращает первые N слов из текста"""
-    if not value:
-        return ''
-    words = value.split()
-    if len(words) > num_words:
-        return ' '.join(words[:num_words]) + '...'
-    return value
-
-
 @register.filter
 def remove_prefix(value, prefix):
     """Удаляет префикс из строки если он есть"""
@@ -54,3 +44,30 @@ def remove_prefix(value, prefix):
         return value[len(prefix):]
     return value
 
+
+@register.simple_tag(takes_context=True)
+def page_url(context, **params):
+    """
+    Ссылка на другую страницу списка с сохранением фильтров
+
+    {% page_url page=2 %} или {% page_url cursor=page_obj.next_cursor %}
+    """
+    query = context['request'].GET.copy()
+    for name in ('page', 'cursor'):
+        query.pop(name, None)
+    for name, value in params.items():
+        if value not in (None, ''):
+            query[name] = value
+    return f'?{query.urlencode()}'
+
+
+@register.simple_tag(takes_context=True)
+def language_url(context, language_code):
+    """
+    Адрес текущей страницы на другом языке
+
+    Переключатель языков — обычные ссылки, а не форма set_language с
+    CSRF-токеном, поэтому страницу можно отдавать из кеша и статической
+    копии (export_static_site)
+    """
+    return translate_url(context['request'].get_full_path(), language_code)
@@ -0,0 +1,60 @@
+"""Вывод изображений с уменьшенными копиями (см. core/images.py)"""
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from core.images import srcset
+
+register = template.Library()
+
+# Порядок важен: браузер берёт первый поддерживаемый формат
+SOURCE_TYPES = (
+    ('avif', 'image/avif'),
+    ('webp', 'image/webp'),
+)
+
+
+@register.simple_tag
+def responsive_image(fieldfile, sizes='100vw', loading='lazy', **attrs):
+    """
+    <picture> с копиями изображения в AVIF/WebP, srcset/sizes и размерами
+
+    {% responsive_image book.cover_image sizes="(max-width: 768px) 100vw, 350px" alt=book.title class="card-img-top" %}
+    Без копий выводится обычный <img> с оригиналом. Размеры и размытое
+    превью берутся из полей модели, файл в хранилище не открывается.
+    """
+    if not fieldfile:
+        return ''
+    instance, name = fieldfile.instance, fieldfile.field.name
+    variants = getattr(instance, f'{name}_variants', None) or {}
+    width = getattr(instance, f'{name}_width', None)
+    height = getattr(instance, f'{name}_height', None)
+    lqip = getattr(instance, f'{name}_lqip', '')
+
+    css_class = attrs.pop('class', '')
+    img_attrs = {
+        'src': fieldfile.url,
+        'class': f'responsive-image {css_class}'.strip(),
+        'loading': loading,
+        'decoding': 'async',
+    }
+    if width and height:
+        img_attrs['width'] = width
+        img_attrs['height'] = height
+    if lqip:
+        # Превью видно как фон, пока загружается само изображение
+        attrs['style'] = f"background: center / cover no-repeat url({lqip}); {attrs.get('style', '')}".strip()
+    img_attrs.update(attrs)
+    img = format_html('<img{}>', flatatt(img_attrs))
+
+    sources = variants.get('sources') or {}
+    available = [(mime_type, sources[fmt]) for fmt, mime_type in SOURCE_TYPES if sources.get(fmt)]
+    if not available:
+        return img
+    return format_html(
+        '<picture>{}{}</picture>',
+        format_html_join('', '<source type="{}" srcset="{}" sizes="{}">', (
+            (mime_type, srcset(fieldfile.storage, files), sizes) for mime_type, files in available
+        )),
+        img,
+    )
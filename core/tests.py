@@ -1,4 +1,870 @@
-from django.test import TestCase
+"""
+Тесты приложения core
 
-# Create your tests here.
+Запуск: python manage.py test core
+В режиме тестов settings.py подключает LocMemCache вместо файлового кеша,
+а Django — почтовый бэкенд locmem, поэтому тесты ничего не пишут в
+tmp/cache и не отправляют писем.
+"""
+import importlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import unquote, urlsplit
+from urllib.request import Request, urlopen
 
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import notifications, telegram
+from .search import _fts5_query, search_publications
+from .counters import flush_view_counts, record_view
+from .models import BlogPost, Book, Category, EditorUpload, Outbox, PendingView, Profile, Publication, Tag
+from .pagination import KeysetPaginator
+from .direct_uploads import DirectUploadFileField, presigned_upload, upload_directory
+from .storage_backends import MediaStorage, StaticStorage
+from .rendering import render_instance, render_rich_content, sanitize_html
+from .static_site import affected_pages, all_fingerprints
+
+
+class StubServer:
+    """
+    HTTP-сервер в отдельном потоке для тестов клиентов внешних API
+
+    handler(request) получает StubRequest и возвращает (статус, заголовки,
+    тело); все запросы сохраняются в requests.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self.connections = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def handle_request(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                request = StubRequest(self.command, self.path, dict(self.headers), self.rfile.read(length))
+                stub.requests.append(request)
+                stub.connections.add(self.client_address)
+                status, headers, body = stub.handler(request)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            do_GET = do_HEAD = do_PUT = do_POST = do_DELETE = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubRequest:
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+def json_response(data, status=200):
+    return status, {'Content-Type': 'application/json'}, json.dumps(data).encode('utf-8')
+
+
+class S3Stub(StubServer):
+    """
+    S3-совместимое хранилище в памяти (path-style: /<bucket>/<ключ>)
+
+    Поддерживает PUT, GET, HEAD и DELETE объектов — этого достаточно для
+    S3Boto3Storage без листинга. Подписи не проверяются.
+    """
+    bucket = 'test-bucket'
+
+    def __init__(self):
+        self.objects = {}
+        super().__init__(self.handle)
+
+    def handle(self, request):
+        bucket, _, key = unquote(urlsplit(request.path).path).lstrip('/').partition('/')
+        if bucket != self.bucket or not key:
+            return 400, {}, b''
+        if request.method == 'PUT':
+            self.objects[key] = request.body
+            return 200, {'ETag': '"stub"'}, b''
+        if request.method == 'DELETE':
+            self.objects.pop(key, None)
+            return 204, {}, b''
+        if key not in self.objects:
+            return 404, {'Content-Type': 'application/xml'}, b'<Error><Code>NoSuchKey</Code></Error>'
+        return 200, {'Content-Type': 'application/octet-stream', 'ETag': '"stub"'}, self.objects[key]
+
+    def storage(self, storage_class, **kwargs):
+        return storage_class(
+            bucket_name=self.bucket, endpoint_url=self.url, access_key='test', secret_key='test',
+            region_name='us-east-1', addressing_style='path', **kwargs
+        )
+
+
+class TemporaryMediaMixin:
+    """MEDIA_ROOT во временном каталоге: тесты не пишут файлы в media/ проекта"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+def image_file(width, height, format='JPEG'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'teal').save(buffer, format=format)
+    return ContentFile(buffer.getvalue())
+
+
+def create_post(slug, **fields):
+    fields.setdefault('title', slug.replace('-', ' ').title())
+    fields.setdefault('content', f'<p>{slug}</p>')
+    return BlogPost.objects.create(slug=slug, **fields)
+
+
+class ViewCounterTests(TestCase):
+    """Отложенный учёт просмотров (core/counters.py)"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_views_are_flushed_once(self):
+        post = create_post('counted-post')
+        for i in range(3):
+            record_view(BlogPost, post.slug)
+
+        self.assertEqual(PendingView.objects.get(model_name='blogpost', slug=post.slug).count, 3)
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 0)
+
+        self.assertEqual(flush_view_counts(), 3)
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 3)
+        self.assertFalse(PendingView.objects.exists())
+        self.assertEqual(flush_view_counts(), 0)
+
+    def test_models_are_counted_separately(self):
+        post = create_post('same-slug')
+        record_view(BlogPost, post.slug)
+        record_view(Book, post.slug)
+
+        self.assertEqual(PendingView.objects.count(), 2)
+        # Книги с таким slug нет: её просмотры отбрасываются
+        self.assertEqual(flush_view_counts(), 1)
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 1)
+        self.assertFalse(PendingView.objects.exists())
+
+    @override_settings(VIEW_COUNTERS_ENABLED=False)
+    def test_disabled(self):
+        record_view(BlogPost, 'anything')
+        self.assertFalse(PendingView.objects.exists())
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_cached_page_counts_views(self):
+        post = create_post('cached-post')
+        url = reverse('blog_detail', kwargs={'slug': post.slug})
+        for i in range(2):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.assertEqual(PendingView.objects.get(slug=post.slug).count, 2)
+
+    @override_settings(PAGE_CACHE_ENABLED=True, VIEW_COUNTER_FLUSH_INTERVAL=60)
+    @mock.patch('core.counters._ensure_flusher')
+    def test_buffered_views_skip_database(self, ensure_flusher):
+        post = create_post('buffered-post')
+        url = reverse('blog_detail', kwargs={'slug': post.slug})
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+            record_view(BlogPost, post.slug)
+        self.assertTrue(ensure_flusher.called)
+        self.assertFalse(PendingView.objects.exists())
+
+        self.assertEqual(flush_view_counts(), 3)
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 3)
+        self.assertEqual(flush_view_counts(), 0)
+
+
+class OutboxTests(TestCase):
+    """Отправка писем из очереди Outbox с повторными попытками"""
+
+    def queue(self, subject='Тема'):
+        return notifications.queue_mail(subject, 'Текст', ['patient@example.com'])
+
+    def test_sends_queued_mail(self):
+        message = self.queue()
+
+        self.assertEqual(notifications.process_outbox(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['patient@example.com'])
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('sent', 1))
+        self.assertIsNotNone(message.sent_at)
+        self.assertEqual(notifications.process_outbox(), (0, 0))
+
+    def test_failed_send_is_retried_later(self):
+        message = self.queue()
+        with mock.patch('core.notifications.EmailMessage.send', side_effect=OSError('SMTP недоступен')):
+            self.assertEqual(notifications.process_outbox(), (0, 1))
+
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('pending', 1))
+        self.assertEqual(message.last_error, 'SMTP недоступен')
+        self.assertGreater(message.next_attempt_at, timezone.now())
+        # До следующей попытки письмо не берётся
+        self.assertEqual(notifications.process_outbox(), (0, 0))
+
+        Outbox.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(notifications.process_outbox(), (1, 0))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error), ('sent', 2, ''))
+
+    def test_gives_up_after_max_attempts(self):
+        message = self.queue()
+        with mock.patch('core.notifications.EmailMessage.send', side_effect=OSError('SMTP недоступен')):
+            for attempt in range(2):
+                Outbox.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+                notifications.process_outbox(max_attempts=2)
+
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('failed', 2))
+
+    def test_one_failure_does_not_affect_other_messages(self):
+        first, second = self.queue('Первое'), self.queue('Второе')
+        original = notifications.EmailMessage.send
+
+        def send(email, *args, **kwargs):
+            if email.subject == 'Первое':
+                raise OSError('отказ')
+            return original(email, *args, **kwargs)
+
+        with mock.patch('core.notifications.EmailMessage.send', send):
+            self.assertEqual(notifications.process_outbox(), (1, 1))
+        self.assertEqual(Outbox.objects.get(pk=first.pk).status, 'pending')
+        self.assertEqual(Outbox.objects.get(pk=second.pk).status, 'sent')
+
+    def test_retry_delay_grows_up_to_limit(self):
+        self.assertEqual(notifications.retry_delay(1), notifications.RETRY_BASE_DELAY)
+        self.assertEqual(notifications.retry_delay(3), notifications.RETRY_BASE_DELAY * 4)
+        self.assertEqual(notifications.retry_delay(20), notifications.RETRY_MAX_DELAY)
+
+    def test_claimed_messages_wait_for_lease(self):
+        message = self.queue()
+        self.assertEqual([claimed.pk for claimed in notifications.claim_messages('email')], [message.pk])
+        self.assertEqual(Outbox.objects.get(pk=message.pk).status, 'sending')
+        # Письмо уже отправляет другой процесс
+        self.assertEqual(notifications.claim_messages('email'), [])
+        self.assertEqual(notifications.process_outbox(), (0, 0))
+
+        # Процесс упал: после окончания аренды письмо отправляется снова
+        Outbox.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(notifications.process_outbox(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class TelegramTests(TestCase):
+    """Клиент Bot API и объединение уведомлений Telegram (сервер-заглушка вместо api.telegram.org)"""
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, server):
+        return telegram.TelegramClient('TOKEN', api_url=f'{server.url}/tg')
+
+    def test_send_message_reuses_connection(self):
+        with StubServer(lambda request: json_response({'ok': True, 'result': {'message_id': 1}})) as server:
+            client = self.client_for(server)
+            self.assertEqual(client.send_message('42', 'Первое'), {'message_id': 1})
+            client.send_message('42', 'x' * 5000)
+            client.close()
+
+        first, second = server.requests
+        self.assertEqual(first.path, '/tg/botTOKEN/sendMessage')
+        self.assertEqual(first.json()['chat_id'], '42')
+        self.assertEqual(first.json()['text'], 'Первое')
+        self.assertEqual(len(second.json()['text']), telegram.MAX_MESSAGE_LENGTH)
+        self.assertEqual(len(server.connections), 1)
+
+    def test_errors(self):
+        responses = iter([
+            json_response({'ok': False, 'description': 'Too Many Requests', 'parameters': {'retry_after': 7}}, 429),
+            json_response({'ok': False, 'description': 'Bad Request: chat not found'}, 400),
+        ])
+        with StubServer(lambda request: next(responses)) as server:
+            client = self.client_for(server)
+            with self.assertRaises(telegram.TelegramError) as limited:
+                client.send_message('42', 'текст')
+            with self.assertRaises(telegram.TelegramError) as failed:
+                client.send_message('42', 'текст')
+            client.close()
+
+        self.assertEqual(limited.exception.retry_after, 7)
+        self.assertIsNone(failed.exception.retry_after)
+        self.assertEqual(str(failed.exception), 'Bad Request: chat not found')
+
+    def process(self, server):
+        with override_settings(TELEGRAM_BOT_TOKEN='TOKEN', TELEGRAM_CHAT_ID='42', TELEGRAM_API_URL=server.url):
+            for subject in ('Заказ 1', 'Заказ 2'):
+                notifications.queue_telegram(subject, f'Новый {subject}')
+            result = notifications.process_telegram_outbox()
+            telegram.get_client().close()
+        return result
+
+    def test_notifications_are_coalesced(self):
+        with StubServer(lambda request: json_response({'ok': True, 'result': {}})) as server:
+            self.assertEqual(self.process(server), (2, 0))
+
+        request, = server.requests
+        text = request.json()['text']
+        self.assertTrue(text.startswith('Новых уведомлений: 2'))
+        self.assertIn('Новый Заказ 1', text)
+        self.assertIn('Новый Заказ 2', text)
+        self.assertEqual(set(Outbox.objects.values_list('status', flat=True)), {'sent'})
+
+    def test_rate_limit_postpones_without_attempt(self):
+        response = json_response({'ok': False, 'description': 'Too Many Requests', 'parameters': {'retry_after': 30}}, 429)
+        with StubServer(lambda request: response) as server:
+            self.assertEqual(self.process(server), (0, 0))
+
+        self.assertEqual(set(Outbox.objects.values_list('status', 'attempts')), {('pending', 0)})
+        self.assertIsNotNone(cache.get(notifications.TELEGRAM_NEXT_SEND_KEY))
+
+
+class PublicationSearchTests(TestCase):
+    """Полнотекстовый поиск по публикациям (FTS5 на SQLite)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.prostate = Publication.objects.create(
+            title='Диагностика простатита', authors='Максудов А.А.', year=2020,
+            keywords='урология', abstract='Современные методы лечения.',
+        )
+        cls.stones = Publication.objects.create(
+            title='Мочекаменная болезнь', authors='Иванов И.И.', year=2021,
+            keywords='литотрипсия', abstract='Обзор. Диагностика упоминается в аннотации.',
+        )
+
+    def search(self, query):
+        return list(search_publications(Publication.objects.all(), query))
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(_fts5_query('простатит'), '"простатит"*')
+        self.assertEqual(_fts5_query('"a" OR b* NEAR(c) -d'), '"a"* "OR"* "b"* "NEAR"* "c"* "d"*')
+        self.assertEqual(_fts5_query('\'"*():^'), '')
+
+    def test_operators_are_searched_as_words(self):
+        for query in ('"', 'title:урология', 'NEAR(a b)', 'a AND', '*', '(((', "'; DROP TABLE core_publication; --"):
+            with self.subTest(query=query):
+                self.search(query)
+        self.assertEqual(Publication.objects.count(), 2)
+        self.assertEqual(self.search('!!!'), [])
+
+    def test_prefix_match_ranked_by_field(self):
+        self.assertEqual(self.search('простат'), [self.prostate])
+        # Совпадение в названии важнее совпадения в аннотации
+        self.assertEqual(self.search('диагност'), [self.prostate, self.stones])
+        self.assertEqual(self.search('литотрипсия'), [self.stones])
+
+    def test_index_follows_updates(self):
+        Publication.objects.filter(pk=self.stones.pk).update(keywords='уретероскопия')
+        self.assertEqual(self.search('литотрипсия'), [])
+        self.assertEqual(self.search('уретероскоп'), [self.stones])
+
+
+class KeysetPaginationTests(TestCase):
+    """Постраничный вывод по курсору (core/pagination.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        published = timezone.now() - timedelta(days=1)
+        created = timezone.now()
+        # Одинаковые даты и NULL в published_at: порядок задаёт первичный ключ
+        dates = [published, published, published, published - timedelta(days=1), None, None, None]
+        for index, date in enumerate(dates):
+            create_post(f'post-{index}', published_at=date)
+        BlogPost.objects.update(created_at=created)
+        cls.expected = list(BlogPost.objects.order_by('-published_at', '-created_at', 'pk'))
+
+    def pages(self, per_page=3):
+        paginator = KeysetPaginator(BlogPost.objects.all(), per_page)
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        return paginator, pages
+
+    def test_forward_walk_visits_every_post_once(self):
+        paginator, pages = self.pages()
+        self.assertEqual([post for page in pages for post in page], self.expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertFalse(pages[0].has_previous())
+        self.assertTrue(pages[-1].has_previous())
+
+    def test_previous_cursor_returns_previous_page(self):
+        paginator, pages = self.pages()
+        for previous, page in zip(pages, pages[1:]):
+            self.assertEqual(list(paginator.get_page(page.previous_cursor)), list(previous))
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator, pages = self.pages()
+        for cursor in ('garbage', 'WyJuIl0', pages[1].next_cursor[:-3]):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(list(paginator.get_page(cursor)), list(pages[0]))
+
+    def test_blog_links_use_cursor(self):
+        first = self.client.get(reverse('blog'))
+        cursor = first.context['page_obj'].next_cursor
+        self.assertIsNotNone(cursor)
+
+        second = self.client.get(reverse('blog'), {'cursor': cursor})
+        self.assertEqual(second.status_code, 200)
+        self.assertTrue(second.context['page_obj'].is_cursor)
+        self.assertEqual(list(second.context['page_obj']), self.expected[6:])
+
+
+class SanitizerTests(TestCase):
+    """Очистка HTML из редактора и текст для анонса (core/rendering.py)"""
+
+    def test_scripts_and_handlers_are_removed(self):
+        html, text = sanitize_html('<p onclick="steal()">Привет <b>мир</b></p><script>alert(1)</script>')
+        self.assertEqual(html, '<p>Привет <b>мир</b></p>')
+        self.assertEqual(text, 'Привет мир')
+
+    def test_unsafe_urls_are_removed(self):
+        html, text = sanitize_html(
+            '<a href="javascript:alert(1)">a</a><a href=" JaVa\tscript:x">b</a>'
+            '<a href="https://example.com" target="_blank">c</a>'
+        )
+        self.assertNotIn('script:', html.lower())
+        self.assertIn('<a href="https://example.com" target="_blank" rel="noopener noreferrer">c</a>', html)
+
+        html, text = sanitize_html('<iframe src="http://example.com/"></iframe><iframe src="https://example.com/v"></iframe>')
+        self.assertNotIn('http://example.com', html)
+        self.assertIn('src="https://example.com/v"', html)
+
+    def test_unsafe_styles_and_unknown_tags(self):
+        html, text = sanitize_html(
+            '<div style="background:url(x)">d</div><p style="color:red">e</p>'
+            '<form><input name="q"></form><unknown>f</unknown><style>p{}</style>'
+        )
+        self.assertEqual(html, '<div>d</div><p style="color:red">e</p>f')
+        self.assertEqual(text, 'd e f')
+
+    def test_escaped_styles_are_removed(self):
+        for style in ('background:u\\72l(x)', 'background:u\\rl(x)', 'background:u/**/rl(x)',
+                      'width:e\\78pression(alert(1))', 'background:\\75 \\72 \\6c (x)'):
+            with self.subTest(style=style):
+                html, text = sanitize_html(f'<p style="{style}">x</p>')
+                self.assertEqual(html, '<p>x</p>')
+        html, text = sanitize_html('<p style="font-family:\\5b8b\\4f53">x</p>')
+        self.assertIn('style=', html)
+
+    def test_malformed_urls_are_removed(self):
+        html, text = sanitize_html(
+            '<p><a href="http://[oops">x</a><img src="/a.jpg" srcset="http://[bad 1x, /b.jpg 2x"></p>'
+        )
+        self.assertEqual(html, '<p><a>x</a><img src="/a.jpg"></p>')
+
+        post = create_post('malformed-url', content='<p><a href="http://[oops">x</a></p>')
+        self.assertEqual(post.content_html_ru, '<p><a>x</a></p>')
+
+    def test_entities_are_kept_escaped(self):
+        html, text = sanitize_html('<p>x &amp; y &lt;script&gt;</p>')
+        self.assertEqual(html, '<p>x &amp; y &lt;script&gt;</p>')
+        self.assertEqual(text, 'x & y <script>')
+
+    @override_settings(READING_WORDS_PER_MINUTE=100)
+    def test_rendered_fields_on_save(self):
+        post = create_post(
+            'rendered', content='<p>слово ' * 250 + '</p><script>x</script>', excerpt='',
+            content_uz='<p>bir ikki</p>',
+        )
+        self.assertNotIn('<script>', post.content_html_ru)
+        self.assertEqual((post.word_count_ru, post.reading_time_ru), (250, 3))
+        self.assertEqual((post.word_count_uz, post.reading_time_uz), (2, 1))
+        self.assertTrue(post.summary_ru.endswith('…'))
+        self.assertEqual(len(post.summary_ru.split()), 20)
+
+    def test_language_without_text_uses_russian_counts(self):
+        post = create_post('ru-only', content='<p>' + 'слово ' * 400 + '</p>')
+        render_instance(post)
+        self.assertEqual(post.word_count_uz_cyrl, 400)
+        self.assertEqual(post.reading_time_uz_cyrl, post.reading_time_ru)
+
+
+class ImageDimensionsTests(TemporaryMediaMixin, TestCase):
+    """Размеры загруженного изображения сохраняются вместе с записью, копии и LQIP — позже"""
+
+    def upload(self, width, height):
+        content = image_file(width, height)
+        content.name = 'photo.jpg'
+        return content
+
+    def test_dimensions_are_read_on_save(self):
+        post = BlogPost(title='Photo', slug='photo', content='<p>x</p>', featured_image=self.upload(800, 600))
+        with mock.patch('django.core.files.storage.Storage.open', side_effect=AssertionError('файл читается из хранилища')):
+            with self.captureOnCommitCallbacks(execute=True):
+                post.save()
+
+        post = BlogPost.objects.get(pk=post.pk)
+        self.assertEqual((post.featured_image_width, post.featured_image_height), (800, 600))
+        self.assertEqual(post.featured_image_variants, {'pending': True})
+        self.assertEqual(post.featured_image_lqip, '')
+
+    def test_replaced_image_with_update_fields(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = create_post('replaced', featured_image=self.upload(800, 600))
+        post.featured_image = self.upload(300, 400)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save(update_fields=['featured_image'])
+
+        post.refresh_from_db()
+        self.assertEqual((post.featured_image_width, post.featured_image_height), (300, 400))
+
+        post.featured_image = None
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        post.refresh_from_db()
+        self.assertEqual((post.featured_image_width, post.featured_image_height), (None, None))
+
+
+@override_settings(IMAGE_VARIANT_WIDTHS=[320, 640], IMAGE_VARIANT_FORMATS=['avif', 'webp'])
+class EditorImageTests(TemporaryMediaMixin, TestCase):
+    """Изображения из редактора: размеры при сохранении, <picture> с копиями AVIF/WebP после generate_image_variants"""
+
+    def setUp(self):
+        super().setUp()
+        self.name = default_storage.save('uploads/2026/10/photo.jpg', image_file(800, 600))
+        self.src = default_storage.url(self.name)
+        self.record = EditorUpload.objects.create(
+            path=self.name, filename='photo.jpg', width=800, height=600, is_image=True
+        )
+
+    def generate(self):
+        call_command('generate_image_variants', stdout=io.StringIO())
+
+    def test_pending_image_gets_size_without_storage_access(self):
+        with mock.patch('django.core.files.storage.Storage.exists', side_effect=AssertionError), \
+                mock.patch('core.rendering.generate_variants', side_effect=AssertionError), \
+                self.assertNumQueries(1):
+            html = render_rich_content(f'<p><img src="{self.src}" alt="Снимок"><img src="{self.src}"></p>')
+        self.assertEqual(html, (
+            f'<p><img src="{self.src}" alt="Снимок" loading="lazy" decoding="async" width="800" height="600">'
+            f'<img src="{self.src}" loading="lazy" decoding="async" width="800" height="600"></p>'
+        ))
+
+    def test_command_builds_picture(self):
+        post = create_post('with-photo', content=f'<p><img src="{self.src}" alt="Снимок" style="width:500px"></p>')
+        self.assertNotIn('<picture>', post.content_html_ru)
+
+        self.generate()
+        post.refresh_from_db()
+        html = post.content_html_ru
+        self.assertTrue(html.startswith('<p><picture><source type="image/avif" srcset="'))
+        self.assertIn('photo.320w.avif 320w, ', html)
+        self.assertIn('photo.640w.webp 640w"', html)
+        self.assertIn('sizes="500px"', html)
+        self.assertIn('width="800" height="600"', html)
+        self.assertIn('loading="lazy" decoding="async"', html)
+        self.assertIn('alt="Снимок"', html)
+        for width in (320, 640):
+            for fmt in ('avif', 'webp'):
+                self.assertTrue(default_storage.exists(f'uploads/2026/10/photo.{width}w.{fmt}'))
+
+    def test_existing_variants_are_reused(self):
+        self.generate()
+        EditorUpload.objects.update(variants={})
+        with mock.patch('core.rendering.generate_variants') as generate:
+            self.generate()
+        generate.assert_not_called()
+        self.assertIn('webp', EditorUpload.objects.get().variants['sources'])
+
+        html = render_rich_content(f'<img src="{self.src}" width="400">')
+        self.assertIn('sizes="400px"', html)
+        self.assertIn('width="400"', html)
+        self.assertNotIn('height=', html)
+
+    def test_other_images_only_get_lazy_loading(self):
+        for src in ('https://example.com/photo.jpg', default_storage.url('uploads/missing.jpg')):
+            with self.subTest(src=src):
+                self.assertEqual(render_rich_content(f'<img src="{src}">'), f'<img src="{src}" loading="lazy" decoding="async">')
+
+    def test_post_content_is_sanitized_on_save(self):
+        post = create_post('with-photo', content=f'<p><img src="{self.src}" onerror="x()"></p>')
+        self.assertIn('width="800"', post.content_html_ru)
+        self.assertNotIn('onerror', post.content_html_ru)
+
+
+class AffectedPagesTests(TestCase):
+    """Страницы, которые инкрементальный экспорт перерисовывает после изменений (core/static_site.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.urology, cls.andrology = Category.objects.create(name='Urology'), Category.objects.create(name='Andrology')
+        cls.post = create_post('first', category=cls.urology)
+        cls.sibling = create_post('sibling', category=cls.urology)
+        cls.other = create_post('other', category=cls.andrology)
+        cls.draft = create_post('draft', category=cls.urology, is_published=False)
+        cls.book = Book.objects.create(title='Prostate Health', slug='prostate-health', publication_year=2020)
+        cls.same_year = Book.objects.create(title='Kidney Stones', slug='kidney-stones', publication_year=2020, author='Other')
+        cls.unrelated = Book.objects.create(title='Andrology', slug='andrology', publication_year=2010, author='Other')
+
+    def affected(self, change):
+        old = all_fingerprints()
+        change()
+        return affected_pages(old, all_fingerprints())
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.affected(lambda: None), set())
+
+    def test_view_counters_are_ignored(self):
+        self.assertEqual(self.affected(lambda: BlogPost.objects.update(views_count=10)), set())
+
+    def test_post_change_affects_its_category(self):
+        def change():
+            self.post.title = 'Renamed'
+            self.post.save()
+
+        self.assertEqual(self.affected(change), {
+            ('index', None), ('blog', None), ('blog_detail', 'first'), ('blog_detail', 'sibling'),
+        })
+
+    def test_deleted_post_affects_every_post(self):
+        pages = self.affected(lambda: BlogPost.objects.filter(pk=self.other.pk).delete())
+        self.assertEqual(pages, {
+            ('index', None), ('blog', None), ('blog_detail', 'first'), ('blog_detail', 'sibling'),
+        })
+
+    def test_book_change_affects_related_books(self):
+        def change():
+            self.book.price = '100000'
+            self.book.save()
+
+        self.assertEqual(self.affected(change), {
+            ('index', None), ('books', None), ('book_detail', 'prostate-health'), ('book_detail', 'kidney-stones'),
+        })
+
+    def test_profile_change_affects_everything(self):
+        def change():
+            Profile.objects.create(
+                full_name='Dr', education='-', bio='-', specialization='-', languages='ru',
+                email='doctor@example.com', phone='+998',
+            )
+
+        self.assertIsNone(self.affected(change))
+
+
+class SyncStaticTests(TestCase):
+    """Загрузка изменившейся статики в S3-совместимое хранилище (команда sync_static)"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.source = os.path.join(self.root, 'static')
+        os.makedirs(self.source)
+        self.write_source('app.css', 'body { color: red; }')
+        self.write_source('old.js', 'console.log(1);')
+
+        settings_override = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+            STATIC_BUILD_ROOT=os.path.join(self.root, 'build'),
+            STATIC_SYNC_MANIFEST=os.path.join(self.root, 'sync-manifest.json'),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.s3 = S3Stub().__enter__()
+        self.addCleanup(self.s3.__exit__)
+        patcher = mock.patch(
+            'core.management.commands.sync_static.storages', {'staticfiles': self.s3.storage(StaticStorage)}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_source(self, name, content):
+        path = os.path.join(self.source, name)
+        modified = os.stat(path).st_mtime + 10 if os.path.exists(path) else None
+        with open(path, 'w') as f:
+            f.write(content)
+        if modified:
+            # collectstatic сравнивает время изменения с точностью до секунды
+            os.utime(path, (modified, modified))
+
+    def sync(self, **options):
+        call_command('sync_static', workers=2, stdout=io.StringIO(), **options)
+
+    def uploads(self):
+        return [request.path for request in self.s3.requests if request.method == 'PUT']
+
+    def test_uploads_build_without_compressed_copies(self):
+        self.sync()
+        keys = set(self.s3.objects)
+        self.assertIn('static/app.css', keys)
+        self.assertIn('static/staticfiles.json', keys)
+        self.assertTrue(any(key.startswith('static/app.') and key.endswith('.css') and key != 'static/app.css'
+                            for key in keys))
+        self.assertFalse([key for key in keys if key.endswith(('.br', '.gz'))])
+
+    def test_second_run_uploads_only_changed_files(self):
+        self.sync()
+        self.s3.requests.clear()
+        self.sync()
+        self.assertEqual(self.uploads(), [])
+
+        self.write_source('app.css', 'body { color: blue; }')
+        self.sync()
+        uploaded = {unquote(path).split('/', 2)[2] for path in self.uploads()}
+        self.assertIn('static/app.css', uploaded)
+        self.assertIn('static/staticfiles.json', uploaded)
+        self.assertNotIn('static/old.js', uploaded)
+
+    def test_delete_removes_files_gone_from_project(self):
+        self.sync()
+        self.assertTrue(any(key.startswith('static/old.') for key in self.s3.objects))
+
+        os.remove(os.path.join(self.source, 'old.js'))
+        self.sync(delete=True)
+        self.assertFalse([key for key in self.s3.objects if key.startswith('static/old.')])
+        self.assertFalse([
+            name for name in os.listdir(os.path.join(self.root, 'build')) if name.startswith('old.')
+        ])
+        self.assertIn('static/app.css', self.s3.objects)
+
+
+class DirectUploadTests(TestCase):
+    """Загрузка файлов из админки напрямую в S3-совместимое хранилище (core/direct_uploads.py)"""
+
+    def setUp(self):
+        self.s3 = S3Stub().__enter__()
+        self.addCleanup(self.s3.__exit__)
+        self.field = Book._meta.get_field('pdf_file')
+        patcher = mock.patch.object(self.field, 'storage', self.s3.storage(MediaStorage))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.form_field = DirectUploadFileField(model_field=self.field)
+
+    def put(self, upload, body):
+        request = Request(upload['url'], data=body, headers=upload['headers'], method='PUT')
+        with urlopen(request) as response:
+            return response.status
+
+    def test_presigned_put_and_form_key(self):
+        upload = presigned_upload(self.field, 'book.pdf', 'application/pdf')
+        self.assertEqual(upload['key'], 'books/pdfs/book.pdf')
+        self.assertEqual(upload['headers']['Content-Type'], 'application/pdf')
+        self.assertEqual(upload['headers']['Cache-Control'], MediaStorage.object_parameters['CacheControl'])
+
+        self.assertEqual(self.put(upload, b'%PDF-1.4'), 200)
+        self.assertEqual(self.s3.objects['media/books/pdfs/book.pdf'], b'%PDF-1.4')
+        self.assertEqual(self.form_field.to_python(upload['key']), upload['key'])
+
+    def test_existing_name_is_not_overwritten(self):
+        self.s3.objects['media/books/pdfs/book.pdf'] = b'old'
+        upload = presigned_upload(self.field, 'book.pdf', 'application/pdf')
+        self.assertNotEqual(upload['key'], 'books/pdfs/book.pdf')
+        self.assertTrue(upload['key'].startswith('books/pdfs/book_'))
+
+    def test_missing_object_is_rejected(self):
+        with self.assertRaises(ValidationError) as context:
+            self.form_field.to_python('books/pdfs/missing.pdf')
+        self.assertEqual(context.exception.code, 'missing')
+
+    def test_key_outside_upload_directory_is_rejected(self):
+        self.s3.objects['media/books/covers/cover.pdf'] = b'x'
+        self.s3.objects['media/secret.pdf'] = b'x'
+        directory = upload_directory(self.field)
+        for key in ('books/covers/cover.pdf', f'{directory}/../../secret.pdf', f'{directory}//book.pdf', 'secret.pdf'):
+            with self.subTest(key=key), self.assertRaises(ValidationError) as context:
+                self.form_field.to_python(key)
+            self.assertEqual(context.exception.code, 'invalid')
+
+
+class BlogFeedTests(TestCase):
+    """Описание статей в RSS блога"""
+
+    def test_summary_is_used_without_excerpt(self):
+        create_post('with-excerpt', content='<p>Полный текст статьи</p>', excerpt='Краткое описание')
+        create_post('without-excerpt', content='<p>Текст <b>без</b> анонса</p>', excerpt='')
+
+        content = self.client.get(reverse('blog_feed_rss')).content.decode()
+        self.assertIn('<description>Краткое описание</description>', content)
+        self.assertIn('<description>Текст без анонса</description>', content)
+
+
+class PdfDownloadTests(TemporaryMediaMixin, TestCase):
+    """Отдача PDF из локального хранилища (core/downloads.py)"""
+
+    def test_missing_file_is_not_found(self):
+        publication = Publication.objects.create(title='Без файла', authors='Максудов А.А.', year=2020)
+        Publication.objects.filter(pk=publication.pk).update(pdf_file='publications/missing.pdf')
+
+        response = self.client.get(reverse('publication_pdf', kwargs={'pk': publication.pk}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_range_request(self):
+        publication = Publication.objects.create(title='С файлом', authors='Максудов А.А.', year=2020)
+        name = default_storage.save('publications/article.pdf', ContentFile(b'%PDF-1.4 content'))
+        Publication.objects.filter(pk=publication.pk).update(pdf_file=name)
+
+        response = self.client.get(reverse('publication_pdf', kwargs={'pk': publication.pk}), HTTP_RANGE='bytes=0-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF')
+
+
+class TaxonomySlugTests(TestCase):
+    """Одинаковые латинские slug категорий и тегов, откуда бы они ни создавались"""
+
+    def test_migration_matches_admin(self):
+        migration = importlib.import_module('core.migrations.0008_migrate_blog_categories_and_tags')
+        for name in ('Мочекаменная болезнь', 'Ўзбекистон', '!!!'):
+            with self.subTest(name=name):
+                self.assertEqual(migration._unique_slug(Tag, name), Tag.objects.create(name=name).slug)
+                Tag.objects.all().delete()
+
+    def test_demo_data_uses_transliterated_slugs(self):
+        call_command('populate_demo_data', stdout=io.StringIO())
+        self.assertEqual(Category.objects.get(name='Лечение').slug, 'lechenie')
+        self.assertFalse([slug for slug in Tag.objects.values_list('slug', flat=True) if not slug.isascii()])
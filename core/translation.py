@@ -5,7 +5,7 @@ Languages: Russian, Uzbek (Latin), Uzbek (Cyrillic)
 from modeltranslation.translator import translator, TranslationOptions
 from .models import (
     Profile, Service, ServiceImage, ServiceReview, Publication, Project, BlogPost,
-    Achievement, Testimonial, Book
+    Category, Tag, Achievement, Testimonial, Book
 )
 
 
@@ -20,7 +20,7 @@ class ServiceTranslationOptions(TranslationOptions):
 
 
 class PublicationTranslationOptions(TranslationOptions):
-    fields = ('title', 'authors', 'abstract', 'keywords')
+    fields = ('title', 'authors', 'abstract', 'abstract_html', 'summary', 'word_count', 'reading_time', 'keywords')
     required_languages = ('ru',)
 
 
@@ -30,7 +30,17 @@ class ProjectTranslationOptions(TranslationOptions):
 
 
 class BlogPostTranslationOptions(TranslationOptions):
-    fields = ('title', 'excerpt', 'content', 'category', 'tags')
+    fields = ('title', 'excerpt', 'content', 'content_html', 'summary', 'word_count', 'reading_time')
+    required_languages = ('ru',)
+
+
+class CategoryTranslationOptions(TranslationOptions):
+    fields = ('name',)
+    required_languages = ('ru',)
+
+
+class TagTranslationOptions(TranslationOptions):
+    fields = ('name',)
     required_languages = ('ru',)
 
 
@@ -45,7 +55,7 @@ class TestimonialTranslationOptions(TranslationOptions):
 
 
 class BookTranslationOptions(TranslationOptions):
-    fields = ('title', 'author', 'description', 'short_description')
+    fields = ('title', 'author', 'description', 'description_html', 'summary', 'word_count', 'reading_time', 'short_description')
     required_languages = ('ru',)
 
 
@@ -67,6 +77,8 @@ translator.register(ServiceImage, ServiceImageTranslationOptions)
 translator.register(Publication, PublicationTranslationOptions)
 translator.register(Project, ProjectTranslationOptions)
 translator.register(BlogPost, BlogPostTranslationOptions)
+translator.register(Category, CategoryTranslationOptions)
+translator.register(Tag, TagTranslationOptions)
 translator.register(Achievement, AchievementTranslationOptions)
 translator.register(Testimonial, TestimonialTranslationOptions)
 translator.register(Book, BookTranslationOptions)
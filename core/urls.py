@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import feeds, views
 
 urlpatterns = [
     path('', views.index, name='index'),
@@ -9,10 +9,16 @@ urlpatterns = [
     path('portfolio/', views.portfolio, name='portfolio'),
     path('publications/', views.publications, name='publications'),
     path('publications/<int:pk>/', views.publication_detail, name='publication_detail'),
+    path('publications/<int:pk>/pdf/', views.publication_pdf, name='publication_pdf'),
+    path('publications/feed/rss/', feeds.publications_rss, name='publications_feed_rss'),
+    path('publications/feed/atom/', feeds.publications_atom, name='publications_feed_atom'),
     path('blog/', views.blog, name='blog'),
+    path('blog/feed/rss/', feeds.blog_rss, name='blog_feed_rss'),
+    path('blog/feed/atom/', feeds.blog_atom, name='blog_feed_atom'),
     path('blog/<slug:slug>/', views.blog_detail, name='blog_detail'),
     path('books/', views.books, name='books'),
     path('books/<slug:slug>/', views.book_detail, name='book_detail'),
+    path('books/<slug:slug>/pdf/', views.book_pdf, name='book_pdf'),
     path('contact/', views.contact, name='contact'),
     path('order/', views.order_service, name='order_service'),
     path('order/<int:service_id>/', views.order_service, name='order_service_direct'),
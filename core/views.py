@@ -1,26 +1,33 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from django.core.mail import send_mail
-from django.conf import settings
-from django.db import models
-from django.db.models import Q
-from django.core.paginator import Paginator
-from django.http import HttpResponseNotFound, HttpResponseServerError
+from django.db import models, transaction
+from django.http import Http404, HttpResponseNotFound, HttpResponseServerError
+from django.views.decorators.http import require_safe
 from .models import (
-    Profile, Service, ServiceImage, ServiceReview, Publication, Project, BlogPost,
-    Achievement, Testimonial, Book, BookOrder
+    Service, ServiceImage, ServiceReview, Publication, Project, BlogPost,
+    Category, Tag, Achievement, Testimonial, Book, BookOrder
 )
 from .forms import ServiceOrderForm, ContactForm, BookOrderForm
+from .caching import public_page_cache, get_profile
+from .cards import cards
+from .counters import record_view
+from .downloads import serve_file
+from .pagination import paginate
+from .search import search_publications
+from .notifications import (
+    notify_service_order, notify_service_detail_order, notify_book_order, notify_contact_message
+)
 
 
+@public_page_cache
 def index(request):
     """Главная страница"""
-    profile = Profile.objects.first()
+    profile = get_profile()
     services = Service.objects.filter(is_active=True)[:6]
     publications = Publication.objects.filter(is_featured=True)[:3]
     testimonials = Testimonial.objects.filter(is_approved=True)[:3]
-    blog_posts = BlogPost.objects.filter(is_published=True)[:3]
-    books = Book.objects.filter(is_featured=True, is_available=True)[:3]
+    blog_posts = cards(BlogPost.objects.filter(is_published=True).select_related('category'))[:3]
+    books = cards(Book.objects.filter(is_featured=True, is_available=True))[:3]
     
     context = {
         'profile': profile,
@@ -33,9 +40,10 @@ def index(request):
     return render(request, 'index.html', context)
 
 
+@public_page_cache
 def about(request):
     """О враче"""
-    profile = Profile.objects.first()
+    profile = get_profile()
     achievements = Achievement.objects.all()[:10]
     
     context = {
@@ -45,6 +53,7 @@ def about(request):
     return render(request, 'about.html', context)
 
 
+@public_page_cache
 def services(request):
     """Услуги"""
     services_list = Service.objects.filter(is_active=True)
@@ -55,6 +64,7 @@ def services(request):
     return render(request, 'services.html', context)
 
 
+@public_page_cache
 def service_detail(request, pk):
     """Детальная страница услуги"""
     service = get_object_or_404(Service, pk=pk, is_active=True)
@@ -65,27 +75,11 @@ def service_detail(request, pk):
     if request.method == 'POST':
         form = ServiceOrderForm(request.POST)
         if form.is_valid():
-            order = form.save(commit=False)
-            order.service = service
-            order.save()
-            
-            # Отправка email
-            try:
-                send_mail(
-                    f'Новый заказ услуги: {service.title}',
-                    f'Получен новый заказ услуги "{service.title}"\n\n'
-                    f'Пациент: {order.full_name}\n'
-                    f'Email: {order.email}\n'
-                    f'Телефон: {order.phone}\n'
-                    f'Возраст: {order.age}\n'
-                    f'Желаемая дата: {order.preferred_date}\n'
-                    f'Сообщение: {order.message}',
-                    settings.EMAIL_HOST_USER,
-                    [settings.EMAIL_HOST_USER],
-                    fail_silently=False,
-                )
-            except:
-                pass
+            with transaction.atomic():
+                order = form.save(commit=False)
+                order.service = service
+                order.save()
+                notify_service_detail_order(order)
             
             messages.success(request, 'Ваш заказ успешно отправлен! Мы свяжемся с вами в ближайшее время.')
             return redirect('service_detail', pk=pk)
@@ -102,6 +96,7 @@ def service_detail(request, pk):
     return render(request, 'service_detail.html', context)
 
 
+@public_page_cache(query_params=('status',))
 def portfolio(request):
     """Портфолио - проекты"""
     projects_list = Project.objects.filter(is_active=True)
@@ -119,6 +114,7 @@ def portfolio(request):
     return render(request, 'portfolio.html', context)
 
 
+@public_page_cache(query_params=('type', 'year', 'search', 'page', 'cursor'))
 def publications(request):
     """Публикации"""
     publications_list = Publication.objects.all()
@@ -132,19 +128,13 @@ def publications(request):
     if year:
         publications_list = publications_list.filter(year=year)
     
-    # Поиск
+    # Полнотекстовый поиск с сортировкой по релевантности
     search = request.GET.get('search')
     if search:
-        publications_list = publications_list.filter(
-            Q(title__icontains=search) |
-            Q(authors__icontains=search) |
-            Q(keywords__icontains=search)
-        )
+        publications_list = search_publications(publications_list, search)
     
-    # Пагинация
-    paginator = Paginator(publications_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Пагинация: по номеру страницы или по курсору
+    page_obj = paginate(request, publications_list, 10)
     
     # Получаем уникальные годы для фильтра
     years = Publication.objects.values_list('year', flat=True).distinct().order_by('-year')
@@ -159,6 +149,7 @@ def publications(request):
     return render(request, 'publications.html', context)
 
 
+@public_page_cache
 def publication_detail(request, pk):
     """Детальная страница публикации"""
     publication = get_object_or_404(Publication, pk=pk)
@@ -169,46 +160,73 @@ def publication_detail(request, pk):
     return render(request, 'publication_detail.html', context)
 
 
+def _serve_pdf(request, obj, slug):
+    """PDF записи: линеаризованная копия, если она есть, иначе исходный файл"""
+    if not obj.pdf_file:
+        raise Http404
+    return serve_file(
+        request, obj.pdf_web_file or obj.pdf_file, filename=f'{slug}.pdf',
+        as_attachment='download' in request.GET,
+    )
+
+
+@require_safe
+def publication_pdf(request, pk):
+    """PDF публикации (Range, условные запросы)"""
+    publication = get_object_or_404(Publication.objects.only('pk', 'pdf_file', 'pdf_web_file'), pk=pk)
+    return _serve_pdf(request, publication, f'publication-{publication.pk}')
+
+
+@public_page_cache(query_params=('category', 'tag', 'page', 'cursor'))
 def blog(request):
     """Блог"""
-    posts_list = BlogPost.objects.filter(is_published=True)
+    posts_list = cards(BlogPost.objects.filter(is_published=True).select_related('category').prefetch_related('tags'))
     
     # Фильтрация по категории
     category = request.GET.get('category')
     if category:
-        posts_list = posts_list.filter(category=category)
+        posts_list = posts_list.filter(category__slug=category)
     
     # Фильтрация по тегу
     tag = request.GET.get('tag')
     if tag:
-        posts_list = posts_list.filter(tags__icontains=tag)
+        posts_list = posts_list.filter(tags__slug=tag)
     
-    # Пагинация
-    paginator = Paginator(posts_list, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Пагинация: по номеру страницы или по курсору
+    page_obj = paginate(request, posts_list, 6)
     
-    # Получаем уникальные категории
-    categories = BlogPost.objects.filter(is_published=True).values_list('category', flat=True).distinct()
+    # Категории и облако тегов (количество статей пересчитывается при сохранении)
+    categories = Category.objects.filter(posts_count__gt=0)
+    tags = Tag.objects.filter(posts_count__gt=0)
     
     context = {
         'page_obj': page_obj,
         'categories': categories,
+        'tags': tags,
         'current_category': category,
+        'current_tag': tag,
     }
     return render(request, 'blog.html', context)
 
 
+def _count_blog_view(request, slug):
+    record_view(BlogPost, slug)
+
+
+@public_page_cache(on_hit=_count_blog_view)
 def blog_detail(request, slug):
     """Детальная страница статьи блога"""
-    post = get_object_or_404(BlogPost, slug=slug, is_published=True)
+    post = get_object_or_404(
+        BlogPost.objects.select_related('category').prefetch_related('tags'),
+        slug=slug, is_published=True
+    )
     post.increment_views()
     
     # Похожие статьи
-    related_posts = BlogPost.objects.filter(
+    related_posts = cards(BlogPost.objects.filter(
         is_published=True,
         category=post.category
-    ).exclude(pk=post.pk)[:3]
+    ).exclude(pk=post.pk))[:3]
     
     context = {
         'post': post,
@@ -219,24 +237,14 @@ def blog_detail(request, slug):
 
 def contact(request):
     """Контакты"""
-    profile = Profile.objects.first()
+    profile = get_profile()
     
     if request.method == 'POST':
         form = ContactForm(request.POST)
         if form.is_valid():
-            contact_message = form.save()
-            
-            # Отправка email администратору
-            try:
-                send_mail(
-                    subject=f'Новое сообщение: {contact_message.subject}',
-                    message=f'От: {contact_message.name} ({contact_message.email})\n\n{contact_message.message}',
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[settings.ADMIN_EMAIL],
-                    fail_silently=False,
-                )
-            except Exception as e:
-                print(f"Email error: {e}")
+            with transaction.atomic():
+                contact_message = form.save()
+                notify_contact_message(contact_message)
             
             messages.success(request, 'Спасибо! Ваше сообщение успешно отправлено.')
             return redirect('contact')
@@ -260,29 +268,9 @@ def order_service(request, service_id=None):
     if request.method == 'POST':
         form = ServiceOrderForm(request.POST)
         if form.is_valid():
-            order = form.save()
-            
-            # Отправка email администратору
-            try:
-                age_info = f"Возраст: {order.age} лет\n" if order.age else ""
-                send_mail(
-                    subject=f'Новый заказ услуги: {order.service.title}',
-                    message=f'Пациент: {order.full_name}\nEmail: {order.email}\nТелефон: {order.phone}\n{age_info}\nОписание проблемы: {order.message}',
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[settings.ADMIN_EMAIL],
-                    fail_silently=False,
-                )
-                
-                # Отправка подтверждения пациенту
-                send_mail(
-                    subject='Подтверждение записи на прием',
-                    message=f'Здравствуйте, {order.full_name}!\n\nВаша заявка на услугу "{order.service.title}" принята. Мы свяжемся с вами в ближайшее время для подтверждения записи.\n\nС уважением,\nД-р Максудов Абдурахман',
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[order.email],
-                    fail_silently=False,
-                )
-            except Exception as e:
-                print(f"Email error: {e}")
+            with transaction.atomic():
+                order = form.save()
+                notify_service_order(order)
             
             messages.success(request, 'Спасибо! Ваша заявка успешно отправлена. Мы свяжемся с вами в ближайшее время.')
             return redirect('services')
@@ -305,19 +293,18 @@ def custom_500(request):
     return HttpResponseServerError(render(request, '500.html', status=500))
 
 
+@public_page_cache(query_params=('year', 'page', 'cursor'))
 def books(request):
     """Список книг"""
-    books_list = Book.objects.filter(is_available=True)
+    books_list = cards(Book.objects.filter(is_available=True))
     
     # Фильтрация по году
     year = request.GET.get('year')
     if year:
         books_list = books_list.filter(publication_year=year)
     
-    # Пагинация
-    paginator = Paginator(books_list, 9)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Пагинация: по номеру страницы или по курсору
+    page_obj = paginate(request, books_list, 9)
     
     # Получаем уникальные годы для фильтра
     years = Book.objects.values_list('publication_year', flat=True).distinct().order_by('-publication_year')
@@ -330,17 +317,22 @@ def books(request):
     return render(request, 'books.html', context)
 
 
+def _count_book_view(request, slug):
+    record_view(Book, slug)
+
+
+@public_page_cache(on_hit=_count_book_view)
 def book_detail(request, slug):
     """Детальная страница книги"""
     book = get_object_or_404(Book, slug=slug, is_available=True)
     book.increment_views()
     
     # Похожие книги (по автору или году)
-    related_books = Book.objects.filter(
+    related_books = cards(Book.objects.filter(
         is_available=True
     ).filter(
         models.Q(author=book.author) | models.Q(publication_year=book.publication_year)
-    ).exclude(pk=book.pk)[:3]
+    ).exclude(pk=book.pk))[:3]
     
     context = {
         'book': book,
@@ -349,6 +341,13 @@ def book_detail(request, slug):
     return render(request, 'book_detail.html', context)
 
 
+@require_safe
+def book_pdf(request, slug):
+    """PDF книги (Range, условные запросы)"""
+    book = get_object_or_404(Book.objects.only('pk', 'slug', 'pdf_file', 'pdf_web_file'), slug=slug, is_available=True)
+    return _serve_pdf(request, book, book.slug)
+
+
 def order_book(request, book_id=None):
     """Заказ книги"""
     initial_data = {}
@@ -359,31 +358,9 @@ def order_book(request, book_id=None):
     if request.method == 'POST':
         form = BookOrderForm(request.POST)
         if form.is_valid():
-            order = form.save()
-            
-            # Отправка email администратору
-            try:
-                total_price = order.get_total_price()
-                price_info = f"Общая стоимость: {total_price} ₽" if total_price else "Цена не указана"
-                
-                send_mail(
-                    subject=f'Новый заказ книги: {order.book.title}',
-                    message=f'Клиент: {order.full_name}\nEmail: {order.email}\nТелефон: {order.phone}\nАдрес: {order.address}\nКоличество: {order.quantity}\n{price_info}\n\nДополнительно: {order.message}',
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[settings.ADMIN_EMAIL],
-                    fail_silently=False,
-                )
-                
-                # Отправка подтверждения клиенту
-                send_mail(
-                    subject='Подтверждение заказа книги',
-                    message=f'Здравствуйте, {order.full_name}!\n\nВаш заказ книги "{order.book.title}" (количество: {order.quantity}) принят. Мы свяжемся с вами в ближайшее время для уточнения деталей доставки.\n\n{price_info}\n\nС уважением,\nД-р Максудов Абдурахман',
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[order.email],
-                    fail_silently=False,
-                )
-            except Exception as e:
-                print(f"Email error: {e}")
+            with transaction.atomic():
+                order = form.save()
+                notify_book_order(order)
             
             messages.success(request, f'Спасибо! Ваш заказ книги "{order.book.title}" успешно оформлен. Мы свяжемся с вами в ближайшее время.')
             return redirect('books')
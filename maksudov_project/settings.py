@@ -4,7 +4,7 @@ Django settings for maksudov_project project.
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -49,6 +49,7 @@ USE_R2_FOR_STATIC = config('USE_R2_FOR_STATIC', default=True, cast=bool) if USE_
 
 # Базовый список middleware
 MIDDLEWARE = [
+    'core.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -61,7 +62,7 @@ MIDDLEWARE = [
 
 # Добавляем WhiteNoise только если не используется R2 для статики
 if not (USE_R2_STORAGE and USE_R2_FOR_STATIC):
-    MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
+    MIDDLEWARE.insert(2, 'whitenoise.middleware.WhiteNoiseMiddleware')
 
 ROOT_URLCONF = 'maksudov_project.urls'
 
@@ -183,20 +184,23 @@ if USE_R2_STORAGE:
         else:
             STATIC_URL = f'{AWS_S3_ENDPOINT_URL}/{AWS_STORAGE_BUCKET_NAME}/static/'
         # Не используем STATIC_ROOT при использовании R2 для статики, но создаем директорию для избежания предупреждений
-        static_root_path = config('STATIC_ROOT', default=BASE_DIR / 'staticfiles')
+        static_root_path = config('STATIC_ROOT', default=BASE_DIR / 'staticfiles', cast=Path)
         if static_root_path and not static_root_path.exists():
             static_root_path.mkdir(parents=True, exist_ok=True)
         STATIC_ROOT = None
+        # Каталог сборки sync_static и манифест staticfiles.json для StaticStorage
+        STATIC_BUILD_ROOT = static_root_path
     else:
-        STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
-        STATIC_ROOT = config('STATIC_ROOT', default=BASE_DIR / 'staticfiles')
+        STATICFILES_STORAGE = 'core.storage_backends.CompressedStaticStorage'
+        STATIC_ROOT = STATIC_BUILD_ROOT = config('STATIC_ROOT', default=BASE_DIR / 'staticfiles', cast=Path)
         # Создаем директорию, если она не существует
         if STATIC_ROOT and not STATIC_ROOT.exists():
             STATIC_ROOT.mkdir(parents=True, exist_ok=True)
 else:
     MEDIA_URL = '/media/'
     MEDIA_ROOT = config('MEDIA_ROOT', default=BASE_DIR / 'media')
-    STATIC_ROOT = config('STATIC_ROOT', default=BASE_DIR / 'staticfiles')
+    STATICFILES_STORAGE = 'core.storage_backends.CompressedStaticStorage'
+    STATIC_ROOT = STATIC_BUILD_ROOT = config('STATIC_ROOT', default=BASE_DIR / 'staticfiles', cast=Path)
     # Создаем директорию, если она не существует
     if STATIC_ROOT and not STATIC_ROOT.exists():
         STATIC_ROOT.mkdir(parents=True, exist_ok=True)
@@ -205,6 +209,8 @@ else:
 # CKEditor Configuration
 CKEDITOR_UPLOAD_PATH = "uploads/"
 CKEDITOR_IMAGE_BACKEND = "pillow"
+# Файлов на странице окна выбора изображений (core/editor_uploads.py)
+EDITOR_BROWSE_PAGE_SIZE = config('EDITOR_BROWSE_PAGE_SIZE', default=60, cast=int)
 CKEDITOR_JQUERY_URL = 'https://ajax.googleapis.com/ajax/libs/jquery/2.2.4/jquery.min.js'
 
 CKEDITOR_CONFIGS = {
@@ -240,12 +246,100 @@ CKEDITOR_CONFIGS = {
     },
 }
 
+# Cache
+# Redis на хостинге нет, поэтому по умолчанию файловый кеш, общий для всех процессов Passenger
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'tmp' / 'cache')),
+        'TIMEOUT': 300,
+        # Файловый кеш удаляет треть записей, когда их больше MAX_ENTRIES
+        # (по умолчанию 300 — меньше, чем страниц сайта на трёх языках)
+        'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=5000, cast=int)},
+    }
+}
+
+# Загрузка статики командой sync_static (только изменившиеся файлы, см. команду)
+STATIC_SYNC_MANIFEST = config('STATIC_SYNC_MANIFEST', default=str(BASE_DIR / 'tmp' / 'static-sync-manifest.json'))
+STATIC_SYNC_WORKERS = config('STATIC_SYNC_WORKERS', default=16, cast=int)
+
+# Полностраничный кеш публичных страниц (сбрасывается сигналами моделей)
+PAGE_CACHE_ENABLED = config('PAGE_CACHE_ENABLED', default=not DEBUG, cast=bool)
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Списки статей и книг загружают только поля карточек (core/cards.py);
+# выключается для сравнения в benchmark_listings
+CARD_PROJECTIONS_ENABLED = config('CARD_PROJECTIONS_ENABLED', default=True, cast=bool)
+
+# Скорость чтения для оценки времени чтения статей (core/rendering.py)
+READING_WORDS_PER_MINUTE = config('READING_WORDS_PER_MINUTE', default=180, cast=int)
+
+# Статическая копия публичных страниц (export_static_site, core/static_site.py):
+# каталог для HTML-файлов и адрес сайта для абсолютных ссылок (og:url)
+STATIC_SITE_ROOT = config('STATIC_SITE_ROOT', default=BASE_DIR / 'static_site', cast=Path)
+STATIC_SITE_URL = config('STATIC_SITE_URL', default='')
+
+# Количество записей в лентах RSS/Atom блога и публикаций (core/feeds.py)
+FEED_ITEMS = config('FEED_ITEMS', default=20, cast=int)
+
+# Учёт просмотров статей и книг (выключается на время export_static_site и benchmark_listings)
+VIEW_COUNTERS_ENABLED = config('VIEW_COUNTERS_ENABLED', default=True, cast=bool)
+# Перенос счётчиков просмотров из памяти процесса в базу данных (секунды; 0 - каждый просмотр
+# сразу записывается в PendingView, а в views_count переносится командой flush_view_counts)
+VIEW_COUNTER_FLUSH_INTERVAL = config('VIEW_COUNTER_FLUSH_INTERVAL', default=60, cast=int)
+
+# Уменьшенные копии изображений (создаются при загрузке, см. core/images.py)
+IMAGE_VARIANT_WIDTHS = config('IMAGE_VARIANT_WIDTHS', default='320,640,960,1280', cast=Csv(int))
+IMAGE_VARIANT_FORMATS = config('IMAGE_VARIANT_FORMATS', default='avif,webp', cast=Csv())
+IMAGE_VARIANT_QUALITY = config('IMAGE_VARIANT_QUALITY', default=75, cast=int)
+
+# Превью первой страницы и линеаризованные копии PDF (см. core/documents.py)
+PDF_PREVIEW_WIDTH = config('PDF_PREVIEW_WIDTH', default=960, cast=int)
+PDF_LINEARIZE = config('PDF_LINEARIZE', default=True, cast=bool)
+QPDF_BINARY = config('QPDF_BINARY', default='qpdf')
+
+# Отдача PDF веб-сервером (локальное хранилище): '', 'x-accel-redirect' (nginx) или 'x-sendfile' (Apache)
+MEDIA_SENDFILE = config('MEDIA_SENDFILE', default='')
+# Внутренний location nginx, указывающий на MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_PREFIX = config('MEDIA_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+
+# Прямая загрузка больших файлов из админки в R2 (см. core/direct_uploads.py)
+DIRECT_UPLOAD_MAX_SIZE = config('DIRECT_UPLOAD_MAX_SIZE', default=2 * 1024 ** 3, cast=int)
+DIRECT_UPLOAD_EXPIRES = config('DIRECT_UPLOAD_EXPIRES', default=3600, cast=int)
+
+# Учёт SQL-запросов на каждый запрос: лог core.queries и заголовок Server-Timing
+QUERY_BUDGET_ENABLED = config('QUERY_BUDGET_ENABLED', default=DEBUG, cast=bool)
+QUERY_BUDGET_MAX_QUERIES = config('QUERY_BUDGET_MAX_QUERIES', default=20, cast=int)
+# Сколько одинаковых запросов (с разными параметрами) считать подозрением на N+1
+QUERY_BUDGET_DUPLICATE_THRESHOLD = config('QUERY_BUDGET_DUPLICATE_THRESHOLD', default=3, cast=int)
+# Выбрасывать исключение при превышении бюджета (чтобы падали тесты)
+QUERY_BUDGET_RAISE = config('QUERY_BUDGET_RAISE', default=False, cast=bool)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.queries': {
+            'handlers': ['console'],
+            'level': 'INFO' if DEBUG else 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 # Whitenoise configuration - добавляем только если не используется R2 для статики
 import sys
 # Проверяем, используется ли R2 для статики (определяется ниже в коде)
 # Если используется R2 для статики, WhiteNoise не нужен
 if 'test' in sys.argv:
     STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    CACHES['default'] = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    VIEW_COUNTER_FLUSH_INTERVAL = 0
+    QUERY_BUDGET_ENABLED = True
+    QUERY_BUDGET_RAISE = True
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -267,6 +361,9 @@ ADMIN_EMAIL = config('ADMIN_EMAIL', default='admin@example.com')
 # Telegram Bot Configuration
 TELEGRAM_BOT_TOKEN = config('TELEGRAM_BOT_TOKEN', default='')
 TELEGRAM_CHAT_ID = config('TELEGRAM_CHAT_ID', default='')
+TELEGRAM_API_URL = config('TELEGRAM_API_URL', default='https://api.telegram.org')
+# Уведомления, накопившиеся за интервал, отправляются одним сообщением (секунды)
+TELEGRAM_COALESCE_INTERVAL = config('TELEGRAM_COALESCE_INTERVAL', default=30, cast=int)
 
 # Security Settings for Production
 if not DEBUG:
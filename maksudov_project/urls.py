@@ -2,27 +2,24 @@
 URL configuration for maksudov_project project.
 """
 from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.i18n import i18n_patterns
 from django.conf.urls.static import static
-from django.contrib.sitemaps.views import sitemap
+from django.views.decorators.cache import never_cache
 from django.views.generic import TemplateView
-from core.sitemaps import StaticViewSitemap, BlogPostSitemap, PublicationSitemap, BookSitemap
-
-sitemaps = {
-    'static': StaticViewSitemap,
-    'blog': BlogPostSitemap,
-    'publications': PublicationSitemap,
-    'books': BookSitemap,
-}
+from core import editor_uploads, sitemaps
 
 # URLs that should not be localized
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('ckeditor/', include('ckeditor_uploader.urls')),
+    # Замена ckeditor_uploader.urls: загрузки записываются в индекс EditorUpload
+    path('ckeditor/upload/', staff_member_required(editor_uploads.upload), name='ckeditor_upload'),
+    path('ckeditor/browse/', never_cache(staff_member_required(editor_uploads.browse)), name='ckeditor_browse'),
     path('i18n/', include('django.conf.urls.i18n')),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', sitemaps.sitemap, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap-<str:section>.xml', sitemaps.sitemap_section, name='sitemap_section'),
     path('robots.txt', TemplateView.as_view(template_name='robots.txt', content_type='text/plain'), name='robots'),
 ]
 
@@ -0,0 +1,86 @@
+// Direct upload of large admin files to R2 (see core/direct_uploads.py):
+// the browser gets a presigned PUT URL, uploads the file straight to the bucket
+// and submits only the object key with the form.
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('input[type="file"][data-direct-upload-url]').forEach(input => {
+        const form = input.form;
+        const keyInput = form.querySelector(`input[name="${input.dataset.directUploadKey}"]`);
+        const status = form.querySelector(`.direct-upload-status[data-for="${input.dataset.directUploadKey}"]`);
+        const submitButtons = form.querySelectorAll('[type="submit"]');
+
+        function setStatus(text, isError) {
+            status.textContent = text;
+            status.style.color = isError ? '#ba2121' : '';
+        }
+
+        function setBusy(busy) {
+            submitButtons.forEach(button => { button.disabled = busy; });
+        }
+
+        function requestUpload(file) {
+            const data = new FormData();
+            data.append('filename', file.name);
+            data.append('content_type', file.type || 'application/octet-stream');
+            data.append('size', file.size);
+            data.append('csrfmiddlewaretoken', form.querySelector('[name="csrfmiddlewaretoken"]').value);
+            return fetch(input.dataset.directUploadUrl, {
+                method: 'POST',
+                body: data,
+                credentials: 'same-origin',
+            }).then(response => response.json().catch(() => ({})).then(payload => {
+                if (!response.ok) {
+                    throw new Error(payload.error || `HTTP ${response.status}`);
+                }
+                return payload;
+            }));
+        }
+
+        function putFile(file, upload) {
+            // XMLHttpRequest instead of fetch: it reports upload progress
+            return new Promise((resolve, reject) => {
+                const xhr = new XMLHttpRequest();
+                xhr.open('PUT', upload.url);
+                Object.entries(upload.headers).forEach(([name, value]) => xhr.setRequestHeader(name, value));
+                xhr.upload.addEventListener('progress', event => {
+                    if (event.lengthComputable) {
+                        setStatus(`Загрузка в хранилище: ${Math.round(event.loaded / event.total * 100)}%`);
+                    }
+                });
+                xhr.addEventListener('load', () => {
+                    if (xhr.status >= 200 && xhr.status < 300) {
+                        resolve();
+                    } else {
+                        reject(new Error(`HTTP ${xhr.status}`));
+                    }
+                });
+                xhr.addEventListener('error', () => reject(new Error('сетевая ошибка (проверьте CORS bucket)')));
+                xhr.send(file);
+            });
+        }
+
+        input.addEventListener('change', function() {
+            const file = input.files[0];
+            keyInput.value = '';
+            if (!file) {
+                setStatus('');
+                return;
+            }
+            setBusy(true);
+            setStatus('Подготовка загрузки...');
+            requestUpload(file)
+                .then(upload => putFile(file, upload).then(() => upload))
+                .then(upload => {
+                    keyInput.value = upload.key;
+                    // The file is already in the bucket: the form sends only its key
+                    input.value = '';
+                    setStatus(`Загружено: ${file.name}. Сохраните форму.`);
+                })
+                .catch(error => {
+                    // Fall back to a regular upload through the form
+                    setStatus(`Прямая загрузка не удалась (${error.message}), файл будет отправлен вместе с формой.`, true);
+                })
+                .finally(() => setBusy(false));
+        });
+    });
+});
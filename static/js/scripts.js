@@ -204,6 +204,20 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // PDF viewer: the file is loaded only after the visitor asks for it
+    document.querySelectorAll('.pdf-viewer[data-pdf-src]').forEach(viewer => {
+        const button = viewer.querySelector('.pdf-viewer-open');
+        if (!button) return;
+        button.addEventListener('click', function() {
+            const frame = document.createElement('iframe');
+            frame.src = viewer.dataset.pdfSrc;
+            frame.title = viewer.dataset.pdfTitle || 'PDF';
+            frame.className = 'pdf-viewer-frame';
+            viewer.replaceChildren(frame);
+            viewer.classList.add('is-open');
+        });
+    });
+    
     // Active menu item highlighter based on scroll position
     const sections = document.querySelectorAll('section[id]');
     